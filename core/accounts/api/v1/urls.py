@@ -9,6 +9,7 @@ from accounts.api.v1.views import (
     ActivationResendApiView,
     ActivationApiView,
 )
+from accounts.throttling import AUTH_THROTTLES
 from rest_framework_simplejwt.views import (
     TokenObtainPairView,
     TokenRefreshView,
@@ -40,7 +41,11 @@ urlpatterns = [
     path("token/login/", CustomAuthToken.as_view(), name="token-login"),
     path("token/logout/", CustomDiscardAuthToken.as_view(), name="token-logout"),
     # jwt
-    path("jwt/create", TokenObtainPairView.as_view(), name="token_obtain_pair"),
+    path(
+        "jwt/create",
+        TokenObtainPairView.as_view(throttle_classes=AUTH_THROTTLES),
+        name="token_obtain_pair",
+    ),
     path("jwt/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
     path("jwt/verify/", TokenVerifyView.as_view(), name="token_verify"),
 ]
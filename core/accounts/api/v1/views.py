@@ -12,17 +12,18 @@ from rest_framework import status
 from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.authtoken.models import Token
 from rest_framework.permissions import IsAuthenticated
-from mail_templated import send_mail, EmailMessage
+from rest_framework.settings import api_settings
 from django.shortcuts import get_object_or_404
-from accounts.models import User
-from accounts.api.utils import EmailThread
+from accounts.models import User, get_profile
+from accounts.tasks import send_email
 from rest_framework_simplejwt.tokens import RefreshToken
 import jwt
 from jwt.exceptions import ExpiredSignatureError, InvalidSignatureError, DecodeError
 from core.settings import SECRET_KEY
+from accounts.throttling import AuthThrottledAPIMixin
 
 
-class RegistrationApiView(GenericAPIView):
+class RegistrationApiView(AuthThrottledAPIMixin, GenericAPIView):
     serializer_class = RegistrationSerializer
 
     def post(self, request, *args, **kwargs):
@@ -35,13 +36,12 @@ class RegistrationApiView(GenericAPIView):
             data = {"email": email}
             user_obj = get_object_or_404(User, email=email)
             token = self.get_tokens_for_user(user_obj)
-            email_obj = EmailMessage(
+            send_email.delay(
                 "email/activation_email.tpl",
                 {"token": token},
                 "admin@admin.com",
-                to=[email],
+                [email],
             )
-            EmailThread(email_obj).start()
             return Response(data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -50,8 +50,11 @@ class RegistrationApiView(GenericAPIView):
         return str(refresh.access_token)
 
 
-class CustomAuthToken(ObtainAuthToken):
+class CustomAuthToken(AuthThrottledAPIMixin, ObtainAuthToken):
     serializer_class = CustomAuthTokenSerializer
+    # ObtainAuthToken sets its own classes, keep the ones of the other views
+    renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES
+    parser_classes = api_settings.DEFAULT_PARSER_CLASSES
 
     def post(self, request, *args, **kwargs):
         serializer = self.serializer_class(
@@ -76,7 +79,7 @@ class ProfileApiView(RetrieveUpdateAPIView):
     serializer_class = ProfileSerializer
 
     def get_object(self):
-        return self.request.user.profile
+        return get_profile(self.request.user)
 
 
 class ChangePasswordApiView(GenericAPIView):
@@ -100,13 +103,12 @@ class TestEmailSend(GenericAPIView):
         self.email = "admin@admin.com"
         user_obj = get_object_or_404(User, email=self.email)
         token = self.get_tokens_for_user(user_obj)
-        email_obj = EmailMessage(
+        send_email.delay(
             "email/activation_email.tpl",
             {"token": token},
             "admin@admin.com",
-            to=[self.email],
+            [self.email],
         )
-        EmailThread(email_obj).start()
         return Response(
             {"details": "send email successfully"}, status=status.HTTP_200_OK
         )
@@ -152,7 +154,7 @@ class ActivationApiView(APIView):
         )
 
 
-class ActivationResendApiView(GenericAPIView):
+class ActivationResendApiView(AuthThrottledAPIMixin, GenericAPIView):
     serializer_class = ActivationResendSerializer
 
     def post(self, request, *args, **kwargs):
@@ -160,13 +162,12 @@ class ActivationResendApiView(GenericAPIView):
         serializer.is_valid(raise_exception=True)
         user_obj = serializer.validated_data["user"]
         token = self.get_tokens_for_user(user_obj)
-        email_obj = EmailMessage(
+        send_email.delay(
             "email/activation_email.tpl",
             {"token": token},
             "admin@admin.com",
-            to=[user_obj.email],
+            [user_obj.email],
         )
-        EmailThread(email_obj).start()
         return Response(
             {"details": "user activation resend successfully"},
             status=status.HTTP_200_OK,
@@ -3,11 +3,14 @@ from django.contrib.auth.models import (
     AbstractBaseUser,
     PermissionsMixin,
 )
-from django.db import models
+from django.db import DEFAULT_DB_ALIAS, models, transaction
 from django.utils.translation import ugettext_lazy as _
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 
+from core.querycache import CachedQuerySet, bump_instance
+from core.tiered_cache import TieredCache
+
 
 class UserManager(BaseUserManager):
     """
@@ -77,10 +80,18 @@ class Profile(models.Model):
     created_date = models.DateTimeField(auto_now_add=True)
     updated_date = models.DateTimeField(auto_now=True)
 
+    # reads are cached (see core.querycache) per user
+    cache_scope = "user"
+    objects = CachedQuerySet.as_manager()
+
     def __str__(self):
         return self.user.email
 
 
+post_save.connect(bump_instance, sender=Profile)
+post_delete.connect(bump_instance, sender=Profile)
+
+
 @receiver(post_save, sender=User)
 def save_profile(sender, instance, created, **kwargs):
     """
@@ -94,3 +105,44 @@ def save_profile(sender, instance, created, **kwargs):
                 "last_name": "",
             },
         )
+
+
+PROFILE_FIELDS = [f.attname for f in Profile._meta.concrete_fields]
+# rows of the profiles by user id, read on most authenticated requests
+profiles = TieredCache("profile", timeout=300)
+
+
+def get_profile(user):
+    """
+    Profile of a user read through the two-tier cache, None for anonymous
+    users and users without one. It's cached on user too so user.profile
+    doesn't query it again
+    """
+    if not user.is_authenticated:
+        return None
+    if User.profile.related.is_cached(user):
+        return user.profile
+    row = profiles.get_or_set(
+        user.pk,
+        lambda: Profile.objects.filter(user_id=user.pk)
+        .values_list(*PROFILE_FIELDS)
+        .first(),
+    )
+    if row is None:
+        return None
+    # a new instance per call, the cached row is shared by the threads
+    profile = Profile.from_db(DEFAULT_DB_ALIAS, PROFILE_FIELDS, row)
+    User.profile.related.set_cached_value(user, profile)
+    Profile.user.field.set_cached_value(profile, user)
+    return profile
+
+
+@receiver(post_save, sender=Profile)
+@receiver(post_delete, sender=Profile)
+def invalidate_profile(sender, instance, **kwargs):
+    """
+    Signal for profile writes which drops the cached row, again when the
+    transaction commits in case a read cached the old one meanwhile
+    """
+    profiles.delete(instance.user_id)
+    transaction.on_commit(lambda: profiles.delete(instance.user_id))
@@ -0,0 +1,173 @@
+"""
+Session engine storing the sessions out of the database (SESSION_ENGINE =
+"accounts.sessions", set when SESSION_STORE is configured).
+
+With the database backend every HTML request reads django_session and every
+login writes it under sqlite's single writer lock. This engine keeps the
+encoded sessions in a store picked by SESSION_STORE: RedisSessionStore,
+shared by the processes, or LocalSessionStore, the memory of the process for
+development and tests. Sessions expire lazily: redis drops the keys after
+their TTL and the local store when they're read (or swept when it's full),
+so nothing like clearsessions has to run. The migrate_sessions command
+copies the live sessions of the database backend into the store.
+"""
+
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.sessions.backends.base import CreateError, SessionBase
+from django.utils.module_loading import import_string
+
+KEY_PREFIX = "session:"
+
+_stores = {}
+
+
+class LocalSessionStore:
+    """
+    Sessions kept in the memory of the process, lost on restarts
+    """
+
+    # sessions past which expired ones are swept
+    MAX_SESSIONS = 10000
+
+    def __init__(self):
+        self.sessions = {}
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.sessions.get(key)
+            if entry is None:
+                return None
+            expires, data = entry
+            if expires <= time.monotonic():
+                del self.sessions[key]
+                return None
+            return data
+
+    def set(self, key, data, age, create=False):
+        """
+        Store data for age seconds, when the key doesn't exist yet only with
+        create. Returns whether it was stored
+        """
+        now = time.monotonic()
+        with self.lock:
+            if create:
+                entry = self.sessions.get(key)
+                if entry is not None and entry[0] > now:
+                    return False
+            if len(self.sessions) >= self.MAX_SESSIONS:
+                self.sweep(now)
+            self.sessions[key] = (now + age, data)
+            return True
+
+    def set_many(self, sessions):
+        for key, data, age in sessions:
+            if age > 0:
+                self.set(key, data, age)
+
+    def delete(self, key):
+        with self.lock:
+            self.sessions.pop(key, None)
+
+    def sweep(self, now):
+        for key in [
+            key for key, (expires, _) in self.sessions.items() if expires <= now
+        ]:
+            del self.sessions[key]
+
+
+class RedisSessionStore:
+    """
+    Sessions kept in redis strings expiring with the sessions
+    """
+
+    def __init__(self, url=None):
+        import redis
+
+        self.client = redis.Redis.from_url(url or settings.SESSION_REDIS_URL)
+
+    def get(self, key):
+        data = self.client.get(KEY_PREFIX + key)
+        return None if data is None else data.decode()
+
+    def set(self, key, data, age, create=False):
+        if age <= 0:
+            return not create
+        return bool(self.client.set(KEY_PREFIX + key, data, ex=age, nx=create))
+
+    def set_many(self, sessions):
+        with self.client.pipeline(transaction=False) as pipe:
+            for key, data, age in sessions:
+                if age > 0:
+                    pipe.set(KEY_PREFIX + key, data, ex=age)
+            pipe.execute()
+
+    def delete(self, key):
+        self.client.delete(KEY_PREFIX + key)
+
+
+def get_store():
+    path = settings.SESSION_STORE
+    if path not in _stores:
+        _stores[path] = import_string(path)()
+    return _stores[path]
+
+
+def reset():
+    """
+    Forget every session of the local stores, for tests
+    """
+    _stores.clear()
+
+
+class SessionStore(SessionBase):
+    def __init__(self, session_key=None):
+        self.store = get_store()
+        super().__init__(session_key)
+
+    def load(self):
+        data = self.store.get(self.session_key) if self.session_key else None
+        if data is None:
+            self._session_key = None
+            return {}
+        return self.decode(data)
+
+    def exists(self, session_key):
+        return self.store.get(session_key) is not None
+
+    def create(self):
+        # random keys only collide by chance, retry a few times
+        for _ in range(10):
+            self._session_key = self._get_new_session_key()
+            try:
+                self.save(must_create=True)
+            except CreateError:
+                continue
+            self.modified = True
+            return
+        raise RuntimeError("Unable to create a new session key.")
+
+    def save(self, must_create=False):
+        if self.session_key is None:
+            return self.create()
+        data = self.encode(self._get_session(no_load=must_create))
+        stored = self.store.set(
+            self.session_key, data, self.get_expiry_age(), create=must_create
+        )
+        if must_create and not stored:
+            raise CreateError
+
+    def delete(self, session_key=None):
+        if session_key is None:
+            if self.session_key is None:
+                return
+            session_key = self.session_key
+        self.store.delete(session_key)
+
+    @classmethod
+    def clear_expired(cls):
+        # expired sessions are dropped by the store itself
+        pass
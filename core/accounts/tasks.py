@@ -0,0 +1,16 @@
+import smtplib
+
+from celery import shared_task
+from mail_templated import EmailMessage
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=60)
+def send_email(self, template_name, context, from_email, to):
+    """
+    Send a mail_templated email, routed to the email queue so activation
+    mails don't wait behind maintenance or bulk jobs
+    """
+    try:
+        EmailMessage(template_name, context, from_email, to=to).send()
+    except (smtplib.SMTPException, OSError) as e:
+        raise self.retry(exc=e)
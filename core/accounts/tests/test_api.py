@@ -348,6 +348,15 @@ class TestActivationResendApiView:
         assert response.status_code == status.HTTP_200_OK
         assert "details" in response.data
 
+    def test_resend_activation_sends_email(
+        self, api_client, unverified_user, mailoutbox
+    ):
+        """Test that the activation email is sent by the email task"""
+        url = reverse("accounts:api-v1:activation-resend")
+        api_client.post(url, {"email": unverified_user.email})
+        assert len(mailoutbox) == 1
+        assert mailoutbox[0].to == [unverified_user.email]
+
 
 @pytest.mark.django_db
 class TestJWTAuthentication:
@@ -0,0 +1,152 @@
+import time
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.contrib.sessions.backends.base import CreateError
+from django.contrib.sessions.backends.db import SessionStore as DBSessionStore
+from django.contrib.sessions.models import Session
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from accounts import sessions
+from accounts.models import User
+from core.settings import _session_engine
+
+
+@pytest.fixture
+def store(settings):
+    """A fresh local session store"""
+    settings.SESSION_ENGINE = "accounts.sessions"
+    settings.SESSION_STORE = "accounts.sessions.LocalSessionStore"
+    sessions.reset()
+    yield sessions.get_store()
+    sessions.reset()
+
+
+@pytest.fixture
+def user(db):
+    return User.objects.create_user(
+        email="testuser@example.com", password="testpass123", is_verified=True
+    )
+
+
+class TestSessionStore:
+    """Test suite for the session engine out of the database"""
+
+    def test_round_trip(self, store):
+        session = sessions.SessionStore()
+        session["user"] = 1
+        session.save()
+        key = session.session_key
+        assert sessions.SessionStore(key)["user"] == 1
+        assert session.exists(key)
+
+        session = sessions.SessionStore(key)
+        session["user"] = 2
+        session.save()
+        assert sessions.SessionStore(key)["user"] == 2
+        session.delete()
+        assert not session.exists(key)
+        assert sessions.SessionStore(key).load() == {}
+
+    def test_lazy_expiry(self, store):
+        session = sessions.SessionStore()
+        session["user"] = 1
+        session.set_expiry(1)
+        session.save()
+        key = session.session_key
+        time.sleep(1.05)
+        assert sessions.SessionStore(key).load() == {}
+        assert key not in store.sessions
+
+    def test_expired_sessions_are_swept(self, monkeypatch, store):
+        monkeypatch.setattr(store, "MAX_SESSIONS", 2)
+        store.set("first", "data", 0.01)
+        store.set("second", "data", 0.01)
+        time.sleep(0.02)
+        store.set("third", "data", 60)
+        assert list(store.sessions) == ["third"]
+
+    def test_keys_are_created_once(self, store):
+        session = sessions.SessionStore()
+        session.save()
+        existing = sessions.SessionStore(session.session_key)
+        with pytest.raises(CreateError):
+            existing.save(must_create=True)
+
+    def test_login(self, store, client, user):
+        """Test that logins and page views don't touch the session table"""
+        client.post(
+            reverse("accounts:login"),
+            {"username": user.email, "password": "testpass123"},
+        )
+        assert not Session.objects.exists()
+        assert len(store.sessions) == 1
+        response = client.get(reverse("accounts:profile"))
+        assert response.status_code == 200
+
+    def test_signed_cookies(self, settings, store, client, user):
+        settings.SESSION_ENGINE = "django.contrib.sessions.backends.signed_cookies"
+        client.force_login(user)
+        assert client.get(reverse("accounts:profile")).status_code == 200
+        assert not store.sessions
+        assert not Session.objects.exists()
+
+    @pytest.mark.parametrize(
+        "signed_cookies, store, engine",
+        [
+            (False, "", "django.contrib.sessions.backends.db"),
+            (False, "accounts.sessions.RedisSessionStore", "accounts.sessions"),
+            (True, "", "django.contrib.sessions.backends.signed_cookies"),
+            (
+                True,
+                "accounts.sessions.RedisSessionStore",
+                "django.contrib.sessions.backends.signed_cookies",
+            ),
+        ],
+    )
+    def test_session_engine(self, signed_cookies, store, engine):
+        """Test the engine picked from SESSION_SIGNED_COOKIES and SESSION_STORE"""
+        assert _session_engine(signed_cookies, store) == engine
+
+    def test_database_without_a_store(self, settings, client, user):
+        """Test that sessions stay in the database unless a store is set"""
+        settings.SESSION_ENGINE = _session_engine(False, "")
+        client.post(
+            reverse("accounts:login"),
+            {"username": user.email, "password": "testpass123"},
+        )
+        assert Session.objects.count() == 1
+        assert client.get(reverse("accounts:profile")).status_code == 200
+
+
+@pytest.mark.django_db
+class TestMigrateSessions:
+    """Test suite for the migrate_sessions management command"""
+
+    def db_session(self, data, age):
+        session = DBSessionStore()
+        session.update(data)
+        session.save()
+        Session.objects.filter(pk=session.session_key).update(
+            expire_date=timezone.now() + timedelta(seconds=age)
+        )
+        return session.session_key
+
+    def test_live_sessions_are_copied(self, store):
+        live = [self.db_session({"user": i}, 3600) for i in range(3)]
+        expired = self.db_session({"user": "expired"}, -1)
+        out = StringIO()
+        call_command("migrate_sessions", batch_size=2, stdout=out)
+        assert "copied 3 sessions" in out.getvalue()
+        assert [sessions.SessionStore(key)["user"] for key in live] == [0, 1, 2]
+        assert sessions.SessionStore(expired).load() == {}
+        assert Session.objects.count() == 4
+        assert 3500 < store.sessions[live[0]][0] - time.monotonic() <= 3600
+
+    def test_delete(self, store):
+        self.db_session({"user": 1}, 3600)
+        call_command("migrate_sessions", delete=True, stdout=StringIO())
+        assert not Session.objects.exists()
+        assert len(store.sessions) == 1
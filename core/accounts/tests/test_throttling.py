@@ -0,0 +1,169 @@
+import base64
+import time
+
+import pytest
+from django.contrib.auth.hashers import MD5PasswordHasher
+from django.urls import reverse
+from rest_framework.test import APIClient
+from accounts import throttling
+from accounts.models import User
+
+
+class CountingHasher(MD5PasswordHasher):
+    """Password hasher counting the hashes computed, the CPU of a login"""
+
+    hashes = 0
+
+    def encode(self, password, salt):
+        CountingHasher.hashes += 1
+        return super().encode(password, salt)
+
+
+@pytest.fixture
+def rates(settings):
+    settings.AUTH_THROTTLE_RATES = {"auth_ip": "10/min", "auth_email": "3/min"}
+    return settings.AUTH_THROTTLE_RATES
+
+
+@pytest.fixture
+def user(db, settings):
+    settings.PASSWORD_HASHERS = ["accounts.tests.test_throttling.CountingHasher"]
+    user = User.objects.create_user(
+        email="testuser@example.com", password="testpass123", is_verified=True
+    )
+    CountingHasher.hashes = 0
+    return user
+
+
+def login(client, email, ip="10.0.0.1", **headers):
+    return client.post(
+        reverse("accounts:api-v1:token-login"),
+        {"email": email, "password": "wrong"},
+        format="json",
+        REMOTE_ADDR=ip,
+        **headers,
+    )
+
+
+class TestLocalSlidingWindow:
+    """Test suite for the in process sliding windows"""
+
+    def test_limit_and_wait(self):
+        window = throttling.LocalSlidingWindow()
+        assert [window.hit("key", 2, 60)[0] for _ in range(3)] == [True, True, False]
+        allowed, wait = window.hit("key", 2, 60)
+        assert not allowed and 59 < wait <= 60
+        assert window.hit("other", 2, 60)[0]
+
+    def test_window_slides(self):
+        window = throttling.LocalSlidingWindow()
+        assert window.hit("key", 1, 0.05)[0]
+        assert not window.hit("key", 1, 0.05)[0]
+        time.sleep(0.06)
+        assert window.hit("key", 1, 0.05)[0]
+
+    def test_expired_windows_are_swept(self, monkeypatch):
+        window = throttling.LocalSlidingWindow()
+        monkeypatch.setattr(window, "MAX_KEYS", 2)
+        window.hit("first", 1, 0.01)
+        window.hit("second", 1, 0.01)
+        time.sleep(0.02)
+        window.hit("third", 1, 60)
+        assert list(window.windows) == ["third"]
+
+
+@pytest.mark.django_db
+class TestAuthThrottles:
+    """Test suite for the throttling of the authentication endpoints"""
+
+    def test_email_is_throttled_across_ips(self, rates, user):
+        """Test that one account only gets its attempts whatever the IPs"""
+        client = APIClient()
+        codes = [
+            login(client, "TestUser@example.com", "10.0.0.%s" % i).status_code
+            for i in range(5)
+        ]
+        assert codes == [400, 400, 400, 429, 429]
+        assert login(client, "another@example.com", "10.0.0.9").status_code == 400
+
+    def test_ip_is_throttled_across_emails(self, rates, user):
+        client = APIClient()
+        codes = [login(client, "user%s@example.com" % i).status_code for i in range(12)]
+        assert codes == [400] * 10 + [429] * 2
+        response = login(client, "user@example.com")
+        assert 0 < int(response["Retry-After"]) <= 60
+
+    def test_spoofed_forwarded_for_is_ignored(self, rates, user):
+        """Test that rotating X-Forwarded-For doesn't open new IP windows"""
+        client = APIClient()
+        codes = [
+            login(
+                client, "user%s@example.com" % i, HTTP_X_FORWARDED_FOR="1.2.3.%s" % i
+            ).status_code
+            for i in range(12)
+        ]
+        assert codes == [400] * 10 + [429] * 2
+
+    def test_forwarded_for_hop_of_the_proxy(self, rates, user, settings):
+        """Test that behind a proxy the hop it appended is the client"""
+        settings.REST_FRAMEWORK = {**settings.REST_FRAMEWORK, "NUM_PROXIES": 1}
+        client = APIClient()
+        codes = [
+            login(
+                client,
+                "user%s@example.com" % i,
+                HTTP_X_FORWARDED_FOR="1.2.3.%s, 10.9.9.9" % i,
+            ).status_code
+            for i in range(12)
+        ]
+        assert codes == [400] * 10 + [429] * 2
+        other = login(client, "x@example.com", HTTP_X_FORWARDED_FOR="10.8.8.8")
+        assert other.status_code == 400
+
+    @pytest.mark.parametrize(
+        "url_name",
+        ["token-login", "token_obtain_pair", "registration", "activation-resend"],
+    )
+    def test_basic_auth_is_throttled(self, rates, user, url_name):
+        """Test that credentials in a Basic header are no way around"""
+        client = APIClient()
+        credentials = base64.b64encode(b"testuser@example.com:wrong").decode()
+        client.credentials(HTTP_AUTHORIZATION="Basic %s" % credentials)
+        url = reverse("accounts:api-v1:%s" % url_name)
+        codes = [client.post(url, {}, format="json").status_code for _ in range(12)]
+        assert codes[10:] == [429, 429]
+        assert CountingHasher.hashes == 0
+
+    def test_cpu_stays_bounded(self, rates, user):
+        """Test that a stuffing burst hashes only up to the throttle limit"""
+        client = APIClient()
+        started = time.process_time()
+        responses = [login(client, user.email).status_code for _ in range(200)]
+        assert responses.count(429) == 197
+        assert CountingHasher.hashes == 3
+        # 200 hashes with the default PBKDF2 iterations would take tens of seconds
+        assert time.process_time() - started < 5
+
+    @pytest.mark.parametrize(
+        "url_name, data",
+        [
+            ("token_obtain_pair", {"email": "x@example.com", "password": "x"}),
+            ("registration", {"email": "x@example.com", "password": "x"}),
+            ("activation-resend", {"email": "x@example.com"}),
+        ],
+    )
+    def test_other_endpoints(self, rates, user, url_name, data):
+        url = reverse("accounts:api-v1:%s" % url_name)
+        codes = [
+            APIClient().post(url, data, format="json").status_code for _ in range(4)
+        ]
+        assert 429 not in codes[:3] and codes[3] == 429
+
+    def test_login_page(self, rates, user, client):
+        """Test that the HTML login form is throttled too, but not its GET"""
+        url = reverse("accounts:login")
+        data = {"username": user.email, "password": "wrong"}
+        codes = [client.post(url, data).status_code for _ in range(4)]
+        assert codes == [200, 200, 200, 429]
+        assert client.get(url).status_code == 200
+        assert CountingHasher.hashes == 3
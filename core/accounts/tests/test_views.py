@@ -130,3 +130,43 @@ class TestCustomLogoutView:
         assert response.url == "/"
         response = client.get(reverse("accounts:login"))
         assert response.status_code == 200
+
+
+@pytest.mark.django_db
+class TestProfileView:
+    """Test suite for the profile page and its cached lookups"""
+
+    def test_counts(self, client, common_user):
+        profile = common_user.profile
+        Task.objects.create(user=profile, title="First", complete=True)
+        Task.objects.create(user=profile, title="Second")
+        client.force_login(common_user)
+        response = client.get(reverse("accounts:profile"))
+        assert response.context["total_tasks"] == 2
+        assert response.context["completed_tasks"] == 1
+        assert response.context["pending_tasks"] == 1
+
+    def test_lookups_are_cached(self, client, common_user, django_assert_num_queries):
+        """Test that the profile and the counts are read once"""
+        client.force_login(common_user)
+        url = reverse("accounts:profile")
+        client.get(url)
+        # the user, no session (accounts.sessions), profile nor count
+        with django_assert_num_queries(1):
+            client.get(url)
+
+    def test_writes_invalidate(self, client, common_user):
+        profile = common_user.profile
+        client.force_login(common_user)
+        url = reverse("accounts:profile")
+        assert client.get(url).context["total_tasks"] == 0
+        task = Task.objects.create(user=profile, title="First")
+        assert client.get(url).context["total_tasks"] == 1
+        task.delete()
+        assert client.get(url).context["total_tasks"] == 0
+
+        Profile.objects.filter(pk=profile.pk).update(first_name="Stale")
+        assert client.get(url).context["profile"].first_name == ""
+        profile.first_name = "Saved"
+        profile.save()
+        assert client.get(url).context["profile"].first_name == "Saved"
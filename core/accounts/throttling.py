@@ -0,0 +1,206 @@
+"""
+Sliding window throttling of the authentication endpoints.
+
+Logins, registrations and activation emails hash passwords (PBKDF2) or send
+mail, so a burst of credential stuffing can take every worker's CPU. The
+throttles here count the attempts of an IP and of an email in a sliding
+window and answer 429 before the view runs, which costs a dictionary or
+redis round trip instead of a hash. Windows live in redis
+(RedisSlidingWindow, shared by every worker) or in the process
+(LocalSlidingWindow, for development and tests), see AUTH_THROTTLE_BACKEND.
+"""
+
+import collections
+import hashlib
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.module_loading import import_string
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.throttling import SimpleRateThrottle
+
+_backends = {}
+
+
+class LocalSlidingWindow:
+    """
+    Windows kept in the memory of the process, every worker counts on its own
+    """
+
+    # windows past which expired ones are swept
+    MAX_KEYS = 10000
+
+    def __init__(self):
+        self.windows = {}
+        self.lock = threading.Lock()
+
+    def hit(self, key, limit, duration):
+        """
+        Count an attempt for key unless limit attempts were made in the last
+        duration seconds, returns (allowed, seconds to wait)
+        """
+        now = time.monotonic()
+        with self.lock:
+            if len(self.windows) >= self.MAX_KEYS:
+                self.sweep(now)
+            # expiry times of the attempts in the window, oldest first
+            window = self.windows.setdefault(key, collections.deque())
+            while window and window[0] <= now:
+                window.popleft()
+            if len(window) >= limit:
+                return False, window[0] - now
+            window.append(now + duration)
+            return True, 0
+
+    def sweep(self, now):
+        for key in [key for key, window in self.windows.items() if window[-1] <= now]:
+            del self.windows[key]
+
+
+class RedisSlidingWindow:
+    """
+    Windows kept in redis sorted sets, one member per attempt scored with
+    the redis clock, checked and updated atomically by a script
+    """
+
+    SCRIPT = """
+    local time = redis.call('TIME')
+    local now = time[1] * 1000 + math.floor(time[2] / 1000)
+    local duration = tonumber(ARGV[2])
+    redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now - duration)
+    if redis.call('ZCARD', KEYS[1]) >= tonumber(ARGV[1]) then
+        local oldest = redis.call('ZRANGE', KEYS[1], 0, 0, 'WITHSCORES')
+        return {0, tonumber(oldest[2]) + duration - now}
+    end
+    redis.call('ZADD', KEYS[1], now, ARGV[3])
+    redis.call('PEXPIRE', KEYS[1], duration)
+    return {1, 0}
+    """
+
+    def __init__(self, url=None):
+        import redis
+
+        self.client = redis.Redis.from_url(url or settings.AUTH_THROTTLE_REDIS_URL)
+        self.script = self.client.register_script(self.SCRIPT)
+
+    def hit(self, key, limit, duration):
+        import redis
+
+        try:
+            allowed, wait = self.script(
+                keys=[key], args=[limit, int(duration * 1000), uuid.uuid4().hex]
+            )
+        except redis.RedisError:
+            # keep the endpoints up when redis isn't, unthrottled
+            return True, 0
+        return bool(allowed), wait / 1000
+
+
+def get_backend():
+    path = settings.AUTH_THROTTLE_BACKEND
+    if path not in _backends:
+        _backends[path] = import_string(path)()
+    return _backends[path]
+
+
+def reset():
+    """
+    Forget every window of the process, for tests
+    """
+    _backends.clear()
+
+
+class SlidingWindowThrottle(SimpleRateThrottle):
+    """
+    Throttle of unsafe requests counted in the sliding windows of the
+    backend, rates are the ones of AUTH_THROTTLE_RATES for the scope
+    """
+
+    def get_rate(self):
+        return settings.AUTH_THROTTLE_RATES.get(self.scope)
+
+    def allow_request(self, request, view):
+        if self.rate is None or request.method in SAFE_METHODS:
+            return True
+        key = self.get_cache_key(request, view)
+        if key is None:
+            return True
+        allowed, self.wait_time = get_backend().hit(
+            key, self.num_requests, self.duration
+        )
+        return allowed
+
+    def wait(self):
+        return self.wait_time
+
+
+class AuthIPThrottle(SlidingWindowThrottle):
+    """
+    Attempts from one address, REMOTE_ADDR or the X-Forwarded-For hop of
+    the REST_FRAMEWORK["NUM_PROXIES"] proxies, never a hop the client wrote
+    """
+
+    scope = "auth_ip"
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {
+            "scope": self.scope,
+            "ident": self.get_ident(request),
+        }
+
+
+class AuthEmailThrottle(SlidingWindowThrottle):
+    """
+    Attempts on one account, whatever the IPs they come from
+    """
+
+    scope = "auth_email"
+
+    def get_cache_key(self, request, view):
+        data = request.data if hasattr(request, "data") else request.POST
+        # the email field of the API, the username field of the login form
+        email = data.get("email") or data.get("username")
+        if not isinstance(email, str) or not email.strip():
+            return None
+        digest = hashlib.sha256(email.strip().lower().encode()).hexdigest()
+        return self.cache_format % {"scope": self.scope, "ident": digest[:32]}
+
+
+AUTH_THROTTLES = [AuthIPThrottle, AuthEmailThrottle]
+
+
+class AuthThrottledAPIMixin:
+    """
+    AUTH_THROTTLES for DRF views checking credentials themselves, without
+    authentication: DRF authenticates before it throttles, the password of
+    an Authorization: Basic header would be hashed before any 429 and its
+    failures never counted
+    """
+
+    authentication_classes = []
+    throttle_classes = AUTH_THROTTLES
+
+
+class ThrottleMixin:
+    """
+    AUTH_THROTTLES for django (non DRF) views, throttled requests get a
+    plain 429 before the view does anything
+    """
+
+    throttle_classes = AUTH_THROTTLES
+
+    def dispatch(self, request, *args, **kwargs):
+        for throttle_class in self.throttle_classes:
+            throttle = throttle_class()
+            if not throttle.allow_request(request, self):
+                response = HttpResponse(
+                    "Too many attempts, try again later.",
+                    status=429,
+                    content_type="text/plain",
+                )
+                response["Retry-After"] = str(int(throttle.wait()) + 1)
+                return response
+        return super().dispatch(request, *args, **kwargs)
@@ -6,7 +6,9 @@ from django.contrib.auth.views import LoginView, LogoutView
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.auth import login
 
-from todo.models import Task
+from accounts.throttling import ThrottleMixin
+from accounts.models import get_profile
+from todo.counters import task_counts
 
 
 class RegisterPage(FormView):
@@ -30,7 +32,7 @@ class RegisterPage(FormView):
         return super().get(*args, **kwargs)
 
 
-class CustomLoginView(LoginView):
+class CustomLoginView(ThrottleMixin, LoginView):
     """
     Custom login view with redirect for already authenticated users
     """
@@ -59,15 +61,18 @@ class ProfileView(LoginRequiredMixin, TemplateView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        profile = getattr(self.request.user, "profile", None)
-
-        tasks = Task.objects.filter(user=profile) if profile else Task.objects.none()
+        profile = get_profile(self.request.user)
+        counts = (
+            task_counts(profile)
+            if profile
+            else {"total": 0, "complete": 0, "pending": 0}
+        )
         context.update(
             {
                 "profile": profile,
-                "total_tasks": tasks.count(),
-                "completed_tasks": tasks.filter(complete=True).count(),
-                "pending_tasks": tasks.filter(complete=False).count(),
+                "total_tasks": counts["total"],
+                "completed_tasks": counts["complete"],
+                "pending_tasks": counts["pending"],
             }
         )
         return context
@@ -0,0 +1,190 @@
+"""
+Concurrent connection throughput of the task list, WSGI against ASGI.
+
+Every connection is a slow client which takes --delay seconds to drain the
+response. The WSGI path (core.wsgi, /api/v1/task/) is served by a fixed
+pool of --threads worker threads which stay blocked on the slow write, like
+a threaded WSGI server; the ASGI path (core.asgi, /api/v1/async/task/) runs
+on one event loop and awaits the slow send. Reports requests per second and
+latency with --connections clients in flight.
+
+usage (from the core/ directory):
+    python -m benchmarks.asgi_slow_clients --connections 200 --threads 8 --delay 0.05
+"""
+
+import argparse
+import asyncio
+import io
+import multiprocessing
+import os
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+def setup_django(db_path):
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+    os.environ["DATABASE_NAME"] = db_path
+    import django
+
+    django.setup()
+
+
+def migrate(db_path):
+    setup_django(db_path)
+    from django.core.management import call_command
+
+    call_command("migrate", verbosity=0)
+
+
+def create_fixtures(tasks):
+    """
+    Create a user with some tasks, return its token key
+    """
+    from rest_framework.authtoken.models import Token
+    from accounts.models import User
+    from todo.sharding import create_task
+
+    user = User.objects.create_user(
+        email="bench@example.com", password="benchpass123", is_verified=True
+    )
+    for i in range(tasks):
+        create_task(user.profile, title="task %s" % i, description="description")
+    return Token.objects.create(user=user).key
+
+
+def wsgi_request(application, path, token, delay, accepted):
+    environ = {
+        "REQUEST_METHOD": "GET",
+        "PATH_INFO": path,
+        "QUERY_STRING": "",
+        "SERVER_NAME": "localhost",
+        "SERVER_PORT": "8000",
+        "SERVER_PROTOCOL": "HTTP/1.1",
+        "HTTP_AUTHORIZATION": "Token " + token,
+        "wsgi.input": io.BytesIO(),
+        "wsgi.errors": io.StringIO(),
+        "wsgi.url_scheme": "http",
+        "wsgi.version": (1, 0),
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": False,
+        "wsgi.run_once": False,
+    }
+    statuses = []
+    body = application(environ, lambda status, headers: statuses.append(status))
+    try:
+        for _ in body:
+            # the worker thread blocks until the client took the chunk
+            time.sleep(delay)
+    finally:
+        body.close()
+    assert statuses[0].startswith("200"), statuses[0]
+    # latency includes the time the connection waited for a free thread
+    return time.perf_counter() - accepted
+
+
+async def asgi_request(application, path, token, delay):
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [
+            (b"host", b"localhost:8000"),
+            (b"authorization", ("Token " + token).encode()),
+        ],
+        "client": ("127.0.0.1", 0),
+        "server": ("localhost", 8000),
+    }
+    started = time.perf_counter()
+    statuses = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            statuses.append(message["status"])
+        else:
+            # only this connection waits for the client
+            await asyncio.sleep(delay)
+
+    await application(scope, receive, send)
+    assert statuses[0] == 200, statuses[0]
+    return time.perf_counter() - started
+
+
+def run_wsgi(token, connections, threads, delay):
+    from core.wsgi import application
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        started = time.perf_counter()
+        futures = [
+            pool.submit(
+                wsgi_request, application, "/api/v1/task/", token, delay, started
+            )
+            for _ in range(connections)
+        ]
+        latencies = [future.result() for future in futures]
+    return time.perf_counter() - started, latencies
+
+
+def run_asgi(token, connections, delay):
+    from core.asgi import application
+
+    async def main():
+        started = time.perf_counter()
+        latencies = await asyncio.gather(
+            *(
+                asgi_request(application, "/api/v1/async/task/", token, delay)
+                for _ in range(connections)
+            )
+        )
+        return time.perf_counter() - started, latencies
+
+    return asyncio.run(main())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--connections", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--delay", type=float, default=0.05)
+    parser.add_argument("--tasks", type=int, default=20)
+    args = parser.parse_args()
+
+    db_path = os.path.join(tempfile.mkdtemp(), "bench.sqlite3")
+    # migrate in a fresh process, settings of this one are loaded only once
+    proc = multiprocessing.get_context("spawn").Process(target=migrate, args=(db_path,))
+    proc.start()
+    proc.join()
+    setup_django(db_path)
+    token = create_fixtures(args.tasks)
+
+    print(
+        "connections=%s threads=%s delay=%ss tasks=%s"
+        % (args.connections, args.threads, args.delay, args.tasks)
+    )
+    for label, (elapsed, latencies) in (
+        ("wsgi", run_wsgi(token, args.connections, args.threads, args.delay)),
+        ("asgi", run_asgi(token, args.connections, args.delay)),
+    ):
+        print(
+            "%-5s %8.1f req/s  p50 %6.3fs  max %6.3fs"
+            % (
+                label,
+                args.connections / elapsed,
+                statistics.median(latencies),
+                max(latencies),
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
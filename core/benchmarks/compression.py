@@ -0,0 +1,112 @@
+"""
+Bytes saved against CPU time of the response compression middleware.
+
+Compresses the payloads the middleware sees most (a typical and a large
+task list page as rendered by the API, the rendered todo_list.html and the
+swagger JSON) with gzip and brotli at the levels of core.middleware, and
+reports the compressed size, the ratio and the mean time per response,
+buffered and as a stream of --chunk byte chunks flushed one by one.
+
+usage (from the core/ directory):
+    python -m benchmarks.compression --tasks 1000 --repeat 20
+"""
+
+import argparse
+import time
+
+from benchmarks.json_renderers import page_data, setup_django
+
+
+def html_page(tasks):
+    """
+    todo_list.html rendered for rows (todo.listing) made up in memory, no
+    database needed
+    """
+    from django.contrib.auth.models import AnonymousUser
+    from django.template.loader import render_to_string
+    from django.test import RequestFactory
+    from django.utils import timezone
+    from todo import partials
+
+    request = RequestFactory().get("/")
+    request.user = AnonymousUser()
+    now = timezone.now()
+    rows = [
+        {
+            "id": i,
+            "title": "task number %s" % i,
+            "complete": i % 3 == 0,
+            "created_date": now,
+            "updated_date": now,
+            "excerpt": "description of the task number %s" % i,
+        }
+        for i in range(1, tasks + 1)
+    ]
+    context = {"tasks": rows, "filters": {}, **partials.row_context()}
+    return render_to_string("todo/todo_list.html", context, request).encode()
+
+
+def schema():
+    from django.test import Client
+
+    return Client().get("/swagger.json/").content
+
+
+def timed(function, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = function()
+    return (time.perf_counter() - started) / repeat, result
+
+
+def chunked(data, size):
+    return [data[i : i + size] for i in range(0, len(data), size)]  # noqa: E203
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tasks", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--chunk", type=int, default=64 * 1024)
+    args = parser.parse_args()
+
+    setup_django()
+    from core.middleware import compress, compress_sequence
+    from core.renderers import ORJSONRenderer
+    from todo.api.v1.paginations import DefaultPagination
+
+    renderer = ORJSONRenderer()
+    payloads = [
+        (
+            "api page (%s)" % DefaultPagination.page_size,
+            renderer.render(page_data(DefaultPagination.page_size, False)),
+        ),
+        ("api page (%s)" % args.tasks, renderer.render(page_data(args.tasks, False))),
+        ("todo_list.html (%s)" % args.tasks, html_page(args.tasks)),
+        ("swagger.json", schema()),
+    ]
+    print("repeat=%s stream chunk=%s bytes" % (args.repeat, args.chunk))
+    for label, data in payloads:
+        print("%s: %d bytes" % (label, len(data)))
+        chunks = chunked(data, args.chunk)
+        for encoding in ("gzip", "br"):
+            elapsed, output = timed(lambda: compress(data, encoding), args.repeat)
+            streamed, stream = timed(
+                lambda: b"".join(compress_sequence(chunks, encoding)), args.repeat
+            )
+            print(
+                "  %-4s %9d bytes  ratio %5.2f  %8.3f ms  streamed %9d bytes"
+                " %8.3f ms"
+                % (
+                    encoding,
+                    len(output),
+                    len(data) / len(output),
+                    elapsed * 1000,
+                    len(stream),
+                    streamed * 1000,
+                )
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Encode time and allocations of the JSON renderers on large task pages.
+
+Renders the serialized data of a page of tasks (TaskSerializer output, what
+the list endpoint renders) with DRF's JSONRenderer and core.renderers'
+ORJSONRenderer, and reports the mean time per page, the peak memory
+allocated while rendering (tracemalloc) and checks both outputs are equal.
+Set --raw-dates to render datetime objects instead of the strings
+DateTimeField already formatted.
+
+usage (from the core/ directory):
+    python -m benchmarks.json_renderers --tasks 1000 --repeat 50
+"""
+
+import argparse
+import os
+import time
+import tracemalloc
+
+
+def setup_django():
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+    import django
+
+    django.setup()
+
+
+def page_data(tasks, raw_dates):
+    """
+    Serialized data of a page of tasks, no database needed
+    """
+    from django.utils import timezone
+    from rest_framework.request import Request
+    from rest_framework.test import APIRequestFactory
+    from todo.api.v1.serializers import TaskSerializer
+    from todo.models import Task
+
+    now = timezone.now()
+    page = [
+        Task(
+            id=i,
+            user_id=1,
+            title="task number %s" % i,
+            description="a description of task %s with some words" % i,
+            complete=i % 3 == 0,
+            created_date=now,
+            updated_date=now,
+        )
+        for i in range(tasks)
+    ]
+    request = Request(
+        APIRequestFactory().get("/api/v1/task/"), parser_context={"kwargs": {}}
+    )
+    data = TaskSerializer(page, many=True, context={"request": request}).data
+    if raw_dates:
+        for row in data:
+            row["created_date"] = row["updated_date"] = now
+    return {"count": tasks, "results": data}
+
+
+def measure(renderer, data, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        renderer.render(data)
+    elapsed = (time.perf_counter() - started) / repeat
+
+    tracemalloc.start()
+    output = renderer.render(data)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, output
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tasks", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--raw-dates", action="store_true")
+    args = parser.parse_args()
+
+    setup_django()
+    from rest_framework.renderers import JSONRenderer
+    from core.renderers import ORJSONRenderer
+
+    data = page_data(args.tasks, args.raw_dates)
+    print(
+        "tasks/page=%s repeat=%s raw dates=%s"
+        % (args.tasks, args.repeat, args.raw_dates)
+    )
+    outputs = []
+    for label, renderer in (("json", JSONRenderer()), ("orjson", ORJSONRenderer())):
+        elapsed, peak, output = measure(renderer, data, args.repeat)
+        outputs.append(output)
+        print(
+            "%-7s %8.3f ms/page  peak %8.1f KiB  %8d bytes"
+            % (label, elapsed * 1000, peak / 1024, len(output))
+        )
+    print("same output: %s" % (outputs[0] == outputs[1]))
+
+
+if __name__ == "__main__":
+    main()
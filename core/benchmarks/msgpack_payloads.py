@@ -0,0 +1,71 @@
+"""
+Payload size and encode/decode time of MessagePack against JSON.
+
+Renders the serialized data of task pages (TaskSerializer output, what the
+list endpoint renders) with core.renderers' ORJSONRenderer and
+MessagePackRenderer, parses it back with the matching parser and reports
+the bytes per page, the mean encode and decode time, and checks both
+decode to the same data. A typical page is the page size of the API
+(DefaultPagination), a large one is --tasks rows.
+
+usage (from the core/ directory):
+    python -m benchmarks.msgpack_payloads --tasks 1000 --repeat 200
+"""
+
+import argparse
+import io
+import time
+
+from benchmarks.json_renderers import page_data, setup_django
+
+
+def timed(function, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - started) / repeat
+
+
+def measure(renderer, parser, data, repeat):
+    output = renderer.render(data)
+    encode = timed(lambda: renderer.render(data), repeat)
+    decode = timed(lambda: parser.parse(io.BytesIO(output)), repeat)
+    return len(output), encode, decode, parser.parse(io.BytesIO(output))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tasks", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    setup_django()
+    from core.parsers import MessagePackParser, ORJSONParser
+    from core.renderers import MessagePackRenderer, ORJSONRenderer
+    from todo.api.v1.paginations import DefaultPagination
+
+    formats = (
+        ("json", ORJSONRenderer(), ORJSONParser()),
+        ("msgpack", MessagePackRenderer(), MessagePackParser()),
+    )
+    for label, tasks in (
+        ("typical", DefaultPagination.page_size),
+        ("large", args.tasks),
+    ):
+        data = page_data(tasks, raw_dates=False)
+        print("%s page: tasks=%s repeat=%s" % (label, tasks, args.repeat))
+        decoded = []
+        for name, renderer, format_parser in formats:
+            size, encode, decode, result = measure(
+                renderer, format_parser, data, args.repeat
+            )
+            decoded.append(result)
+            print(
+                "  %-8s %9d bytes  encode %8.1f us  decode %8.1f us"
+                % (name, size, encode * 1e6, decode * 1e6)
+            )
+        print("  same data: %s" % (decoded[0] == decoded[1]))
+
+
+if __name__ == "__main__":
+    main()
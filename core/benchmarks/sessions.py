@@ -0,0 +1,141 @@
+"""
+Login and page view throughput of the session engines.
+
+Runs the same workload in --workers processes against a fresh database
+file for every engine: each worker logs in (creates a session) --logins
+times and reads one of its sessions --requests times, what every HTML page
+view does. Reports the sessions created and loaded per second and the
+"database is locked" errors. The engines are django's database backend,
+accounts.sessions with the local store, with redis when --redis-url is
+given, and signed cookies.
+
+usage (from the core/ directory):
+    python -m benchmarks.sessions --workers 4 --logins 200 --requests 2000
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+
+ENGINES = {
+    "db": ("django.contrib.sessions.backends.db", None),
+    "local": ("accounts.sessions", "accounts.sessions.LocalSessionStore"),
+    "redis": ("accounts.sessions", "accounts.sessions.RedisSessionStore"),
+    "signed_cookies": ("django.contrib.sessions.backends.signed_cookies", None),
+}
+
+
+def setup_django(db_path, engine, redis_url):
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+    os.environ["DATABASE_NAME"] = db_path
+    import django
+    from django.conf import settings
+
+    django.setup()
+    settings.SESSION_ENGINE, store = ENGINES[engine]
+    if store:
+        settings.SESSION_STORE = store
+    if redis_url:
+        settings.SESSION_REDIS_URL = redis_url
+
+
+def migrate(db_path):
+    setup_django(db_path, "db", None)
+    from django.core.management import call_command
+
+    call_command("migrate", verbosity=0)
+
+
+def worker(db_path, engine, redis_url, logins, requests, results):
+    setup_django(db_path, engine, redis_url)
+    from importlib import import_module
+
+    from django.conf import settings
+    from django.db import OperationalError
+
+    SessionStore = import_module(settings.SESSION_ENGINE).SessionStore
+    keys = []
+    locked = 0
+    started = time.perf_counter()
+    for i in range(logins):
+        session = SessionStore()
+        session["_auth_user_id"] = str(i)
+        session["_auth_user_backend"] = "django.contrib.auth.backends.ModelBackend"
+        try:
+            session.save()
+        except OperationalError:
+            locked += 1
+            continue
+        # the cookie of signed sessions is their data
+        keys.append(session.session_key)
+    login_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for _ in range(requests):
+        try:
+            SessionStore(random.choice(keys)).get("_auth_user_id")
+        except OperationalError:
+            locked += 1
+    request_time = time.perf_counter() - started
+    results.put((len(keys), login_time, request_time, locked))
+
+
+def run(engine, workers, logins, requests, redis_url):
+    db_path = os.path.join(tempfile.mkdtemp(), "bench.sqlite3")
+    ctx = multiprocessing.get_context("spawn")
+    # every run needs its own processes, django settings are loaded once
+    proc = ctx.Process(target=migrate, args=(db_path,))
+    proc.start()
+    proc.join()
+
+    results = ctx.Queue()
+    procs = [
+        ctx.Process(
+            target=worker,
+            args=(db_path, engine, redis_url, logins, requests, results),
+        )
+        for _ in range(workers)
+    ]
+    for proc in procs:
+        proc.start()
+    outcomes = [results.get() for _ in procs]
+    for proc in procs:
+        proc.join()
+    return outcomes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--redis-url", help="also benchmark the redis store")
+    args = parser.parse_args()
+
+    print(
+        "workers=%s logins/worker=%s requests/worker=%s"
+        % (args.workers, args.logins, args.requests)
+    )
+    engines = [engine for engine in ENGINES if engine != "redis" or args.redis_url]
+    for engine in engines:
+        outcomes = run(engine, args.workers, args.logins, args.requests, args.redis_url)
+        created = sum(outcome[0] for outcome in outcomes)
+        login_time = max(outcome[1] for outcome in outcomes)
+        request_time = max(outcome[2] for outcome in outcomes)
+        locked = sum(outcome[3] for outcome in outcomes)
+        print(
+            "%-15s %9.1f logins/s  %10.1f requests/s  %4d locked errors"
+            % (
+                engine,
+                created / login_time,
+                args.workers * args.requests / request_time,
+                locked,
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Startup time of the web processes, with and without the warmup.
+
+Imports the application module (--module, core.wsgi or core.asgi) in a fresh
+interpreter --runs times with WARMUP off and on, and reports the import time
+(the warmup included) and the time of the first request to each of --paths,
+sent with django's test client: what a new process costs before and while
+it takes traffic. A run under -X importtime lists the modules taking the
+longest to import (--top), the candidates for lazy imports.
+
+usage (from the core/ directory):
+    python -m benchmarks.startup --module core.asgi --runs 5 --top 15
+"""
+
+import argparse
+import importlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+
+def child(module, paths):
+    started = time.perf_counter()
+    importlib.import_module(module)
+    imported = time.perf_counter() - started
+
+    from django.test import Client
+
+    client = Client()
+    timings = []
+    for path in paths:
+        started = time.perf_counter()
+        client.get(path)
+        timings.append(time.perf_counter() - started)
+    print(json.dumps({"import": imported, "requests": timings}))
+
+
+def spawn(module, paths, warmup, importtime=False):
+    env = {
+        **os.environ,
+        "DJANGO_SETTINGS_MODULE": "core.settings",
+        # connections are opened on a throwaway database
+        "DATABASE_NAME": os.path.join(tempfile.mkdtemp(), "bench.sqlite3"),
+        "WARMUP": str(warmup),
+    }
+    argv = [sys.executable, "-m", "benchmarks.startup", "--child", module, *paths]
+    if importtime:
+        argv[1:1] = ["-X", "importtime"]
+    proc = subprocess.run(argv, env=env, capture_output=True, text=True, check=True)
+    return json.loads(proc.stdout.splitlines()[-1]), proc.stderr
+
+
+def slowest_imports(stderr, top):
+    """
+    (self, cumulative, name) of the modules with the longest own import time
+    """
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, cumulative, name = line.split(":", 1)[1].split("|")
+        imports.append((int(own), int(cumulative), name.strip()))
+    return sorted(imports, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--module", default="core.wsgi")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--paths", nargs="+", default=["/accounts/login/", "/"])
+    parser.add_argument("--child", nargs="+", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        return child(args.child[0], args.child[1:])
+
+    print("module=%s runs=%s paths=%s" % (args.module, args.runs, args.paths))
+    for warmup in (False, True):
+        runs = [spawn(args.module, args.paths, warmup)[0] for _ in range(args.runs)]
+        imported = sum(run["import"] for run in runs) / len(runs)
+        requests = [
+            sum(run["requests"][i] for run in runs) / len(runs)
+            for i in range(len(args.paths))
+        ]
+        print(
+            "warmup=%-5s import %7.1fms  first requests %s"
+            % (
+                warmup,
+                imported * 1000,
+                "  ".join(
+                    "%s %.1fms" % (path, seconds * 1000)
+                    for path, seconds in zip(args.paths, requests)
+                ),
+            )
+        )
+
+    _, stderr = spawn(args.module, args.paths, False, importtime=True)
+    print("\nslowest imports (self / cumulative):")
+    for own, cumulative, name in slowest_imports(stderr, args.top):
+        print("%8.1fms %8.1fms  %s" % (own / 1000, cumulative / 1000, name))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Render time of the HTML task list at growing numbers of tasks.
+
+Creates a user per --sizes on a fresh database file and renders its task
+list the way the view used to, every task as a model instance in one page,
+then through the view with todo.listing: the first page with its rows
+rendered (cache emptied) and cached, a page from the middle of the list
+(after=) and a search. Reports the median time and the size of each page
+over --repeat renders, with the queryset cache off so every render reads
+the database.
+
+usage (from the core/ directory):
+    python -m benchmarks.task_list --sizes 1000 10000 100000 --repeat 5
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+
+def setup_django(db_path):
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+    os.environ["DATABASE_NAME"] = db_path
+    import django
+    from django.conf import settings
+
+    django.setup()
+    settings.DEBUG = False
+    settings.QUERYSET_CACHE_ENABLED = False
+    # no collectstatic manifest for {% static %}
+    settings.STATICFILES_STORAGE = (
+        "django.contrib.staticfiles.storage.StaticFilesStorage"
+    )
+
+
+def create_user(size):
+    from accounts.models import User
+    from todo.models import Task
+
+    user = User.objects.create_user(
+        email="user%s@example.com" % size, password="x", is_verified=True
+    )
+    tasks = (
+        Task(
+            user=user.profile,
+            title="task %s" % i,
+            description="description of the task number %s " % i * 5,
+            complete=i % 3 == 0,
+            _order=i,
+        )
+        for i in range(size)
+    )
+    Task.objects.bulk_create(tasks, batch_size=2000)
+    return user
+
+
+def render_all(user):
+    """
+    The list before keyset pagination, every task of the user in the page
+    """
+    from django.template.loader import render_to_string
+    from django.test import RequestFactory
+
+    from todo.sharding import tasks_for
+
+    request = RequestFactory().get("/")
+    request.user = user
+    return render_to_string(
+        "todo/todo_list.html",
+        {
+            "tasks": list(tasks_for(user.profile, read=True)),
+            "filters": {},
+            # every row rendered, none cached
+            "row_cache_timeout": 0,
+        },
+        request=request,
+    ).encode()
+
+
+def cold(client, url):
+    """
+    The page with none of its rows cached
+    """
+    from django.core.cache import cache
+
+    cache.clear()
+    return client.get(url).content
+
+
+def timed(render, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        content = render()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings), len(content)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    setup_django(os.path.join(tempfile.mkdtemp(), "bench.sqlite3"))
+    from django.core.management import call_command
+    from django.test import Client
+    from django.urls import reverse
+
+    call_command("migrate", verbosity=0)
+    url = reverse("todo:task_list")
+    print("repeat=%s" % args.repeat)
+    for size in args.sizes:
+        user = create_user(size)
+        client = Client()
+        client.force_login(user)
+        middle = user.profile.task_set.order_by("id")[size // 2].id
+        pages = [
+            ("all tasks (before)", lambda: render_all(user)),
+            ("first page, cold", lambda: cold(client, url)),
+            ("first page", lambda: client.get(url).content),
+            ("middle page", lambda: client.get(url, {"after": middle}).content),
+            ("search", lambda: client.get(url, {"search": "number 42"}).content),
+        ]
+        for name, render in pages:
+            seconds, length = timed(render, args.repeat)
+            print(
+                "%7d tasks  %-20s %9.1fms %10d bytes"
+                % (size, name, seconds * 1000, length)
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+import os
+import tempfile
+
+import pytest
+from django.conf import settings
+
+
+@pytest.fixture(scope="session")
+def django_db_modify_db_settings(django_db_modify_db_settings_parallel_suffix):
+    """Add two sqlite database files the sharding tests use as task shards"""
+    for alias in ("shard_1", "shard_2"):
+        name = os.path.join(tempfile.gettempdir(), "test_todo_%s.sqlite3" % alias)
+        settings.DATABASES.setdefault(
+            alias,
+            {**settings.DATABASES["default"], "NAME": name, "TEST": {"NAME": name}},
+        )
+
+
+@pytest.fixture(autouse=True)
+def reset_throttles():
+    """Start every test with empty login/registration throttling windows"""
+    from accounts import throttling
+
+    throttling.reset()
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    """Start every test with empty caches, ids are reused across tests"""
+    from django.core.cache import cache
+    from core import tiered_cache
+
+    cache.clear()
+    tiered_cache.reset()
+
+
+@pytest.fixture(autouse=True)
+def session_store(settings):
+    """Keep sessions in the memory of the test process, out of the database"""
+    from accounts import sessions
+
+    settings.SESSION_ENGINE = "accounts.sessions"
+    settings.SESSION_STORE = "accounts.sessions.LocalSessionStore"
+    sessions.reset()
+
+
+@pytest.fixture(autouse=True)
+def static_storage(settings):
+    """Render {% static %} without the manifest of a collectstatic run"""
+    settings.STATICFILES_STORAGE = (
+        "django.contrib.staticfiles.storage.StaticFilesStorage"
+    )
+
+
+@pytest.fixture(autouse=True)
+def celery_eager():
+    """Run celery tasks (emails, imports ...) in the test process"""
+    from core.celery import app
+
+    previous = app.conf.task_always_eager
+    app.conf.task_always_eager = True
+    yield
+    app.conf.task_always_eager = previous
@@ -2,4 +2,7 @@
 # Django starts so that shared_task will use this app.
 from .celery import app as celery_app
 
+# registers the sqlite connection setup for every process (web and worker)
+from . import db
+
 __all__ = ("celery_app",)
@@ -13,4 +13,42 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# imported once the apps are loaded by get_asgi_application
+from asgiref.sync import sync_to_async  # noqa: E402
+from django.conf import settings  # noqa: E402
+from core import warmup  # noqa: E402
+from todo.api.v1.sse import task_events  # noqa: E402
+
+# views imported and templates compiled once the application is loaded, the
+# connections are opened on the lifespan startup (see core.warmup)
+if settings.WARMUP:
+    warmup.prepare()
+
+# long lived streams served next to django (see todo.api.v1.sse)
+STREAMS = {
+    "/api/v1/task/events/": task_events,
+}
+
+
+async def lifespan(scope, receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            if settings.WARMUP:
+                # in the thread running the sync views, whose connections
+                # they are
+                await sync_to_async(warmup.connect)()
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def application(scope, receive, send):
+    if scope["type"] == "lifespan":
+        return await lifespan(scope, receive, send)
+    if scope["type"] == "http" and scope["path"] in STREAMS:
+        return await STREAMS[scope["path"]](scope, receive, send)
+    return await django_application(scope, receive, send)
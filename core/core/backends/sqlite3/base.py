@@ -0,0 +1,22 @@
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    sqlite backend which accepts OPTIONS["transaction_mode"] (DEFERRED,
+    IMMEDIATE or EXCLUSIVE) for the BEGIN statement of atomic blocks.
+    In WAL mode a deferred transaction which reads first and then writes
+    fails with "database is locked" instead of waiting on busy_timeout,
+    IMMEDIATE takes the write lock up front so writers queue instead
+    """
+
+    def get_connection_params(self):
+        kwargs = super().get_connection_params()
+        self.transaction_mode = kwargs.pop("transaction_mode", None)
+        return kwargs
+
+    def _start_transaction_under_autocommit(self):
+        if self.transaction_mode is None:
+            self.cursor().execute("BEGIN")
+        else:
+            self.cursor().execute("BEGIN %s" % self.transaction_mode)
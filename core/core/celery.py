@@ -2,6 +2,8 @@ import os
 
 from celery import Celery
 from celery.schedules import crontab
+from celery.signals import worker_init
+from kombu import Queue
 
 # Set the default Django settings module for the 'celery' program.
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
@@ -14,13 +16,68 @@ app = Celery("core")
 #   should have a `CELERY_` prefix.
 app.config_from_object("django.conf:settings", namespace="CELERY")
 
+# runtime, queue wait and state of every task (see core.task_metrics)
+from core import task_metrics  # noqa: E402,F401
+
+# one queue per kind of work so a long maintenance or bulk run never delays
+# activation emails, every worker role (core.worker) consumes its own
+app.conf.task_queues = [
+    Queue("celery"),
+    Queue("email"),
+    Queue("maintenance"),
+    Queue("bulk"),
+]
+# priorities go from 0 (first) to 9 (last) on the redis broker
+app.conf.task_default_priority = 5
+app.conf.task_routes = {
+    "accounts.tasks.send_email": {"queue": "email", "priority": 0},
+    "todo.tasks.import_tasks": {"queue": "bulk"},
+    "todo.tasks.bulk_tasks": {"queue": "bulk"},
+    "todo.tasks.clear_done_tasks": {"queue": "maintenance"},
+    "todo.tasks.prune_tombstones": {"queue": "maintenance", "priority": 9},
+    "core.db.optimize_database": {"queue": "maintenance", "priority": 9},
+}
+
+# queues, concurrency and prefetch of the workers started by core.worker:
+# many cheap email sends in parallel, long jobs one at a time per process
+# without prefetching, so a busy process doesn't hold messages others could run
+WORKER_ROLES = {
+    "default": {"queues": ["celery"], "concurrency": 2, "prefetch_multiplier": 4},
+    "email": {"queues": ["email"], "concurrency": 4, "prefetch_multiplier": 4},
+    "maintenance": {
+        "queues": ["maintenance"],
+        "concurrency": 1,
+        "prefetch_multiplier": 1,
+    },
+    "bulk": {"queues": ["bulk"], "concurrency": 2, "prefetch_multiplier": 1},
+}
 
 app.conf.beat_schedule = {
     "clear-done-tasks-every-10-min": {
         "task": "todo.tasks.clear_done_tasks",
         "schedule": crontab(minute="*/10"),
     },
+    "prune-task-tombstones-every-day": {
+        "task": "todo.tasks.prune_tombstones",
+        "schedule": crontab(minute=30, hour=3),
+    },
+    "optimize-database-every-hour": {
+        "task": "core.db.optimize_database",
+        "schedule": crontab(minute=0),
+    },
 }
 
 # Load task modules from all registered Django apps.
 app.autodiscover_tasks()
+
+
+@worker_init.connect
+def prepare_worker(**kwargs):
+    # the pool processes fork from the prepared and frozen worker (see
+    # core.warmup), they open their own connections
+    from django.conf import settings
+
+    if settings.WARMUP:
+        from core import warmup
+
+        warmup.prepare()
@@ -0,0 +1,45 @@
+"""
+System checks of the settings which are only correct with a cache shared
+by every process.
+
+The queryset cache (core.querycache) and the replica pins (core.routers)
+keep their version counters and pins in the default cache, a write made by
+one process (a celery worker, another web worker) has to reach the others.
+With a cache of the process (SHARED_CACHE False) they would read stale rows
+after a write, so those settings are refused. A single process setup can
+silence the checks with SILENCED_SYSTEM_CHECKS.
+"""
+
+from django.conf import settings
+from django.core import checks
+
+HINT = (
+    "Configure a shared cache (CACHE_BACKEND=django_redis.cache.RedisCache) "
+    "or silence the check when a single process serves and writes."
+)
+
+
+@checks.register(checks.Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    if settings.SHARED_CACHE:
+        return []
+    errors = []
+    if settings.QUERYSET_CACHE_ENABLED:
+        errors.append(
+            checks.Error(
+                "QUERYSET_CACHE_ENABLED needs a cache shared by the processes, "
+                "writes of the others never invalidate the reads of one.",
+                hint=HINT,
+                id="core.E001",
+            )
+        )
+    if settings.DATABASE_REPLICAS:
+        errors.append(
+            checks.Error(
+                "DATABASE_REPLICAS needs a cache shared by the processes, the "
+                "replica pins of writes made by the others aren't seen.",
+                hint=HINT,
+                id="core.E002",
+            )
+        )
+    return errors
@@ -0,0 +1,41 @@
+from celery import shared_task
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+
+@receiver(connection_created)
+def configure_sqlite(sender, connection, **kwargs):
+    """
+    Signal for every new database connection which applies SQLITE_PRAGMAS
+    (WAL journal, busy timeout, synchronous mode, mmap and page cache size)
+    to sqlite connections ONLY
+    """
+    if connection.vendor != "sqlite":
+        return
+    pragmas = getattr(settings, "SQLITE_PRAGMAS", {})
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute("PRAGMA %s = %s" % (name, value))
+
+
+def optimize_databases():
+    """
+    Run PRAGMA optimize on every sqlite database so the query planner
+    statistics stay fresh on long lived (CONN_MAX_AGE) connections
+    """
+    optimized = []
+    for alias in settings.DATABASES:
+        connection = connections[alias]
+        if connection.vendor != "sqlite":
+            continue
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA optimize")
+        optimized.append(alias)
+    return optimized
+
+
+@shared_task
+def optimize_database():
+    return optimize_databases()
@@ -0,0 +1,146 @@
+"""
+Response compression negotiated between brotli and gzip.
+
+Like django's GZipMiddleware, but responses are compressed with brotli when
+the client prefers it, only above COMPRESSION_MIN_LENGTH bytes (smaller
+responses cost more CPU than the bytes they save) and only for textual
+content types. Streaming responses are compressed chunk by chunk, flushed
+after every chunk so streams aren't held back. Paths matching
+COMPRESSION_SKIP_PATHS, the endpoints returning secrets next to
+user input (BREACH), are never compressed.
+"""
+
+import re
+import zlib
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+GZIP_LEVEL = 6
+# brotli's higher qualities are meant for static files, 4 compresses better
+# than gzip 6 in about the same time
+BROTLI_QUALITY = 4
+COMPRESSIBLE_TYPES = re.compile(
+    r"^(text/|application/(json|javascript|xml|x-ndjson|[\w.+-]+\+(json|xml))"
+    r"|image/svg\+xml)"
+)
+ACCEPT_ENCODING = re.compile(r"\s*([\w*-]+)\s*(?:;\s*q\s*=\s*([\d.]+))?")
+
+
+def accepted_encodings(header):
+    """
+    Encodings of an Accept-Encoding header with their q value
+    """
+    encodings = {}
+    for value in header.split(","):
+        match = ACCEPT_ENCODING.match(value)
+        if not match:
+            continue
+        try:
+            quality = float(match[2]) if match[2] else 1.0
+        except ValueError:
+            continue
+        encodings[match[1].lower()] = quality
+    return encodings
+
+
+def choose_encoding(header):
+    """
+    "br", "gzip" or None for the Accept-Encoding header of a request,
+    brotli winning ties
+    """
+    encodings = accepted_encodings(header)
+    wildcard = encodings.get("*", 0)
+    best, best_quality = None, 0
+    for encoding in ("br", "gzip") if brotli else ("gzip",):
+        quality = encodings.get(encoding, wildcard)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def gzip_compressor():
+    return zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+
+
+def compress(data, encoding):
+    if encoding == "br":
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    compressor = gzip_compressor()
+    return compressor.compress(data) + compressor.flush()
+
+
+def compress_sequence(chunks, encoding):
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        for chunk in chunks:
+            data = compressor.process(chunk) + compressor.flush()
+            if data:
+                yield data
+        yield compressor.finish()
+    else:
+        compressor = gzip_compressor()
+        for chunk in chunks:
+            data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+            if data:
+                yield data
+        yield compressor.flush()
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """
+    Compress responses with brotli or gzip depending on the request's
+    Accept-Encoding, see the module docstring for what's left alone
+    """
+
+    def process_response(self, request, response):
+        if not self.should_compress(request, response):
+            return response
+        patch_vary_headers(response, ("Accept-Encoding",))
+        encoding = choose_encoding(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            response.streaming_content = compress_sequence(
+                response.streaming_content, encoding
+            )
+            del response["Content-Length"]
+        else:
+            compressed = compress(response.content, encoding)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response["Content-Length"] = str(len(compressed))
+
+        # the compressed body is another representation, its ETag is weak
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response["ETag"] = "W/" + etag
+        response["Content-Encoding"] = encoding
+        return response
+
+    def should_compress(self, request, response):
+        if response.has_header("Content-Encoding"):
+            return False
+        if response.status_code in (204, 304):
+            return False
+        if "no-transform" in response.get("Cache-Control", ""):
+            return False
+        content_type = response.get("Content-Type", "").split(";")[0].strip()
+        if not COMPRESSIBLE_TYPES.match(content_type):
+            return False
+        if not response.streaming and (
+            len(response.content) < settings.COMPRESSION_MIN_LENGTH
+        ):
+            return False
+        return not any(
+            re.match(pattern, request.path_info)
+            for pattern in settings.COMPRESSION_SKIP_PATHS
+        )
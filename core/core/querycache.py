@@ -0,0 +1,245 @@
+"""
+Cache of the reads of a model's querysets (rows, count(), exists()).
+
+Results are kept in the django cache (QUERYSET_CACHE_ALIAS) under a key
+made of the SQL of the query and of version counters of the model, so
+writes never delete entries, they bump the counters and the next reads
+miss. A model has three counters:
+
+* the table version, bumped by every write, read by unscoped queries
+* a version per scope, the value of the model's cache_scope field (the
+  owner), bumped by the writes of that owner and read by the queries
+  filtering on it (Task.objects.filter(user=profile)), so one user's writes
+  don't invalidate the reads of the others
+* the epoch, bumped by writes whose scope isn't known (an update() of every
+  row), read by scoped queries too
+
+Saves and deletes bump the counters from the model signals, update(),
+bulk_create() and fast deletes from the queryset. Counters are bumped again
+when the transaction commits, so a read between a write and its commit
+doesn't keep the old rows.
+
+Only queries of the model's own table with plain filters are cached: no
+joins, subqueries, select_related, prefetch_related nor select_for_update.
+Queries inside transactions read uncommitted rows and aren't cached either.
+queryset.nocache() opts a queryset out, QUERYSET_CACHE_ENABLED every one.
+"""
+
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import EmptyResultSet
+from django.db import DEFAULT_DB_ALIAS, connections, models, transaction
+from django.db.models.sql import Query
+from django.db.models.sql.where import AND, WhereNode
+
+TABLE_KEY = "qs-version:%s"
+EPOCH_KEY = "qs-epoch:%s"
+SCOPE_KEY = "qs-version:%s:%s"
+RESULT_KEY = "qs:%s:%s"
+# bumped writes of an unknown scope
+UNSCOPED = object()
+MISSING = object()
+
+
+def get_cache():
+    return caches[settings.QUERYSET_CACHE_ALIAS]
+
+
+def _initial_version():
+    # a counter evicted from the cache restarts past every value it had
+    return time.time_ns()
+
+
+def get_versions(keys):
+    cache = get_cache()
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, _initial_version(), None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def _bump(keys):
+    cache = get_cache()
+    for key in keys:
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, _initial_version(), None)
+
+
+def bump(model, scopes=UNSCOPED, using=DEFAULT_DB_ALIAS):
+    """
+    Invalidate the cached reads of model written for scopes (values of its
+    cache_scope field, UNSCOPED when unknown), now and when the
+    transaction of using commits
+    """
+    label = model._meta.label_lower
+    keys = [TABLE_KEY % label]
+    if scopes is UNSCOPED:
+        keys.append(EPOCH_KEY % label)
+    else:
+        keys.extend(SCOPE_KEY % (label, scope) for scope in set(scopes))
+    _bump(keys)
+    if connections[using].in_atomic_block:
+        transaction.on_commit(lambda: _bump(keys), using=using)
+
+
+def _where_scope(query, field):
+    """
+    Value the where clause of query requires field to equal, None when it
+    doesn't, False when the clause can't be cached (a subquery)
+    """
+    scope = None
+    # only the top level AND of the clause restricts every row
+    restricts = query.where.connector == AND and not query.where.negated
+    nodes = [query.where]
+    while nodes:
+        node = nodes.pop()
+        for child in node.children:
+            if isinstance(child, WhereNode):
+                nodes.append(child)
+                continue
+            rhs = getattr(child, "rhs", None)
+            if isinstance(rhs, (models.QuerySet, Query)) or hasattr(
+                rhs, "resolve_expression"
+            ):
+                return False
+            if not (restricts and node is query.where) or rhs is None:
+                continue
+            if getattr(child, "lookup_name", None) != "exact":
+                continue
+            if getattr(child.lhs, "target", None) is field:
+                scope = rhs
+    return scope
+
+
+class CachedQuerySet(models.QuerySet):
+    """
+    QuerySet of models with a cache_scope field whose reads are cached,
+    see the module docstring
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._cache_reads = True
+
+    def _clone(self):
+        clone = super()._clone()
+        clone._cache_reads = self._cache_reads
+        return clone
+
+    def nocache(self):
+        """
+        Clone whose reads always query the database
+        """
+        clone = self._chain()
+        clone._cache_reads = False
+        return clone
+
+    @property
+    def scope_field(self):
+        return self.model._meta.get_field(self.model.cache_scope)
+
+    def _cacheable(self):
+        query = self.query
+        if not (self._cache_reads and settings.QUERYSET_CACHE_ENABLED):
+            return False
+        if query.select_for_update or query.select_related:
+            return False
+        if self._prefetch_related_lookups:
+            return False
+        if connections[self.db].in_atomic_block:
+            return False
+        # the table of the model only, no join
+        tables = [alias for alias in query.alias_map if query.alias_refcount[alias]]
+        return len(tables) <= 1
+
+    def _cache_key(self, kind):
+        query = self.query
+        if not self._cacheable():
+            return None
+        scope = _where_scope(query, self.scope_field)
+        if scope is False:
+            return None
+        try:
+            sql, params = query.get_compiler(using=self.db).as_sql()
+        except EmptyResultSet:
+            return None
+        label = self.model._meta.label_lower
+        if scope is None:
+            versions = get_versions([TABLE_KEY % label])
+        else:
+            versions = get_versions([EPOCH_KEY % label, SCOPE_KEY % (label, scope)])
+        digest = hashlib.md5(
+            repr(
+                (self.db, kind, self._iterable_class.__name__, sql, params, versions)
+            ).encode()
+        ).hexdigest()
+        return RESULT_KEY % (label, digest)
+
+    def _cached(self, kind, compute):
+        key = self._cache_key(kind)
+        if key is None:
+            return compute()
+        cache = get_cache()
+        result = cache.get(key, MISSING)
+        if result is MISSING:
+            result = compute()
+            cache.set(key, result, settings.QUERYSET_CACHE_TIMEOUT)
+        return result
+
+    def _fetch_all(self):
+        if self._result_cache is None:
+            self._result_cache = self._cached(
+                "rows", lambda: list(self._iterable_class(self))
+            )
+        super()._fetch_all()
+
+    def count(self):
+        if self._result_cache is not None:
+            return len(self._result_cache)
+        return self._cached("count", super().count)
+
+    def exists(self):
+        if self._result_cache is not None:
+            return bool(self._result_cache)
+        return self._cached("exists", super().exists)
+
+    def _write_scopes(self):
+        scope = _where_scope(self.query, self.scope_field)
+        return UNSCOPED if not scope else [scope]
+
+    def update(self, **kwargs):
+        scopes = self._write_scopes()
+        rows = super().update(**kwargs)
+        bump(self.model, scopes, using=self.db)
+        return rows
+
+    update.alters_data = True
+
+    def _raw_delete(self, using):
+        scopes = self._write_scopes()
+        rows = super()._raw_delete(using)
+        bump(self.model, scopes, using=using)
+        return rows
+
+    _raw_delete.alters_data = True
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = super().bulk_create(objs, *args, **kwargs)
+        attname = self.scope_field.attname
+        bump(self.model, [getattr(obj, attname) for obj in objs], using=self.db)
+        return objs
+
+
+def bump_instance(sender, instance, using, **kwargs):
+    """
+    Signal for saves and deletes of a model with cached reads
+    """
+    attname = sender._meta.get_field(sender.cache_scope).attname
+    bump(sender, [getattr(instance, attname)], using=using)
@@ -0,0 +1,57 @@
+import msgpack
+import orjson
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils import encoders
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer encoding with orjson. The output is the one of
+    JSONRenderer: compact, UTF-8, \\u2028 and \\u2029 escaped and the types
+    orjson doesn't handle like DRF (datetimes with a Z, Decimal as float,
+    lazy strings ...) encoded by DRF's JSONEncoder. Indented output (the
+    browsable API) and values orjson can't encode fall back to JSONRenderer.
+    """
+
+    options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        renderer_context = renderer_context or {}
+        if self.get_indent(accepted_media_type, renderer_context) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(
+                data, default=self.encoder_class().default, option=self.options
+            )
+        except orjson.JSONEncodeError:
+            # integers over 64 bits, unsupported key types ...
+            return super().render(data, accepted_media_type, renderer_context)
+        if b"\xe2\x80\xa8" in ret or b"\xe2\x80\xa9" in ret:
+            ret = ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+                b"\xe2\x80\xa9", b"\\u2029"
+            )
+        return ret
+
+
+class MessagePackRenderer(BaseRenderer):
+    """
+    Renderer of application/msgpack with the schema of the JSON renderers:
+    the types MessagePack doesn't have (datetimes, Decimal, lazy strings ...)
+    are encoded like in JSON by DRF's JSONEncoder, datetimes are strings
+    rather than MessagePack timestamps
+    """
+
+    media_type = "application/msgpack"
+    format = "msgpack"
+    charset = None
+    render_style = "binary"
+    encoder_class = encoders.JSONEncoder
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return msgpack.packb(
+            data, default=self.encoder_class().default, use_bin_type=True
+        )
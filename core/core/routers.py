@@ -0,0 +1,72 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+PIN_KEY = "replica-pin:%s"
+
+
+def replica_for(alias=DEFAULT_DB_ALIAS):
+    """
+    Return the replica alias of a primary database, or the primary itself
+    when it has no replica configured in DATABASE_REPLICAS
+    """
+    return settings.DATABASE_REPLICAS.get(alias, alias)
+
+
+def primary_for(alias):
+    """
+    Return the primary alias of a replica database, None for primaries
+    """
+    for primary, replica in settings.DATABASE_REPLICAS.items():
+        if replica == alias:
+            return primary
+    return None
+
+
+def pin_to_primary(key):
+    """
+    Send the reads of key (a profile id) to the primary for the next
+    REPLICA_PIN_SECONDS so a user always reads their own writes
+    """
+    if settings.DATABASE_REPLICAS:
+        cache.set(PIN_KEY % key, True, settings.REPLICA_PIN_SECONDS)
+
+
+def is_pinned(key):
+    return bool(settings.DATABASE_REPLICAS) and cache.get(PIN_KEY % key, False)
+
+
+def read_db_for(key, alias=DEFAULT_DB_ALIAS):
+    """
+    Return the database alias the safe-method reads of key should use
+    """
+    if is_pinned(key):
+        return alias
+    return replica_for(alias)
+
+
+class PrimaryReplicaRouter:
+    """
+    Database router for primary/replica setups, views send their reads to a
+    replica explicitly with read_db_for(), the router makes sure objects which
+    were loaded from a replica are written back to its primary
+    """
+
+    def db_for_read(self, model, **hints):
+        return None
+
+    def db_for_write(self, model, **hints):
+        instance = hints.get("instance")
+        if instance is not None:
+            return primary_for(instance._state.db)
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        db1 = primary_for(obj1._state.db) or obj1._state.db
+        db2 = primary_for(obj2._state.db) or obj2._state.db
+        if db1 == db2:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return None
@@ -0,0 +1,140 @@
+"""
+OpenAPI schema of the API, prebuilt rather than introspected per request.
+
+drf_yasg walks every view and serializer to build the schema, hundreds of
+milliseconds of CPU. The build_openapi_schema command renders it at build or
+deploy time into OPENAPI_SCHEMA_DIR, one file per format named after the
+code version, and the schema-json view serves that file with an ETag and
+long cache headers. When no file matches the running code (not built yet,
+code changed since) the schema is generated once and kept in the cache
+under the code version. The swagger and redoc pages load their spec from
+the schema-json view (SPEC_URL), they don't introspect anything themselves.
+drf_yasg (with jsonschema, yaml ...) is imported by the first of these
+pages, not by every process resolving the urls.
+"""
+
+import functools
+import hashlib
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import Http404, HttpResponse
+from django.test import RequestFactory
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from rest_framework import permissions
+
+FORMATS = {"json": "application/json", "yaml": "application/yaml"}
+CACHE_KEY = "openapi-schema:%s:%s"
+
+# (content, etag) of the schemas served by this process, by version and format
+_schemas = {}
+
+
+@functools.lru_cache()
+def schema_view():
+    from drf_yasg import openapi
+    from drf_yasg.views import get_schema_view
+
+    return get_schema_view(
+        openapi.Info(
+            title="Todo API",
+            default_version="v1",
+            description="is a api doc for todo-app",
+            terms_of_service="https://www.google.com/policies/terms/",
+            contact=openapi.Contact(email="alifbahrami13766@gmail.com"),
+            license=openapi.License(name="MIT License"),
+        ),
+        # no host in the schema, clients use the one serving it, the same
+        # prebuilt file works behind any domain
+        url="",
+        public=True,
+        permission_classes=(permissions.AllowAny,),
+    )
+
+
+@functools.lru_cache()
+def ui_view(renderer):
+    return schema_view().with_ui(renderer, cache_timeout=0)
+
+
+@functools.lru_cache()
+def code_version():
+    """
+    CODE_VERSION (the deployed commit) or a digest of the source files
+    """
+    if settings.CODE_VERSION:
+        return settings.CODE_VERSION
+    digest = hashlib.sha1()
+    base_dir = Path(settings.BASE_DIR)
+    for path in sorted(base_dir.rglob("*.py")):
+        if {"tests", "benchmarks", "migrations"} & set(path.parts):
+            continue
+        digest.update(str(path.relative_to(base_dir)).encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()[:12]
+
+
+def schema_path(format, version=None):
+    name = "swagger-%s.%s" % (version or code_version(), format)
+    return Path(settings.OPENAPI_SCHEMA_DIR) / name
+
+
+def generate_schema(format):
+    """
+    Schema rendered by drf_yasg in format, introspecting the API
+    """
+    url = reverse("schema-json", kwargs={"format": format})
+    response = schema_view().without_ui(cache_timeout=0)(
+        RequestFactory().get(url), format=format
+    )
+    response.render()
+    return response.content
+
+
+def get_schema(format):
+    """
+    (content, etag) of the schema of the running code in format
+    """
+    key = (code_version(), format)
+    if key not in _schemas:
+        path = schema_path(format)
+        if path.exists():
+            content = path.read_bytes()
+        else:
+            content = cache.get(CACHE_KEY % key)
+            if content is None:
+                content = generate_schema(format)
+                cache.set(CACHE_KEY % key, content, None)
+        _schemas[key] = (content, '"%s"' % hashlib.sha1(content).hexdigest())
+    return _schemas[key]
+
+
+def reset():
+    """
+    Forget the schemas loaded by this process, for tests
+    """
+    _schemas.clear()
+    code_version.cache_clear()
+
+
+def schema_json(request, format):
+    # drf_yasg's renderer formats are ".json" and ".yaml", both are served
+    format = format.lstrip(".")
+    if format not in FORMATS:
+        raise Http404
+    content, etag = get_schema(format)
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(content, content_type=FORMATS[format])
+    response["ETag"] = etag
+    patch_cache_control(response, public=True, max_age=settings.OPENAPI_SCHEMA_MAX_AGE)
+    return response
+
+
+def schema_ui(request, renderer):
+    """
+    swagger or redoc page of the schema
+    """
+    return ui_view(renderer)(request)
@@ -10,8 +10,10 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/3.2/ref/settings/
 """
 
+import os
+import tempfile
 from pathlib import Path
-from decouple import config
+from decouple import config, Csv
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -55,6 +57,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "core.middleware.CompressionMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -71,8 +74,18 @@ TEMPLATES = [
         "DIRS": [
             BASE_DIR / "templates",
         ],
-        "APP_DIRS": True,
         "OPTIONS": {
+            # compiled templates are kept whatever DEBUG is, runserver resets
+            # them when a template changes
+            "loaders": [
+                (
+                    "django.template.loaders.cached.Loader",
+                    [
+                        "django.template.loaders.filesystem.Loader",
+                        "django.template.loaders.app_directories.Loader",
+                    ],
+                )
+            ],
             "context_processors": [
                 "django.template.context_processors.debug",
                 "django.template.context_processors.request",
@@ -91,10 +104,48 @@ WSGI_APPLICATION = "core.wsgi.application"
 
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+        "ENGINE": "core.backends.sqlite3",
+        "NAME": config("DATABASE_NAME", default=str(BASE_DIR / "db.sqlite3")),
+        # keep connections open between requests instead of reconnecting
+        "CONN_MAX_AGE": config("CONN_MAX_AGE", cast=int, default=60),
+        "OPTIONS": {"transaction_mode": "IMMEDIATE"},
     }
 }
+DATABASES["replica"] = {
+    **DATABASES["default"],
+    "NAME": config("DATABASE_REPLICA_NAME", default=DATABASES["default"]["NAME"]),
+}
+
+# task reads go to the replica of their database while writes, and the reads
+# of a user who wrote in the last REPLICA_PIN_SECONDS, go to the primary
+# (see core.routers)
+DATABASE_REPLICAS = (
+    {"default": "replica"} if config("DATABASE_REPLICA_NAME", default="") else {}
+)
+REPLICA_PIN_SECONDS = config("REPLICA_PIN_SECONDS", cast=int, default=5)
+
+# tasks of each profile live on one of TASK_SHARDS, picked by a stable hash of
+# the profile id unless the profile has been moved (see todo.sharding)
+TASK_SHARDS = config("TASK_SHARDS", cast=Csv(), default="default")
+for alias in TASK_SHARDS:
+    DATABASES.setdefault(
+        alias,
+        {**DATABASES["default"], "NAME": str(BASE_DIR / ("db.%s.sqlite3" % alias))},
+    )
+
+DATABASE_ROUTERS = [
+    "core.routers.PrimaryReplicaRouter",
+    "todo.sharding.TaskShardRouter",
+]
+
+# pragmas applied to every new sqlite connection (see core.db)
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "busy_timeout": 5000,
+    "synchronous": "NORMAL",
+    "mmap_size": 134217728,
+    "cache_size": -20000,
+}
 
 
 # Password validation
@@ -141,7 +192,18 @@ STATIC_URL = "/static/"
 
 STATICFILES_DIRS = [BASE_DIR / "static"]
 
-STATIC_ROOT = BASE_DIR / "staticfiles"
+STATIC_ROOT = config("STATIC_ROOT", default=str(BASE_DIR / "staticfiles"))
+
+# collectstatic writes content hashed names with their gzip and brotli
+# variants, served by the app with immutable cache headers (see
+# core.staticfiles), the unhashed names are cached STATIC_MAX_AGE seconds
+STATICFILES_STORAGE = "core.staticfiles.CompressedManifestStaticFilesStorage"
+STATIC_SERVE = config("STATIC_SERVE", cast=bool, default=True)
+# templates render the hashed names under DEBUG too, only when /static/ is
+# answered by the serve view: runserver --nostatic, its own static handler
+# looks the names up in the source directories, which have no hashed names
+STATIC_HASHED_URLS = config("STATIC_HASHED_URLS", cast=bool, default=False)
+STATIC_MAX_AGE = config("STATIC_MAX_AGE", cast=int, default=3600)
 
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
@@ -162,7 +224,26 @@ REST_FRAMEWORK = {
         "rest_framework.authentication.SessionAuthentication",
         "rest_framework.authentication.TokenAuthentication",
         "rest_framework_simplejwt.authentication.JWTAuthentication",
-    ]
+    ],
+    # orjson versions of DRF's JSON renderer and parser, same output
+    # (rest_framework.renderers.JSONRenderer / parsers.JSONParser to go back)
+    # and MessagePack with the same schema for clients sending
+    # Accept / Content-Type: application/msgpack
+    "DEFAULT_RENDERER_CLASSES": [
+        "core.renderers.ORJSONRenderer",
+        "core.renderers.MessagePackRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "core.parsers.ORJSONParser",
+        "core.parsers.MessagePackParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ],
+    # reverse proxies in front of the app, throttles key clients on the
+    # X-Forwarded-For hop the nearest one appended, on REMOTE_ADDR with none
+    # (the header is the client's own then and can be anything)
+    "NUM_PROXIES": config("NUM_PROXIES", default=0, cast=int),
 }
 
 # email configuration
@@ -175,5 +256,125 @@ EMAIL_HOST_PASSWORD = ""
 EMAIL_PORT = 25
 
 
+# deleted tasks are reported to delta syncs (see todo.sync) for this long,
+# clients with older cursors have to sync from scratch
+TASK_TOMBSTONE_DAYS = config("TASK_TOMBSTONE_DAYS", cast=int, default=30)
+# the cursor ending a delta sync is kept this many seconds back, writes
+# stamped before they commit (busy_timeout) or by another clock are read again
+TASK_SYNC_OVERLAP = config("TASK_SYNC_OVERLAP", cast=int, default=30)
+
+# responses compressed by core.middleware: only the ones larger than
+# COMPRESSION_MIN_LENGTH bytes and never on the paths returning tokens
+COMPRESSION_MIN_LENGTH = config("COMPRESSION_MIN_LENGTH", cast=int, default=1024)
+COMPRESSION_SKIP_PATHS = [
+    r"^/accounts/api/v1/(token|jwt)/",
+]
+
+# sliding windows throttling the login, registration and activation
+# endpoints (see accounts.throttling), in redis to be shared by the workers
+AUTH_THROTTLE_BACKEND = config(
+    "AUTH_THROTTLE_BACKEND", default="accounts.throttling.LocalSlidingWindow"
+)
+AUTH_THROTTLE_REDIS_URL = config(
+    "AUTH_THROTTLE_REDIS_URL", default="redis://redis:6379/3"
+)
+AUTH_THROTTLE_RATES = {
+    "auth_ip": config("AUTH_THROTTLE_IP_RATE", default="30/min"),
+    "auth_email": config("AUTH_THROTTLE_EMAIL_RATE", default="5/min"),
+}
+
+# sessions out of the database (see accounts.sessions) when a SESSION_STORE
+# is configured, in redis to be shared by the processes, or in signed
+# cookies storing nothing server side. The database without either
+
+
+def _session_engine(signed_cookies, store):
+    if signed_cookies:
+        return "django.contrib.sessions.backends.signed_cookies"
+    if store:
+        return "accounts.sessions"
+    return "django.contrib.sessions.backends.db"
+
+
+SESSION_SIGNED_COOKIES = config("SESSION_SIGNED_COOKIES", cast=bool, default=False)
+SESSION_STORE = config("SESSION_STORE", default="")
+SESSION_ENGINE = _session_engine(SESSION_SIGNED_COOKIES, SESSION_STORE)
+SESSION_REDIS_URL = config("SESSION_REDIS_URL", default="redis://redis:6379/5")
+
+# task imports up to this size are done in the request, larger ones by a
+# celery job (see todo.imports)
+TASK_IMPORT_INLINE_BYTES = config(
+    "TASK_IMPORT_INLINE_BYTES", cast=int, default=1024 * 1024
+)
+
+# pub/sub carrying task changes to the SSE streams (see todo.events), the
+# in-memory broker only reaches streams of the process making the change
+TASK_EVENTS_BROKER = config("TASK_EVENTS_BROKER", default="todo.events.InMemoryBroker")
+TASK_EVENTS_REDIS_URL = config("TASK_EVENTS_REDIS_URL", default="redis://redis:6379/2")
+
+# shared cache, redis (django_redis.cache.RedisCache) when several
+# processes run, it is L2 of the two-tier cache (see core.tiered_cache)
+CACHES = {
+    "default": {
+        "BACKEND": config(
+            "CACHE_BACKEND", default="django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": config("CACHE_LOCATION", default=""),
+    }
+}
+# caches of the process only, the queryset cache and the replica pins need
+# writes of every process (web, celery workers) to reach the others
+PROCESS_CACHE_BACKENDS = [
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+]
+SHARED_CACHE = CACHES["default"]["BACKEND"] not in PROCESS_CACHE_BACKENDS
+TIERED_CACHE_ALIAS = "default"
+# pub/sub dropping invalidated keys from the in-process cache (L1) of every
+# process, the local one only reaches the process deleting the key
+TIERED_CACHE_INVALIDATION = config(
+    "TIERED_CACHE_INVALIDATION", default="core.tiered_cache.LocalInvalidation"
+)
+TIERED_CACHE_REDIS_URL = config(
+    "TIERED_CACHE_REDIS_URL", default="redis://redis:6379/4"
+)
+
+# cache of the Task and Profile queryset reads (see core.querycache),
+# invalidated by version counters bumped on writes, on by default with a
+# shared cache only
+QUERYSET_CACHE_ENABLED = config(
+    "QUERYSET_CACHE_ENABLED", cast=bool, default=SHARED_CACHE
+)
+QUERYSET_CACHE_ALIAS = "default"
+QUERYSET_CACHE_TIMEOUT = config("QUERYSET_CACHE_TIMEOUT", cast=int, default=300)
+
+# OpenAPI schema prebuilt by the build_openapi_schema command (see
+# core.schema) for CODE_VERSION, a digest of the sources when it's empty
+CODE_VERSION = config("CODE_VERSION", default="")
+OPENAPI_SCHEMA_DIR = config("OPENAPI_SCHEMA_DIR", default=str(BASE_DIR / "openapi"))
+OPENAPI_SCHEMA_MAX_AGE = config("OPENAPI_SCHEMA_MAX_AGE", cast=int, default=86400)
+# the swagger and redoc pages load the schema from the prebuilt one
+SWAGGER_SETTINGS = {"SPEC_URL": ("schema-json", {"format": "json"})}
+REDOC_SETTINGS = {"SPEC_URL": ("schema-json", {"format": "json"})}
+
+# import the views, compile the templates, open the connections and freeze
+# the heap before serving (see core.warmup)
+WARMUP = config("WARMUP", cast=bool, default=False)
+
+# seconds the rendered rows of the task list are cached, they're keyed by
+# the task's updated_date so an edit never shows a stale row
+TASK_ROW_CACHE_TIMEOUT = config("TASK_ROW_CACHE_TIMEOUT", cast=int, default=3600)
+
+# task totals of the worker processes (see core.task_metrics), one
+# directory per worker holding a file per pool process
+TASK_METRICS_DIR = config(
+    "TASK_METRICS_DIR", default=os.path.join(tempfile.gettempdir(), "task-metrics")
+)
+
 # celery configs
 CELERY_BROKER_URL = "redis://redis:6379/1"
+# one redis list per priority (0-9) instead of the default 4 steps
+CELERY_BROKER_TRANSPORT_OPTIONS = {
+    "queue_order_strategy": "priority",
+    "priority_steps": list(range(10)),
+}
@@ -0,0 +1,131 @@
+"""
+Static files with content hashed names, precompressed and served immutable.
+
+CompressedManifestStaticFilesStorage (STATICFILES_STORAGE) is django's
+manifest storage, collectstatic copies every file under a name with the
+hash of its content (css/main.3f2a1c9e.css) that {% static %} renders, and
+also writes a gzip (.gz) and a brotli (.br) variant of the textual files,
+at the highest levels since it's done once per deploy. The serve view
+answers STATIC_URL from STATIC_ROOT with the variant the client's
+Accept-Encoding prefers. Hashed names never change content, they're cached
+for a year and immutable, browsers don't revalidate them on every page;
+the unhashed names for STATIC_MAX_AGE and revalidated with Last-Modified.
+Under DEBUG the templates render the hashed names only with
+STATIC_HASHED_URLS, set when runserver runs with --nostatic so that this
+view answers them instead of runserver's handler, which can't.
+"""
+
+import gzip
+import mimetypes
+import os
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import (
+    ManifestStaticFilesStorage,
+    staticfiles_storage,
+)
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.base import ContentFile
+from django.http import FileResponse, Http404, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+from core.middleware import COMPRESSIBLE_TYPES, accepted_encodings, brotli
+
+# suffixes of the variants by encoding, by order of preference
+VARIANTS = {"br": ".br", "gzip": ".gz"} if brotli else {"gzip": ".gz"}
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+
+def compressible(name):
+    content_type, _ = mimetypes.guess_type(name)
+    return bool(content_type and COMPRESSIBLE_TYPES.match(content_type))
+
+
+def compress(data, encoding):
+    if encoding == "br":
+        return brotli.compress(data, quality=11, mode=brotli.MODE_TEXT)
+    # no timestamp, the same file compresses to the same bytes on every deploy
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    Manifest storage writing the compressed variants of the collected files
+    """
+
+    def url(self, name, force=False):
+        # django renders the unhashed names under DEBUG, the hashed ones are
+        # the files worth caching when the serve view answers them
+        hashed = settings.STATIC_HASHED_URLS and bool(self.hashed_files)
+        return super().url(name, force=force or hashed)
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        for name in sorted({*paths, *self.hashed_files.values()}):
+            if compressible(name):
+                self.compress_file(name)
+
+    def compress_file(self, name):
+        with self.open(name) as file:
+            data = file.read()
+        for encoding, suffix in VARIANTS.items():
+            compressed = compress(data, encoding)
+            if self.exists(name + suffix):
+                self.delete(name + suffix)
+            # a variant larger than the file is never worth sending
+            if len(compressed) < len(data):
+                self._save(name + suffix, ContentFile(compressed))
+
+
+def choose_variant(fullpath, header):
+    """
+    (encoding, path) of the file to send for an Accept-Encoding header,
+    the file itself with no encoding when no variant is accepted
+    """
+    encodings = accepted_encodings(header)
+    wildcard = encodings.get("*", 0)
+    best, best_quality = (None, fullpath), 0
+    for encoding, suffix in VARIANTS.items():
+        quality = encodings.get(encoding, wildcard)
+        if quality > best_quality and os.path.isfile(fullpath + suffix):
+            best, best_quality = (encoding, fullpath + suffix), quality
+    return best
+
+
+def is_hashed(path):
+    # the manifest maps the names to their hashed names
+    return path in getattr(staticfiles_storage, "hashed_files", {}).values()
+
+
+def serve(request, path):
+    try:
+        fullpath = safe_join(settings.STATIC_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404
+    if not os.path.isfile(fullpath):
+        raise Http404
+    encoding, served = choose_variant(
+        fullpath, request.META.get("HTTP_ACCEPT_ENCODING", "")
+    )
+    modified = os.stat(served).st_mtime
+    if not was_modified_since(request.META.get("HTTP_IF_MODIFIED_SINCE"), modified):
+        response = HttpResponseNotModified()
+    else:
+        content_type, _ = mimetypes.guess_type(fullpath)
+        response = FileResponse(
+            open(served, "rb"), content_type=content_type or "application/octet-stream"
+        )
+        if encoding:
+            response["Content-Encoding"] = encoding
+    response["Last-Modified"] = http_date(modified)
+    if compressible(fullpath):
+        patch_vary_headers(response, ("Accept-Encoding",))
+    response["Cache-Control"] = (
+        IMMUTABLE if is_hashed(path) else "public, max-age=%s" % settings.STATIC_MAX_AGE
+    )
+    return response
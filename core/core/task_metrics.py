@@ -0,0 +1,248 @@
+"""
+Instrumentation of the celery tasks and of the broker queues.
+
+Messages are stamped with the time they're published (the sent_at header),
+the signals of the worker then log every task run with the time it waited
+in the queue, its runtime and its state (success, retry, failure) and keep
+per task totals. Tasks run in the pool processes of the worker while its
+main process answers the remote control commands, so every process running
+tasks writes its totals to a file of the worker's directory under
+TASK_METRICS_DIR, summed by the task_metrics command. queue_stats reads the
+depth and the age of the oldest message of the broker queues, for the
+celery_status management command.
+"""
+
+import glob
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from datetime import datetime
+
+from celery.signals import before_task_publish, task_postrun, task_prerun, worker_init
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_started = {}
+_lock = threading.Lock()
+_metrics = {}
+# node name of the worker of the process, inherited by its pool processes
+_hostname = None
+
+
+def empty_metrics():
+    return {
+        "succeeded": 0,
+        "retried": 0,
+        "failed": 0,
+        "runtime": {"count": 0, "total": 0.0, "max": 0.0},
+        "wait": {"count": 0, "total": 0.0, "max": 0.0},
+    }
+
+
+def _add(timing, value):
+    timing["count"] += 1
+    timing["total"] += value
+    timing["max"] = max(timing["max"], value)
+
+
+def record(name, state, runtime, wait):
+    with _lock:
+        metrics = _metrics.setdefault(name, empty_metrics())
+        if state == "SUCCESS":
+            metrics["succeeded"] += 1
+        elif state == "RETRY":
+            metrics["retried"] += 1
+        else:
+            metrics["failed"] += 1
+        if runtime is not None:
+            _add(metrics["runtime"], runtime)
+        if wait is not None:
+            _add(metrics["wait"], wait)
+
+
+def task_metrics():
+    """
+    Copy of the totals of the tasks run by this process, by task name
+    """
+    with _lock:
+        return {
+            name: {
+                key: dict(value) if isinstance(value, dict) else value
+                for key, value in metrics.items()
+            }
+            for name, metrics in _metrics.items()
+        }
+
+
+def reset():
+    global _hostname
+    _hostname = None
+    with _lock:
+        _metrics.clear()
+        _started.clear()
+
+
+def worker_dir(hostname):
+    return os.path.join(settings.TASK_METRICS_DIR, hostname)
+
+
+def save():
+    """
+    Write the totals of this process to the directory of its worker
+    """
+    directory = worker_dir(_hostname)
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, "%s.json" % os.getpid())
+    with open(path + ".tmp", "w") as file:
+        json.dump(task_metrics(), file)
+    # the main process never reads a half written file
+    os.replace(path + ".tmp", path)
+
+
+def merge(into, metrics):
+    for name, task in metrics.items():
+        total = into.setdefault(name, empty_metrics())
+        for key, value in task.items():
+            if isinstance(value, dict):
+                total[key]["count"] += value["count"]
+                total[key]["total"] += value["total"]
+                total[key]["max"] = max(total[key]["max"], value["max"])
+            else:
+                total[key] += value
+    return into
+
+
+def worker_metrics(hostname):
+    """
+    Totals of the tasks run by the processes of a worker, by task name. The
+    files of pool processes which exited are kept, their tasks count too
+    """
+    totals = {}
+    for path in glob.glob(os.path.join(worker_dir(hostname), "*.json")):
+        try:
+            with open(path) as file:
+                merge(totals, json.load(file))
+        except (OSError, ValueError):
+            continue
+    return totals
+
+
+def queued_since(request):
+    """
+    When the task became runnable: published, or its eta for scheduled ones
+    """
+    sent_at = getattr(request, "sent_at", None)
+    if sent_at is None:
+        return None
+    if request.eta:
+        eta = request.eta
+        if isinstance(eta, str):
+            eta = datetime.fromisoformat(eta)
+        return max(sent_at, eta.timestamp())
+    return sent_at
+
+
+@before_task_publish.connect
+def stamp_sent_at(headers=None, **kwargs):
+    if headers is not None:
+        headers.setdefault("sent_at", time.time())
+
+
+@task_prerun.connect
+def task_started(task_id=None, task=None, **kwargs):
+    since = queued_since(task.request)
+    wait = None if since is None else max(0.0, time.time() - since)
+    with _lock:
+        _started[task_id] = (time.monotonic(), wait)
+
+
+@task_postrun.connect
+def task_finished(task_id=None, task=None, state=None, **kwargs):
+    with _lock:
+        started, wait = _started.pop(task_id, (None, None))
+    runtime = None if started is None else time.monotonic() - started
+    record(task.name, state, runtime, wait)
+    # not for eager tasks of web processes
+    if _hostname is not None:
+        save()
+    logger.info(
+        "task %s[%s] %s in %s waited %s",
+        task.name,
+        task_id,
+        state,
+        "-" if runtime is None else "%.3fs" % runtime,
+        "-" if wait is None else "%.3fs" % wait,
+        extra={"task": task.name, "state": state, "runtime": runtime, "wait": wait},
+    )
+
+
+def task_metrics_command(state):
+    """
+    Totals of the tasks run by the worker (celery inspect task_metrics)
+    """
+    return worker_metrics(state.hostname)
+
+
+@worker_init.connect
+def register_commands(sender=None, **kwargs):
+    # the remote control module of the worker, not imported by web processes
+    from celery.worker.control import inspect_command
+
+    global _hostname
+    inspect_command(name="task_metrics")(task_metrics_command)
+    _hostname = sender.hostname
+    # totals of a previous run of the worker
+    shutil.rmtree(worker_dir(_hostname), ignore_errors=True)
+
+
+def _sent_at(message):
+    return message.get("headers", {}).get("sent_at")
+
+
+def oldest_sent_at(channel, queue):
+    """
+    Publication time of the oldest message of a queue, read without
+    consuming it, None when the transport can't peek
+    """
+    if hasattr(channel, "_queue_for"):
+        # memory transport, a queue.Queue of message dicts
+        messages = channel._queue_for(queue).queue
+        return _sent_at(messages[0]) if messages else None
+    if hasattr(channel, "_q_for_pri"):
+        # redis transport, one list per priority step, pushed on the left
+        dates = []
+        for priority in channel.priority_steps:
+            payload = channel.client.lindex(channel._q_for_pri(queue, priority), -1)
+            if payload is not None:
+                dates.append(_sent_at(json.loads(payload)))
+        dates = [date for date in dates if date is not None]
+        return min(dates) if dates else None
+    return None
+
+
+def queue_stats(app, queues=None, now=None):
+    """
+    [(queue, depth, age in seconds of the oldest message or None)] of the
+    broker queues of app, every configured queue by default
+    """
+    queues = queues or list(app.amqp.queues)
+    now = time.time() if now is None else now
+    stats = []
+    with app.connection_for_read() as connection:
+        channel = connection.default_channel
+        for queue in queues:
+            try:
+                _, depth, _ = channel.queue_declare(queue=queue, passive=True)
+            except connection.channel_errors:
+                # never declared, no worker consumed it yet
+                channel = connection.channel()
+                stats.append((queue, 0, None))
+                continue
+            sent_at = oldest_sent_at(channel, queue) if depth else None
+            age = None if sent_at is None else max(0.0, now - sent_at)
+            stats.append((queue, depth, age))
+    return stats
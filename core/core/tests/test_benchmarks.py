@@ -0,0 +1,25 @@
+import pytest
+
+from benchmarks import compression, json_renderers, task_list
+
+
+class TestBenchmarkPayloads:
+    """Smoke tests of the pages and payloads the benchmarks measure"""
+
+    def test_compression_html_page(self):
+        html = compression.html_page(3)
+        assert b"task number 3" in html
+        assert b"description of the task number 1" in html
+
+    def test_compression_schema(self):
+        assert b'"swagger"' in compression.schema()
+
+    def test_json_renderers_page_data(self):
+        data = json_renderers.page_data(3, raw_dates=False)
+        assert len(data["results"]) == 3
+
+    @pytest.mark.django_db
+    def test_task_list_render_all(self):
+        user = task_list.create_user(3)
+        html = task_list.render_all(user)
+        assert b"task 2" in html
@@ -0,0 +1,25 @@
+from core.checks import check_shared_cache
+
+
+class TestSharedCacheChecks:
+    """Test suite for the settings refused without a shared cache"""
+
+    def test_local_cache_defaults_pass(self, settings):
+        settings.SHARED_CACHE = False
+        settings.QUERYSET_CACHE_ENABLED = False
+        settings.DATABASE_REPLICAS = {}
+        assert check_shared_cache(None) == []
+
+    def test_local_cache_is_refused(self, settings):
+        """Test that cross process invalidations on a local cache are errors"""
+        settings.SHARED_CACHE = False
+        settings.QUERYSET_CACHE_ENABLED = True
+        settings.DATABASE_REPLICAS = {"default": "replica"}
+        ids = [error.id for error in check_shared_cache(None)]
+        assert ids == ["core.E001", "core.E002"]
+
+    def test_shared_cache_allows_both(self, settings):
+        settings.SHARED_CACHE = True
+        settings.QUERYSET_CACHE_ENABLED = True
+        settings.DATABASE_REPLICAS = {"default": "replica"}
+        assert check_shared_cache(None) == []
@@ -0,0 +1,66 @@
+import sqlite3
+
+import pytest
+from django.db import connection
+from core.backends.sqlite3.base import DatabaseWrapper
+
+from core.db import optimize_database
+
+
+def pragma(conn, name):
+    with conn.cursor() as cursor:
+        cursor.execute("PRAGMA %s" % name)
+        return cursor.fetchone()[0]
+
+
+@pytest.fixture
+def file_connection(tmp_path):
+    """Open a fresh sqlite connection on a file backed database"""
+    settings_dict = dict(connection.settings_dict, NAME=str(tmp_path / "db.sqlite3"))
+    conn = DatabaseWrapper(settings_dict, alias="file-test")
+    yield conn
+    conn.close()
+
+
+@pytest.mark.django_db
+class TestSqlitePragmas:
+    """Test suite for the sqlite connection setup"""
+
+    def test_pragmas_applied_to_connection(self):
+        """Test that every connection gets the configured pragmas"""
+        connection.ensure_connection()
+        assert pragma(connection, "busy_timeout") == 5000
+        # NORMAL
+        assert pragma(connection, "synchronous") == 1
+        assert pragma(connection, "cache_size") == -20000
+
+    def test_file_database_uses_wal(self, file_connection):
+        """Test that file backed databases switch to the WAL journal"""
+        assert pragma(file_connection, "journal_mode") == "wal"
+        assert pragma(file_connection, "mmap_size") == 134217728
+
+    def test_empty_pragmas_keep_sqlite_defaults(self, settings, file_connection):
+        """Test that the setup can be switched off with an empty SQLITE_PRAGMAS"""
+        settings.SQLITE_PRAGMAS = {}
+        assert pragma(file_connection, "journal_mode") == "delete"
+        # FULL
+        assert pragma(file_connection, "synchronous") == 2
+
+    def test_transactions_take_the_write_lock_on_begin(self, file_connection):
+        """Test that transaction_mode=IMMEDIATE reserves the database on BEGIN"""
+        file_connection.set_autocommit(
+            False, force_begin_transaction_with_broken_autocommit=True
+        )
+        other = sqlite3.connect(file_connection.settings_dict["NAME"], timeout=0)
+        try:
+            with pytest.raises(sqlite3.OperationalError):
+                other.execute("BEGIN IMMEDIATE")
+        finally:
+            other.close()
+            file_connection.rollback()
+            file_connection.set_autocommit(True)
+
+    @pytest.mark.django_db(databases="__all__")
+    def test_optimize_database_task(self, settings):
+        """Test that the periodic optimize task runs on every sqlite database"""
+        assert optimize_database() == list(settings.DATABASES)
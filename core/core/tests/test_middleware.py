@@ -0,0 +1,112 @@
+import gzip
+import zlib
+
+import brotli
+import pytest
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory
+from django.urls import reverse
+from core.middleware import CompressionMiddleware, choose_encoding
+
+BODY = b'{"title": "task", "description": "some words"}' * 100
+
+
+def respond(response, accept_encoding="gzip, deflate, br", path="/api/v1/task/"):
+    request = RequestFactory().get(path, HTTP_ACCEPT_ENCODING=accept_encoding)
+    return CompressionMiddleware(lambda request: response)(request)
+
+
+def json_response(body=BODY, **kwargs):
+    return HttpResponse(body, content_type="application/json", **kwargs)
+
+
+class TestChooseEncoding:
+    """Test suite for the Accept-Encoding negotiation"""
+
+    @pytest.mark.parametrize(
+        "header, encoding",
+        [
+            ("gzip, deflate, br", "br"),
+            ("gzip", "gzip"),
+            ("br;q=0.5, gzip", "gzip"),
+            ("br;q=0, gzip;q=0", None),
+            ("*", "br"),
+            ("*;q=0.1, gzip", "gzip"),
+            ("identity", None),
+            ("", None),
+        ],
+    )
+    def test_choose_encoding(self, header, encoding):
+        assert choose_encoding(header) == encoding
+
+
+class TestCompressionMiddleware:
+    """Test suite for the compression middleware"""
+
+    def test_brotli(self):
+        response = respond(json_response(headers={"ETag": '"abc"'}))
+        assert response["Content-Encoding"] == "br"
+        assert brotli.decompress(response.content) == BODY
+        assert response["Content-Length"] == str(len(response.content))
+        assert response["Vary"] == "Accept-Encoding"
+        assert response["ETag"] == 'W/"abc"'
+
+    def test_gzip(self):
+        response = respond(json_response(), accept_encoding="gzip")
+        assert response["Content-Encoding"] == "gzip"
+        assert gzip.decompress(response.content) == BODY
+
+    def test_no_accepted_encoding(self):
+        response = respond(json_response(), accept_encoding="")
+        assert not response.has_header("Content-Encoding")
+        assert response["Vary"] == "Accept-Encoding"
+        assert response.content == BODY
+
+    def test_below_threshold(self, settings):
+        settings.COMPRESSION_MIN_LENGTH = len(BODY) + 1
+        response = respond(json_response())
+        assert not response.has_header("Content-Encoding")
+        assert not response.has_header("Vary")
+
+    @pytest.mark.parametrize(
+        "response",
+        [
+            HttpResponse(BODY, content_type="image/png"),
+            HttpResponse(BODY, content_type="application/zip"),
+            json_response(headers={"Content-Encoding": "gzip"}),
+            json_response(headers={"Cache-Control": "no-transform"}),
+        ],
+    )
+    def test_skipped_responses(self, response):
+        """Test that binary or already encoded responses are left alone"""
+        assert respond(response).content == BODY
+
+    def test_skipped_paths(self):
+        """Test that the responses carrying tokens are never compressed"""
+        response = respond(json_response(), path="/accounts/api/v1/token/login/")
+        assert not response.has_header("Content-Encoding")
+
+    @pytest.mark.parametrize("encoding", ["gzip", "br"])
+    def test_streaming(self, encoding):
+        """Test that every chunk is flushed as it is streamed"""
+        chunks = [b"first chunk " * 10, b"second chunk " * 10]
+        response = respond(
+            StreamingHttpResponse(iter(chunks), content_type="text/csv"), encoding
+        )
+        assert response["Content-Encoding"] == encoding
+        stream = iter(response.streaming_content)
+        if encoding == "gzip":
+            decompress = zlib.decompressobj(zlib.MAX_WBITS | 16).decompress
+        else:
+            decompress = brotli.Decompressor().process
+        assert decompress(next(stream)) == chunks[0]
+        assert decompress(b"".join(stream)) == chunks[1]
+
+
+@pytest.mark.django_db
+def test_schema_is_compressed(client):
+    """Test that the large swagger document goes out compressed"""
+    url = reverse("schema-json", kwargs={"format": ".json"})
+    response = client.get(url, HTTP_ACCEPT_ENCODING="gzip, br")
+    assert response["Content-Encoding"] == "br"
+    assert b'"swagger"' in brotli.decompress(response.content)
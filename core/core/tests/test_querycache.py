@@ -0,0 +1,129 @@
+import pytest
+from django.db import transaction
+
+from accounts.models import Profile, User
+from core import querycache
+from todo.models import Task
+
+# reads inside transactions aren't cached, these tests commit for real
+pytestmark = pytest.mark.django_db(transaction=True)
+
+
+@pytest.fixture(autouse=True)
+def enabled(settings):
+    """Cache the reads, off by default with the local memory cache of the tests"""
+    settings.QUERYSET_CACHE_ENABLED = True
+
+
+@pytest.fixture
+def profile():
+    user = User.objects.create_user(email="testuser@example.com", password="x")
+    return user.profile
+
+
+@pytest.fixture
+def other():
+    user = User.objects.create_user(email="other@example.com", password="x")
+    return user.profile
+
+
+def titles(profile, **filters):
+    return sorted(
+        Task.objects.filter(user=profile, **filters).values_list("title", flat=True)
+    )
+
+
+class TestQuerysetCache:
+    """Test suite for the cached Task and Profile reads"""
+
+    def test_reads_are_cached(self, profile, django_assert_num_queries):
+        Task.objects.create(user=profile, title="First")
+        assert titles(profile) == ["First"]
+        assert Task.objects.filter(user=profile).count() == 1
+        assert Profile.objects.get(user__id=profile.user_id) == profile
+        with django_assert_num_queries(0):
+            assert titles(profile) == ["First"]
+            assert Task.objects.filter(user=profile).count() == 1
+            assert Profile.objects.get(user__id=profile.user_id) == profile
+
+    def test_saves_and_deletes(self, profile):
+        task = Task.objects.create(user=profile, title="First")
+        assert titles(profile) == ["First"]
+        task.title = "Renamed"
+        task.save()
+        assert titles(profile) == ["Renamed"]
+        task.delete()
+        assert titles(profile) == []
+
+    def test_queryset_writes(self, profile):
+        """Test that update, delete and bulk_create invalidate the reads"""
+        Task.objects.create(user=profile, title="First")
+        assert titles(profile, complete=True) == []
+        Task.objects.filter(user=profile).update(complete=True)
+        assert titles(profile, complete=True) == ["First"]
+        Task.objects.bulk_create([Task(user=profile, title="Second", _order=1)])
+        assert titles(profile) == ["First", "Second"]
+        Task.objects.filter(user=profile, title="First").delete()
+        assert titles(profile) == ["Second"]
+
+    def test_unscoped_writes(self, profile, other):
+        """Test that writes of unknown owners invalidate every scope"""
+        Task.objects.create(user=profile, title="First")
+        assert titles(profile, complete=True) == []
+        Task.objects.all().update(complete=True)
+        assert titles(profile, complete=True) == ["First"]
+        assert Task.objects.count() == 1
+
+    def test_scopes_are_independent(self, profile, other, django_assert_num_queries):
+        """Test that the writes of a user keep the reads of others cached"""
+        Task.objects.create(user=profile, title="First")
+        assert titles(profile) == ["First"]
+        Task.objects.create(user=other, title="Other")
+        with django_assert_num_queries(0):
+            assert titles(profile) == ["First"]
+        # the scope written and the unscoped reads miss
+        with django_assert_num_queries(2):
+            assert titles(other) == ["Other"]
+            assert Task.objects.count() == 2
+
+    def test_writes_in_transactions(self, profile):
+        """Test that reads between a write and its commit aren't kept"""
+        task = Task.objects.create(user=profile, title="First")
+        with transaction.atomic():
+            Task.objects.filter(pk=task.pk).update(title="Renamed")
+            assert titles(profile) == ["Renamed"]
+        assert titles(profile) == ["Renamed"]
+
+    def test_evicted_versions(self, profile):
+        Task.objects.create(user=profile, title="First")
+        assert titles(profile) == ["First"]
+        querycache.get_cache().delete_many(
+            [
+                querycache.EPOCH_KEY % "todo.task",
+                querycache.SCOPE_KEY % ("todo.task", profile.pk),
+            ]
+        )
+        Task.objects.filter(user=profile).nocache().update(title="Renamed")
+        assert titles(profile) == ["Renamed"]
+
+    def test_opt_outs(self, settings, profile, django_assert_num_queries):
+        Task.objects.create(user=profile, title="First")
+        queryset = Task.objects.filter(user=profile)
+        list(queryset.nocache())
+        with django_assert_num_queries(1):
+            list(queryset.nocache())
+        list(queryset.select_related("user"))
+        with django_assert_num_queries(1):
+            list(queryset.select_related("user"))
+        settings.QUERYSET_CACHE_ENABLED = False
+        with django_assert_num_queries(1):
+            list(queryset)
+
+    def test_joins_arent_cached(self, profile, django_assert_num_queries):
+        """Test that reads depending on other tables always query"""
+        Task.objects.create(user=profile, title="First")
+        queryset = Task.objects.filter(user__user__email=profile.user.email)
+        assert queryset.count() == 1
+        Profile.objects.filter(pk=profile.pk).update(first_name="Changed")
+        with django_assert_num_queries(1):
+            assert queryset.count() == 1
@@ -0,0 +1,172 @@
+import datetime
+import decimal
+import io
+import uuid
+
+import msgpack
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from accounts.models import User
+from core.parsers import MessagePackParser, ORJSONParser
+from core.renderers import MessagePackRenderer, ORJSONRenderer
+from todo.models import Task
+
+DATA = {
+    "aware": timezone.now(),
+    "naive": datetime.datetime(2024, 1, 2, 3, 4, 5, 123456),
+    "date": datetime.date(2024, 1, 2),
+    "time": datetime.time(3, 4, 5),
+    "duration": datetime.timedelta(hours=1, microseconds=5),
+    "decimal": decimal.Decimal("10.25"),
+    "uuid": uuid.UUID("12345678-1234-5678-1234-567812345678"),
+    "lazy": gettext_lazy("This field is required."),
+    "bytes": b"binary",
+    "unicode": "café     \U0001f600",
+    "nested": [{"float": 1.5, "none": None, "bool": True}, (1, 2)],
+    1: "integer key",
+}
+
+
+class TestORJSONRenderer:
+    """Test suite for the orjson renderer"""
+
+    @pytest.mark.parametrize("key", [key for key in DATA])
+    def test_same_output_as_json_renderer(self, key):
+        """Test that every supported type renders like DRF's renderer"""
+        data = {key: DATA[key]}
+        assert ORJSONRenderer().render(data) == JSONRenderer().render(data)
+
+    def test_indent_falls_back(self):
+        """Test that pretty printed output comes from JSONRenderer"""
+        media_type = "application/json; indent=4"
+        assert ORJSONRenderer().render(DATA, media_type) == JSONRenderer().render(
+            DATA, media_type
+        )
+
+    def test_big_integers_fall_back(self):
+        data = {"big": 2**70}
+        assert ORJSONRenderer().render(data) == JSONRenderer().render(data)
+
+    def test_none(self):
+        assert ORJSONRenderer().render(None) == b""
+
+
+class TestORJSONParser:
+    """Test suite for the orjson parser"""
+
+    def parse(self, parser, body, encoding="utf-8"):
+        return parser.parse(io.BytesIO(body), parser_context={"encoding": encoding})
+
+    def test_same_result_as_json_parser(self):
+        body = '{"title": "café", "items": [1, 2.5, null, true]}'.encode()
+        assert self.parse(ORJSONParser(), body) == self.parse(JSONParser(), body)
+
+    @pytest.mark.parametrize("body", [b"{not json", b'{"value": NaN}'])
+    def test_invalid_json(self, body):
+        with pytest.raises(ParseError):
+            self.parse(ORJSONParser(), body)
+
+    def test_other_charsets(self):
+        body = '{"title": "café"}'.encode("latin-1")
+        assert self.parse(ORJSONParser(), body, "latin-1") == {"title": "café"}
+
+
+@pytest.mark.django_db
+def test_api_renders_with_orjson(settings):
+    """Test that API responses are rendered by the configured renderer"""
+    user = User.objects.create_user(email="testuser@example.com", password="x")
+    Task.objects.create(user=user.profile, title="Task", description="café")
+    client = APIClient()
+    client.force_authenticate(user)
+    response = client.get(reverse("todo:api-v1:task-list"))
+    assert isinstance(response.accepted_renderer, ORJSONRenderer)
+    assert response.content == JSONRenderer().render(response.data)
+
+    response = client.post(
+        reverse("todo:api-v1:task-list"), {"title": "New Task"}, format="json"
+    )
+    assert response.status_code == 201
+
+
+class TestMessagePack:
+    """Test suite for the MessagePack renderer and parser"""
+
+    def test_same_schema_as_json(self):
+        """Test that decoded MessagePack is what JSON decodes to"""
+        data = {key: value for key, value in DATA.items() if key not in (1, "bytes")}
+        rendered = msgpack.unpackb(MessagePackRenderer().render(data))
+        assert rendered == JSONParser().parse(io.BytesIO(JSONRenderer().render(data)))
+
+    def test_round_trip(self):
+        data = {"title": "café", "items": [1, 2.5, None, True]}
+        body = io.BytesIO(MessagePackRenderer().render(data))
+        assert MessagePackParser().parse(body) == data
+
+    @pytest.mark.parametrize("body", [b"\xc1", b"\x92\x01", b"\x81\x01\x02"])
+    def test_invalid_body(self, body):
+        """Test that reserved bytes, truncated and non string keys are refused"""
+        with pytest.raises(ParseError):
+            MessagePackParser().parse(io.BytesIO(body))
+
+
+@pytest.mark.django_db
+class TestMessagePackApi:
+    """Test suite for the content negotiation of MessagePack"""
+
+    @pytest.fixture
+    def user(self):
+        return User.objects.create_user(
+            email="testuser@example.com", password="testpass123", is_verified=True
+        )
+
+    def post(self, client, url, data):
+        return client.post(
+            url,
+            msgpack.packb(data),
+            content_type="application/msgpack",
+            HTTP_ACCEPT="application/msgpack",
+        )
+
+    def test_task_list(self, user):
+        Task.objects.create(user=user.profile, title="Task", description="café")
+        client = APIClient()
+        client.force_authenticate(user)
+        url = reverse("todo:api-v1:task-list")
+        response = client.get(url, HTTP_ACCEPT="application/msgpack")
+        assert response["Content-Type"] == "application/msgpack"
+        json_response = client.get(url)
+        assert msgpack.unpackb(response.content) == json_response.json()
+
+    def test_task_create(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        response = self.post(
+            client, reverse("todo:api-v1:task-list"), {"title": "New Task"}
+        )
+        assert response.status_code == 201
+        assert msgpack.unpackb(response.content)["title"] == "New Task"
+        assert Task.objects.filter(title="New Task").exists()
+
+    def test_token_login(self, user):
+        url = reverse("accounts:api-v1:token-login")
+        response = self.post(
+            APIClient(), url, {"email": user.email, "password": "testpass123"}
+        )
+        assert response.status_code == 200
+        assert msgpack.unpackb(response.content)["user_id"] == user.pk
+
+    def test_invalid_body(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        response = client.post(
+            reverse("todo:api-v1:task-list"),
+            b"\xc1",
+            content_type="application/msgpack",
+        )
+        assert response.status_code == 400
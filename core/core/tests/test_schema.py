@@ -0,0 +1,110 @@
+import json
+from io import StringIO
+
+import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+from django.urls import reverse
+
+from core import schema
+
+
+@pytest.fixture
+def schema_dir(settings, tmp_path):
+    """An empty schema directory and the schemas of the process forgotten"""
+    settings.OPENAPI_SCHEMA_DIR = str(tmp_path)
+    settings.CODE_VERSION = "abc123"
+    schema.reset()
+    yield tmp_path
+    schema.reset()
+
+
+@pytest.fixture
+def generated(monkeypatch):
+    """Count the schemas generated by introspection"""
+    calls = []
+    generate_schema = schema.generate_schema
+
+    def counted(format):
+        calls.append(format)
+        return generate_schema(format)
+
+    monkeypatch.setattr(schema, "generate_schema", counted)
+    return calls
+
+
+@pytest.mark.django_db
+class TestSchema:
+    """Test suite for the prebuilt OpenAPI schema"""
+
+    url = reverse("schema-json", kwargs={"format": "json"})
+
+    def test_prebuilt_file(self, client, schema_dir, generated):
+        out = StringIO()
+        call_command("build_openapi_schema", stdout=out)
+        assert "version abc123" in out.getvalue()
+        assert sorted(path.name for path in schema_dir.iterdir()) == [
+            "swagger-abc123.json",
+            "swagger-abc123.yaml",
+        ]
+        generated.clear()
+
+        response = client.get(self.url)
+        assert response.status_code == 200
+        assert response["Content-Type"] == "application/json"
+        assert "max-age=86400" in response["Cache-Control"]
+        assert "public" in response["Cache-Control"]
+        spec = json.loads(response.content)
+        assert "/accounts/api/v1/change-password/" in spec["paths"]
+        assert "host" not in spec
+        assert response.content == (schema_dir / "swagger-abc123.json").read_bytes()
+        assert client.get(
+            reverse("schema-json", kwargs={"format": "yaml"})
+        ).content.startswith(b"swagger:")
+        assert generated == []
+
+    def test_stale_files_are_removed(self, settings, schema_dir):
+        (schema_dir / "swagger-old.json").write_text("{}")
+        call_command("build_openapi_schema", stdout=StringIO())
+        assert not (schema_dir / "swagger-old.json").exists()
+
+    def test_etag(self, client, schema_dir):
+        response = client.get(self.url)
+        etag = response["ETag"]
+        response = client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304
+        assert response["ETag"] == etag
+        assert not response.content
+        assert client.get(self.url, HTTP_IF_NONE_MATCH='"other"').status_code == 200
+
+    def test_fallback_is_cached_by_version(
+        self, settings, client, schema_dir, generated
+    ):
+        """Test that without a prebuilt file the schema is generated once"""
+        content = client.get(self.url).content
+        schema.reset()
+        assert client.get(self.url).content == content
+        assert generated == ["json"]
+        assert cache.get(schema.CACHE_KEY % ("abc123", "json")) == content
+
+        settings.CODE_VERSION = "def456"
+        schema.reset()
+        client.get(self.url)
+        assert generated == ["json", "json"]
+
+    def test_unknown_format(self, client, schema_dir):
+        url = reverse("schema-json", kwargs={"format": "xml"})
+        assert client.get(url).status_code == 404
+
+    def test_ui_uses_schema_view(self, client, schema_dir, generated):
+        response = client.get(reverse("schema-swagger-ui"))
+        assert response.status_code == 200
+        assert self.url.encode() in response.content
+        assert generated == []
+
+    def test_code_version_digest(self, settings, schema_dir):
+        settings.CODE_VERSION = ""
+        schema.reset()
+        version = schema.code_version()
+        assert len(version) == 12
+        assert schema.code_version() == version
@@ -0,0 +1,121 @@
+import gzip
+
+import brotli
+import pytest
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.template import Context, Template
+from django.utils.http import http_date
+
+CSS = (
+    "body { background: url('../img/logo.svg'); }\n" + ".task { color: #333; }\n" * 200
+)
+
+
+@pytest.fixture
+def collected(settings, tmp_path):
+    """collectstatic of a few files into an empty STATIC_ROOT"""
+    source = tmp_path / "static"
+    (source / "css").mkdir(parents=True)
+    (source / "img").mkdir()
+    (source / "css" / "app.css").write_text(CSS)
+    (source / "img" / "logo.svg").write_text("<svg>%s</svg>" % ("<g/>" * 100))
+    (source / "img" / "logo.png").write_bytes(b"\x89PNG" + bytes(range(256)))
+    settings.STATICFILES_DIRS = [source]
+    settings.STATICFILES_FINDERS = [
+        "django.contrib.staticfiles.finders.FileSystemFinder"
+    ]
+    settings.STATIC_ROOT = tmp_path / "root"
+    settings.STATICFILES_STORAGE = (
+        "core.staticfiles.CompressedManifestStaticFilesStorage"
+    )
+    call_command("collectstatic", interactive=False, verbosity=0)
+    return settings.STATIC_ROOT
+
+
+def content(response):
+    return b"".join(response.streaming_content)
+
+
+class TestStaticFiles:
+    """Test suite for the hashed, precompressed static files"""
+
+    def test_variants_are_written(self, collected):
+        hashed = staticfiles_storage.stored_name("css/app.css")
+        assert hashed != "css/app.css"
+        data = (collected / hashed).read_bytes()
+        # the url() is rewritten to the hashed name of the image
+        assert staticfiles_storage.stored_name("img/logo.svg").encode() in data
+        assert gzip.decompress((collected / (hashed + ".gz")).read_bytes()) == data
+        assert brotli.decompress((collected / (hashed + ".br")).read_bytes()) == data
+        assert (collected / "css/app.css.br").exists()
+        assert not list(collected.glob("img/logo*.png.*"))
+
+    def test_templates_use_hashed_names(self, collected):
+        rendered = Template("{% load static %}{% static 'css/app.css' %}").render(
+            Context()
+        )
+        assert rendered == "/static/" + staticfiles_storage.stored_name("css/app.css")
+
+    @pytest.mark.parametrize("hashed", [True, False])
+    def test_names_under_debug(self, settings, collected, hashed):
+        """Test that DEBUG renders the hashed names only when they're served"""
+        settings.DEBUG = True
+        settings.STATIC_HASHED_URLS = hashed
+        rendered = Template("{% load static %}{% static 'css/app.css' %}").render(
+            Context()
+        )
+        name = (
+            staticfiles_storage.stored_name("css/app.css") if hashed else "css/app.css"
+        )
+        assert rendered == "/static/" + name
+
+    @pytest.mark.parametrize(
+        "accept, encoding",
+        [
+            ("gzip, deflate, br", "br"),
+            ("gzip", "gzip"),
+            ("br;q=0.5, gzip", "gzip"),
+            ("br;q=0, *", "gzip"),
+            ("", None),
+        ],
+    )
+    def test_encoding_negotiation(self, client, collected, accept, encoding):
+        url = staticfiles_storage.url("css/app.css")
+        response = client.get(url, HTTP_ACCEPT_ENCODING=accept)
+        assert response.status_code == 200
+        assert response["Content-Type"] == "text/css"
+        assert response.get("Content-Encoding") == encoding
+        assert response["Vary"] == "Accept-Encoding"
+        body = content(response)
+        decompress = {"br": brotli.decompress, "gzip": gzip.decompress}
+        if encoding:
+            body = decompress[encoding](body)
+        hashed = staticfiles_storage.stored_name("css/app.css")
+        assert body == (collected / hashed).read_bytes()
+
+    def test_cache_headers(self, settings, client, collected):
+        response = client.get(staticfiles_storage.url("css/app.css"))
+        assert response["Cache-Control"] == "public, max-age=31536000, immutable"
+        response = client.get("/static/css/app.css")
+        assert response["Cache-Control"] == "public, max-age=3600"
+        response = client.get(
+            "/static/css/app.css",
+            HTTP_IF_MODIFIED_SINCE=http_date(
+                (collected / "css/app.css").stat().st_mtime
+            ),
+        )
+        assert response.status_code == 304
+        assert response["Cache-Control"] == "public, max-age=3600"
+
+    def test_binary_files_are_sent_as_they_are(self, client, collected):
+        response = client.get("/static/img/logo.png", HTTP_ACCEPT_ENCODING="br")
+        assert response["Content-Type"] == "image/png"
+        assert not response.has_header("Content-Encoding")
+        assert not response.has_header("Vary")
+        assert content(response).startswith(b"\x89PNG")
+
+    def test_missing_files(self, client, collected):
+        assert client.get("/static/css/missing.css").status_code == 404
+        assert client.get("/static/../manage.py").status_code == 404
+        assert client.get("/static/css/").status_code == 404
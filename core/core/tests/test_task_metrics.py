@@ -0,0 +1,130 @@
+import time
+from io import StringIO
+
+import pytest
+from celery import Celery
+from celery.contrib.testing.worker import start_worker
+from django.core.management import CommandError, call_command
+from kombu.transport.memory import Channel
+
+from core import task_metrics
+from todo.management.commands import celery_status
+
+# an app of its own on the in-memory broker, the tasks run by its test worker
+app = Celery(
+    "test_task_metrics",
+    broker="memory://",
+    backend="cache+memory://",
+    set_as_current=False,
+)
+
+
+@app.task(name="core.tests.sleep", bind=True, max_retries=1)
+def sleep(self, seconds, fail=False, retry=False):
+    time.sleep(seconds)
+    if retry and not self.request.retries:
+        raise self.retry(countdown=0)
+    if fail:
+        raise ValueError("failed")
+    return seconds
+
+
+def succeeded(metrics):
+    return metrics.get("core.tests.sleep", {}).get("succeeded", 0)
+
+
+def run_worker(count, **options):
+    """Start a worker until it has run count tasks, returns its totals"""
+    with start_worker(app, perform_ping_check=False, **options) as worker:
+        deadline = time.time() + 10
+        while time.time() < deadline:
+            # asked the way celery_status --workers does
+            replies = app.control.broadcast(
+                "task_metrics",
+                destination=[worker.hostname],
+                reply=True,
+                limit=1,
+                timeout=0.5,
+            )
+            metrics = replies[0][worker.hostname] if replies else {}
+            if succeeded(metrics) >= count:
+                return metrics
+            time.sleep(0.05)
+    raise AssertionError("the worker didn't run the tasks")
+
+
+@pytest.fixture
+def memory_broker(monkeypatch, settings, tmp_path):
+    """Report on the in-memory broker, no worker consuming it"""
+    settings.TASK_METRICS_DIR = str(tmp_path)
+    monkeypatch.setattr(celery_status, "app", app)
+    task_metrics.reset()
+    yield
+    Channel.queues.clear()
+    task_metrics.reset()
+
+
+@pytest.mark.usefixtures("memory_broker")
+class TestQueueStats:
+    """Test suite for the broker queue monitoring"""
+
+    def test_depth_and_oldest_age(self):
+        """Test that messages are counted and aged from their publication"""
+        sent_at = time.time()
+        sleep.delay(0)
+        sleep.delay(0)
+        stats = task_metrics.queue_stats(app, now=sent_at + 10)
+        assert stats[0][:2] == ("celery", 2)
+        assert 9 < stats[0][2] <= 10
+
+    def test_empty_and_unknown_queues(self):
+        stats = task_metrics.queue_stats(app, ["celery", "unknown"])
+        assert stats == [("celery", 0, None), ("unknown", 0, None)]
+
+    def test_command(self):
+        sleep.delay(0)
+        out = StringIO()
+        call_command("celery_status", stdout=out)
+        assert out.getvalue().splitlines()[1].split()[:2] == ["celery", "1"]
+
+    def test_command_max_age(self):
+        """Test that a backed up queue fails the command, for health checks"""
+        sleep.delay(0)
+        time.sleep(0.05)
+        with pytest.raises(CommandError):
+            call_command("celery_status", max_age=0.01, stdout=StringIO())
+        call_command("celery_status", max_age=60, stdout=StringIO())
+
+
+@pytest.mark.usefixtures("memory_broker")
+class TestTaskInstrumentation:
+    """Test suite for the signal hooks measuring the task runs"""
+
+    def test_worker_records_runtime_and_wait(self):
+        """Test that a worker measures the wait in queue and the runtime"""
+        sleep.delay(0.05)
+        sleep.delay(0, fail=True)
+        sleep.delay(0, retry=True)
+        time.sleep(0.1)
+        metrics = run_worker(2, pool="solo")["core.tests.sleep"]
+        assert metrics["succeeded"] == 2
+        assert metrics["failed"] == 1
+        assert metrics["retried"] == 1
+        assert metrics["runtime"]["max"] >= 0.05
+        assert metrics["wait"]["max"] >= 0.1
+
+    def test_pool_processes_report_to_the_worker(self):
+        """Test that the main process answers with the totals of its pool"""
+        for _ in range(4):
+            sleep.delay(0)
+        metrics = run_worker(4, pool="prefork", concurrency=2)
+        assert metrics["core.tests.sleep"]["succeeded"] == 4
+        # run by the pool processes, not by this one
+        assert task_metrics.task_metrics() == {}
+
+    def test_eager_tasks_have_no_wait(self):
+        sleep.apply(args=(0,))
+        metrics = task_metrics.task_metrics()["core.tests.sleep"]
+        assert metrics["succeeded"] == 1
+        assert metrics["runtime"]["count"] == 1
+        assert metrics["wait"]["count"] == 0
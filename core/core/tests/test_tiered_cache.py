@@ -0,0 +1,145 @@
+import threading
+import time
+
+import pytest
+from django.core.cache import cache
+
+from core import tiered_cache
+from core.tiered_cache import LocalLRU, TieredCache
+
+
+@pytest.fixture
+def calls():
+    return []
+
+
+def counted(calls, value="value", seconds=0):
+    """compute() returning value after seconds, appending to calls"""
+
+    def compute():
+        calls.append(threading.get_ident())
+        time.sleep(seconds)
+        return value
+
+    return compute
+
+
+class TestLocalLRU:
+    """Test suite for the bounded in-process tier"""
+
+    def test_least_recently_used_are_evicted(self):
+        lru = LocalLRU(2)
+        lru.set("a", 1, 60)
+        lru.set("b", 2, 60)
+        assert lru.get("a") == 1
+        lru.set("c", 3, 60)
+        assert list(lru.entries) == ["a", "c"]
+
+    def test_entries_expire(self):
+        lru = LocalLRU(2)
+        lru.set("a", 1, 0.01)
+        time.sleep(0.02)
+        assert lru.get("a") is None
+        assert not lru.entries
+
+
+class TestTieredCache:
+    """Test suite for the two-tier cache and its stampede protection"""
+
+    def test_tiers(self, calls):
+        """Test that values are read from L1, then from L2, then computed"""
+        tiered = TieredCache("test", timeout=60, beta=0)
+        assert tiered.get_or_set(1, counted(calls)) == "value"
+        assert tiered.get_or_set(1, counted(calls)) == "value"
+        assert len(calls) == 1
+        # another process has an empty L1 but shares L2
+        other = TieredCache("test", timeout=60, beta=0)
+        assert other.get_or_set(1, counted(calls)) == "value"
+        assert len(calls) == 1
+        assert other.local.get("1")[0] == "value"
+
+    def test_single_flight(self, calls):
+        """Test that concurrent misses of a key compute it once"""
+        tiered = TieredCache("test", timeout=60, beta=0)
+        compute = counted(calls, seconds=0.1)
+        results = []
+        threads = [
+            threading.Thread(
+                target=lambda: results.append(tiered.get_or_set("key", compute))
+            )
+            for _ in range(10)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert results == ["value"] * 10
+        assert len(calls) == 1
+
+    def test_errors_reach_the_waiting_threads(self):
+        tiered = TieredCache("test", timeout=60, beta=0)
+
+        def compute():
+            time.sleep(0.05)
+            raise ValueError("failed")
+
+        errors = []
+
+        def get():
+            try:
+                tiered.get_or_set("key", compute)
+            except ValueError as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=get) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(errors) == 3
+        assert not tiered._flights
+
+    def test_waits_for_another_process(self, calls):
+        """Test that a miss waits for the process holding the L2 lock"""
+        tiered = TieredCache("test", timeout=60, beta=0)
+        cache.add(tiered.make_key("key") + ":lock", 1)
+
+        def other_process():
+            time.sleep(0.1)
+            cache.set(tiered.make_key("key"), ("computed", 0.1, time.time() + 60))
+
+        threading.Thread(target=other_process).start()
+        assert tiered.get_or_set("key", counted(calls)) == "computed"
+        assert not calls
+
+    def test_early_refresh(self, monkeypatch, calls):
+        """Test that a slow value close to its expiry is recomputed early"""
+        tiered = TieredCache("test", timeout=60, beta=1)
+        # took 5 seconds to compute and expires in 1 second
+        cache.set(tiered.make_key("key"), ("old", 5, time.time() + 1))
+        monkeypatch.setattr(tiered_cache.random, "random", lambda: 0.5)
+        assert tiered.get_or_set("key", counted(calls, "new")) == "new"
+        assert len(calls) == 1
+        # fresh again, far from its expiry
+        assert tiered.get_or_set("key", counted(calls, "newer")) == "new"
+        assert len(calls) == 1
+
+    def test_stale_value_during_a_refresh(self, monkeypatch, calls):
+        """Test that reads keep the value while another process refreshes it"""
+        tiered = TieredCache("test", timeout=60, beta=1)
+        cache.set(tiered.make_key("key"), ("old", 5, time.time() + 1))
+        cache.add(tiered.make_key("key") + ":lock", 1)
+        monkeypatch.setattr(tiered_cache.random, "random", lambda: 0.5)
+        assert tiered.get_or_set("key", counted(calls, "new")) == "old"
+        assert not calls
+
+    def test_delete_invalidates_every_process(self, calls):
+        tiered = TieredCache("test", timeout=60, beta=0)
+        other = TieredCache("test", timeout=60, beta=0)
+        tiered.get_or_set("key", counted(calls))
+        other.get_or_set("key", counted(calls))
+        assert other.local.get("key") is not None
+        tiered.delete("key")
+        assert other.local.get("key") is None
+        assert other.get_or_set("key", counted(calls, "new")) == "new"
+        assert len(calls) == 2
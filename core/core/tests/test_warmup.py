@@ -0,0 +1,120 @@
+import asyncio
+import gc
+import os
+import subprocess
+import sys
+
+import pytest
+from django.db import connection
+from django.template import engines
+from django.urls import get_resolver
+
+from core import warmup
+from core.asgi import application
+
+
+@pytest.fixture
+def unfrozen():
+    """Put the objects frozen by a test back in the collected generations"""
+    yield
+    gc.unfreeze()
+
+
+class TestWarmup:
+    """Test suite for the warmup of the processes before serving"""
+
+    def test_urls_are_resolved(self):
+        assert warmup.resolve_urls() > 0
+        assert get_resolver()._populated
+
+    def test_project_templates_are_compiled(self, settings):
+        settings.TEMPLATES = [
+            {
+                **settings.TEMPLATES[0],
+                "APP_DIRS": False,
+                "OPTIONS": {
+                    "loaders": [
+                        (
+                            "django.template.loaders.cached.Loader",
+                            ["django.template.loaders.filesystem.Loader"],
+                        )
+                    ]
+                },
+            }
+        ]
+        assert warmup.compile_templates() > 0
+        loader = engines["django"].engine.template_loaders[0]
+        assert any("todo/todo_list.html" in key for key in loader.get_template_cache)
+        assert not any("admin" in key for key in loader.get_template_cache)
+
+    def test_freeze(self, unfrozen):
+        assert warmup.freeze() > 0
+        assert gc.get_freeze_count() > 0
+
+    @pytest.mark.django_db
+    def test_connections_are_opened(self):
+        connection.close()
+        warmup.connect()
+        assert connection.connection is not None
+
+    def test_heavy_modules_are_imported_lazily(self):
+        """Test that a warm web process didn't import what it doesn't serve"""
+        code = (
+            "import sys, core.wsgi; "
+            "print(sorted(set(sys.argv[1:]) & set(sys.modules)))"
+        )
+        modules = ["drf_yasg.views", "celery.worker.control", "faker"]
+        output = subprocess.run(
+            [sys.executable, "-c", code, *modules],
+            env={**os.environ, "WARMUP": "False"},
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        assert output.strip() == "[]"
+
+    def test_wsgi_workers_connect_after_the_fork(self):
+        """Test that importing core.wsgi opens no connection, its forks do"""
+        code = (
+            "import os, core.wsgi; "
+            "from django.db import connection; "
+            "print(connection.connection is not None, flush=True); "
+            "pid = os.fork(); "
+            "pid or print(connection.connection is not None, flush=True); "
+            "pid and os.waitpid(pid, 0); "
+            "pid or os._exit(0)"
+        )
+        output = subprocess.run(
+            [sys.executable, "-c", code],
+            env={**os.environ, "WARMUP": "True"},
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        assert output.split() == ["False", "True"]
+
+
+def lifespan_messages(messages):
+    sent = []
+    received = iter(messages)
+
+    async def receive():
+        return {"type": next(received)}
+
+    async def send(message):
+        sent.append(message["type"])
+
+    scope = {"type": "lifespan", "asgi": {"version": "3.0"}}
+    asyncio.run(application(scope, receive, send))
+    return sent
+
+
+def test_asgi_lifespan_opens_connections(settings, monkeypatch):
+    connected = []
+    monkeypatch.setattr(warmup, "connect", lambda: connected.append(True))
+    settings.WARMUP = True
+    assert lifespan_messages(["lifespan.startup", "lifespan.shutdown"]) == [
+        "lifespan.startup.complete",
+        "lifespan.shutdown.complete",
+    ]
+    assert connected == [True]
@@ -0,0 +1,58 @@
+import pytest
+
+from core import worker
+from core.celery import WORKER_ROLES, app
+
+
+class TestRouting:
+    """Test suite for the routing of the tasks to their queues"""
+
+    @pytest.mark.parametrize(
+        "task, queue, priority",
+        [
+            ("accounts.tasks.send_email", "email", 0),
+            ("todo.tasks.import_tasks", "bulk", None),
+            ("todo.tasks.bulk_tasks", "bulk", None),
+            ("todo.tasks.clear_done_tasks", "maintenance", None),
+            ("todo.tasks.prune_tombstones", "maintenance", 9),
+            ("core.db.optimize_database", "maintenance", 9),
+        ],
+    )
+    def test_routes(self, task, queue, priority):
+        options = app.amqp.router.route({}, task)
+        assert options["queue"].name == queue
+        assert options.get("priority") == priority
+
+    def test_unrouted_tasks_use_the_default_queue(self):
+        assert app.amqp.router.route({}, "core.tests.other")["queue"].name == "celery"
+
+    def test_every_queue_has_a_role(self):
+        """Test that no queue is left without a worker consuming it"""
+        consumed = {queue for role in WORKER_ROLES.values() for queue in role["queues"]}
+        assert consumed == set(app.amqp.queues)
+
+
+class TestWorkerEntryPoint:
+    """Test suite for the per role worker entry point"""
+
+    def test_worker_argv(self):
+        argv = worker.worker_argv("maintenance", ["--loglevel=debug"])
+        assert argv[0] == "worker"
+        assert "--queues=maintenance" in argv
+        assert "--concurrency=1" in argv
+        assert "--prefetch-multiplier=1" in argv
+        assert "--hostname=maintenance@%h" in argv
+        assert argv[-1] == "--loglevel=debug"
+
+    def test_starts_the_role(self, monkeypatch):
+        started = []
+        monkeypatch.setattr(app, "worker_main", started.append)
+        monkeypatch.setattr(app, "start", started.append)
+        worker.main(["email"])
+        worker.main(["beat"])
+        assert "--queues=email" in started[0]
+        assert started[1][0] == "beat"
+
+    def test_unknown_role(self):
+        with pytest.raises(SystemExit):
+            worker.main(["everything"])
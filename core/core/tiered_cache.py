@@ -0,0 +1,294 @@
+"""
+Two-tier cache: a bounded LRU in every process (L1) in front of the shared
+django cache (L2, django-redis in production, see CACHES).
+
+Hot keys are read from the memory of the process for up to local_timeout
+seconds, then from L2 for up to timeout seconds. Three things keep a hot key
+from stampeding L2 and the database:
+
+* single-flight: the threads of a process missing the same key wait for the
+  one computing it, and the processes missing it wait (up to LOCK_WAIT) for
+  the one holding its L2 lock rather than computing it too
+* probabilistic early refresh (XFetch): entries keep the time their value
+  took to compute, reads recompute it before it expires with a probability
+  growing as the expiry gets closer and the computation slower, so a single
+  request refreshes a hot key while the others keep reading the value
+* invalidation: delete() removes the key from L2 and publishes it to every
+  process through TIERED_CACHE_INVALIDATION, which drop it from their L1
+
+local_timeout bounds how long a process serves a value whose invalidation
+it missed. Values are pickled in L2 but shared as they are by the threads
+of a process, cache immutable values (numbers, strings, tuples, dicts which
+aren't modified).
+"""
+
+import collections
+import json
+import logging
+import math
+import random
+import threading
+import time
+import weakref
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "tiered-cache"
+# seconds a process holds the L2 lock of a key it computes
+LOCK_TIMEOUT = 10
+# seconds the other processes wait for the value before computing it too
+LOCK_WAIT = 2
+LOCK_POLL = 0.02
+
+# every TieredCache by name, for the invalidations of other processes
+_caches = collections.defaultdict(weakref.WeakSet)
+_invalidations = {}
+
+
+class LocalLRU:
+    """
+    Entries of a process, the least recently used ones are evicted past
+    max_entries and every entry expires after its timeout
+    """
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.entries = collections.OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires <= now:
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout):
+        with self.lock:
+            self.entries[key] = (time.monotonic() + timeout, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+class Flight:
+    """
+    Computation of a key by a thread, awaited by the others missing it
+    """
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class TieredCache:
+    """
+    Values of name computed on misses by get_or_set, kept timeout seconds
+    in L2 and local_timeout seconds in the L1 of the process. beta scales
+    the early refresh, 0 turns it off
+    """
+
+    def __init__(self, name, timeout, local_timeout=5, max_entries=1000, beta=1.0):
+        self.name = name
+        self.timeout = timeout
+        self.local_timeout = local_timeout
+        self.beta = beta
+        self.local = LocalLRU(max_entries)
+        self._flights = {}
+        self._lock = threading.Lock()
+        _caches[name].add(self)
+
+    @property
+    def shared(self):
+        return caches[settings.TIERED_CACHE_ALIAS]
+
+    def make_key(self, key):
+        return "tiered:%s:%s" % (self.name, key)
+
+    def get_or_set(self, key, compute):
+        """
+        Value of key, compute() called on a miss or to refresh it early
+        """
+        key = str(key)
+        # entries are (value, seconds computing it, expiry timestamp)
+        entry = self.local.get(key)
+        if entry is None:
+            entry = self.shared.get(self.make_key(key))
+            if entry is not None:
+                self._remember(key, entry)
+        if entry is None:
+            return self._fill(key, compute, None)
+        if self.should_refresh(entry):
+            return self._fill(key, compute, entry)
+        return entry[0]
+
+    def should_refresh(self, entry):
+        _, delta, expires = entry
+        if not self.beta:
+            return False
+        # log of (0, 1] is <= 0, the sooner as it gets closer to 0
+        return (
+            time.time() - delta * self.beta * math.log(1 - random.random()) >= expires
+        )
+
+    def delete(self, key):
+        """
+        Remove key from L2 and from the L1 of every process
+        """
+        key = str(key)
+        self.shared.delete(self.make_key(key))
+        self.local.delete(key)
+        get_invalidation().publish(self.name, key)
+
+    def _remember(self, key, entry):
+        get_invalidation()
+        timeout = min(self.local_timeout, entry[2] - time.time())
+        if timeout > 0:
+            self.local.set(key, entry, timeout)
+
+    def _fill(self, key, compute, stale):
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = Flight()
+        if not leader:
+            if stale is not None:
+                # refreshed by another thread, the current value is fine
+                return stale[0]
+            if not flight.done.wait(LOCK_TIMEOUT):
+                return compute()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+        try:
+            flight.value = self._load(key, compute, stale)
+            return flight.value
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+    def _load(self, key, compute, stale):
+        shared_key = self.make_key(key)
+        lock_key = shared_key + ":lock"
+        if not self.shared.add(lock_key, 1, LOCK_TIMEOUT):
+            # another process is computing it
+            if stale is not None:
+                return stale[0]
+            deadline = time.monotonic() + LOCK_WAIT
+            while time.monotonic() < deadline:
+                time.sleep(LOCK_POLL)
+                entry = self.shared.get(shared_key)
+                if entry is not None:
+                    self._remember(key, entry)
+                    return entry[0]
+            return compute()
+        try:
+            started = time.monotonic()
+            value = compute()
+            entry = (value, time.monotonic() - started, time.time() + self.timeout)
+            self.shared.set(shared_key, entry, self.timeout)
+            self._remember(key, entry)
+            return value
+        finally:
+            self.shared.delete(lock_key)
+
+
+def invalidate_local(name, key):
+    for tiered_cache in list(_caches[name]):
+        tiered_cache.local.delete(key)
+
+
+def clear_local():
+    for tiered_caches in list(_caches.values()):
+        for tiered_cache in list(tiered_caches):
+            tiered_cache.local.clear()
+
+
+class LocalInvalidation:
+    """
+    Invalidations reaching the caches of this process only, for a single
+    process (and tests)
+    """
+
+    def publish(self, name, key):
+        invalidate_local(name, key)
+
+
+class RedisInvalidation:
+    """
+    Invalidations published on a redis channel, a thread of every process
+    drops the keys from its L1
+    """
+
+    def __init__(self, url=None):
+        import redis
+
+        self.client = redis.Redis.from_url(url or settings.TIERED_CACHE_REDIS_URL)
+        self.thread = threading.Thread(
+            target=self.listen, name="tiered-cache-invalidation", daemon=True
+        )
+        self.thread.start()
+
+    def publish(self, name, key):
+        import redis
+
+        invalidate_local(name, key)
+        try:
+            self.client.publish(CHANNEL, json.dumps([name, key]))
+        except redis.RedisError:
+            # the other processes drop it after local_timeout
+            logger.warning("tiered cache invalidation of %s %s failed", name, key)
+
+    def listen(self):
+        import redis
+
+        while True:
+            try:
+                pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(CHANNEL)
+                # invalidations published while disconnected are lost
+                clear_local()
+                for message in pubsub.listen():
+                    if message["type"] == "message":
+                        invalidate_local(*json.loads(message["data"]))
+            except redis.RedisError:
+                logger.warning("tiered cache invalidation channel lost, retrying")
+                time.sleep(1)
+
+
+def get_invalidation():
+    path = settings.TIERED_CACHE_INVALIDATION
+    if path not in _invalidations:
+        _invalidations[path] = import_string(path)()
+    return _invalidations[path]
+
+
+def reset():
+    """
+    Empty the L1 of every cache of the process, for tests
+    """
+    clear_local()
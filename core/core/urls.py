@@ -1,42 +1,28 @@
-from django.urls import re_path
-from rest_framework import permissions
-from drf_yasg.views import get_schema_view
-from drf_yasg import openapi
+import re
+
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from django.conf import settings
 from django.conf.urls.static import static
-
-
-schema_view = get_schema_view(
-    openapi.Info(
-        title="Todo API",
-        default_version="v1",
-        description="is a api doc for todo-app",
-        terms_of_service="https://www.google.com/policies/terms/",
-        contact=openapi.Contact(email="alifbahrami13766@gmail.com"),
-        license=openapi.License(name="MIT License"),
-    ),
-    public=True,
-    permission_classes=(permissions.AllowAny,),
-)
-
+from core.schema import schema_json, schema_ui
+from core.staticfiles import serve
 
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("accounts/", include("accounts.urls")),
     path("api-auth/", include("rest_framework.urls")),
     path("", include("todo.urls")),
-    path(
-        "swagger.<format>/", schema_view.without_ui(cache_timeout=0), name="schema-json"
-    ),
-    path(
-        "swagger/",
-        schema_view.with_ui("swagger", cache_timeout=0),
-        name="schema-swagger-ui",
-    ),
-    path("redoc/", schema_view.with_ui("redoc", cache_timeout=0), name="schema-redoc"),
+    path("swagger.<format>/", schema_json, name="schema-json"),
+    path("swagger/", schema_ui, {"renderer": "swagger"}, name="schema-swagger-ui"),
+    path("redoc/", schema_ui, {"renderer": "redoc"}, name="schema-redoc"),
 ]
+if settings.STATIC_SERVE:
+    urlpatterns += [
+        re_path(
+            r"^%s(?P<path>.+)$" % re.escape(settings.STATIC_URL.lstrip("/")),
+            serve,
+            name="static",
+        )
+    ]
 if settings.DEBUG:
-    urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
@@ -0,0 +1,121 @@
+"""
+Warmup of the processes before they take traffic (WARMUP setting).
+
+Without it the first requests of every process pay for what django does
+lazily: importing the views and serializers of ROOT_URLCONF and populating
+the resolver, compiling the templates, opening the database and redis
+connections. prepare() does the import and compile work once per process
+image then freezes the objects it made with gc.freeze(), so processes
+forked from it (the celery prefork pool) don't copy the pages the garbage
+collector would touch. connect() opens the connections in the process, or
+thread, that will serve the requests, after any fork: connections inherited
+through a fork would share their sqlite file handles and redis sockets with
+the parent and the sibling workers.
+
+core.wsgi and core.asgi prepare() when they are imported, which a preloading
+server does once before forking its workers. core.asgi connects on lifespan
+startup, core.wsgi in every process forked from the one importing it
+(connect_after_fork), the workers of gunicorn --preload or uwsgi. Celery
+workers prepare() on worker_init, before the pool forks. benchmarks.startup
+measures the import time and the first requests with and without it.
+"""
+
+import gc
+import logging
+import os
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+from django.template import engines
+from django.urls import get_resolver
+
+logger = logging.getLogger(__name__)
+
+
+def resolve_urls():
+    """
+    Import every view of ROOT_URLCONF and populate the resolver
+    """
+    resolver = get_resolver()
+    # both are filled by _populate(), what the first reverse() does
+    resolver.reverse_dict
+    return len(resolver.url_patterns)
+
+
+def project_template_dirs(engine):
+    base_dir = str(settings.BASE_DIR)
+    return [
+        str(directory)
+        for directory in engine.template_dirs
+        if str(directory).startswith(base_dir)
+    ]
+
+
+def compile_templates():
+    """
+    Compile the templates of the project (the admin's are left alone), kept
+    by the cached template loader
+    """
+    compiled = 0
+    for engine in engines.all():
+        for directory in project_template_dirs(engine):
+            for root, _, files in os.walk(directory):
+                for name in files:
+                    if not name.endswith((".html", ".tpl")):
+                        continue
+                    path = os.path.relpath(os.path.join(root, name), directory)
+                    engine.get_template(path.replace(os.sep, "/"))
+                    compiled += 1
+    return compiled
+
+
+def freeze():
+    """
+    Move everything alive to the permanent generation of the garbage collector
+    """
+    gc.collect()
+    gc.freeze()
+    return gc.get_freeze_count()
+
+
+def connect():
+    """
+    Open the connections of the databases, the caches and the session store
+    """
+    for connection in connections.all():
+        connection.ensure_connection()
+    for alias in settings.CACHES:
+        caches[alias].get("warmup")
+    if settings.SESSION_ENGINE == "accounts.sessions":
+        from accounts.sessions import get_store
+
+        get_store().get("warmup")
+    return len(connections.all())
+
+
+def _timed(steps):
+    timings = {}
+    for name, step in steps:
+        started = time.perf_counter()
+        result = step()
+        timings[name] = time.perf_counter() - started
+        logger.info("warmup %s: %s in %.1fms", name, result, timings[name] * 1000)
+    return timings
+
+
+def prepare():
+    """
+    Import and compile what the first requests would, then freeze
+    """
+    return _timed(
+        [("urls", resolve_urls), ("templates", compile_templates), ("gc", freeze)]
+    )
+
+
+def connect_after_fork():
+    """
+    connect() in every child forked from this process, not in this one
+    """
+    os.register_at_fork(after_in_child=lambda: _timed([("connections", connect)]))
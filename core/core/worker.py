@@ -0,0 +1,50 @@
+"""
+Celery worker entry point per role.
+
+Starts a worker consuming the queues of a role of core.celery.WORKER_ROLES
+with its concurrency and prefetch, so every role can run (and scale) as its
+own service, or the beat scheduler with the "beat" role. Extra arguments are
+passed on to celery.
+
+usage (from the core/ directory):
+    python -m core.worker email
+    python -m core.worker bulk --loglevel=debug
+    python -m core.worker beat
+"""
+
+import sys
+
+from core.celery import WORKER_ROLES, app
+
+
+def worker_argv(role, extra=()):
+    """
+    celery command line of the worker of a role
+    """
+    options = WORKER_ROLES[role]
+    return [
+        "worker",
+        "--queues=%s" % ",".join(options["queues"]),
+        "--concurrency=%s" % options["concurrency"],
+        "--prefetch-multiplier=%s" % options["prefetch_multiplier"],
+        # unique node names, the role is what workers are listed by
+        "--hostname=%s@%%h" % role,
+        "--loglevel=info",
+        *extra,
+    ]
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    roles = [*WORKER_ROLES, "beat"]
+    if not argv or argv[0] not in roles:
+        sys.exit("usage: python -m core.worker {%s} [celery options]" % ",".join(roles))
+    role, extra = argv[0], argv[1:]
+    if role == "beat":
+        app.start(["beat", "--loglevel=info", *extra])
+    else:
+        app.worker_main(worker_argv(role, extra))
+
+
+if __name__ == "__main__":
+    main()
@@ -14,3 +14,13 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
 
 application = get_wsgi_application()
+
+# imported once the apps are loaded by get_wsgi_application
+from django.conf import settings  # noqa: E402
+from core import warmup  # noqa: E402
+
+# views imported and templates compiled before the first request, the
+# connections opened by each worker once forked (see core.warmup)
+if settings.WARMUP:
+    warmup.prepare()
+    warmup.connect_after_fork()
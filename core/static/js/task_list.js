@@ -0,0 +1,92 @@
+// In place updates of the task list (todo_list.html): the toggle and delete
+// buttons of the rows and the next pages are fetched as partial HTML (the
+// X-Partial header, see todo.partials) and swapped into the page instead of
+// reloading the whole list.
+(function () {
+    "use strict";
+
+    var form = document.getElementById("task-action-form");
+    var list = document.getElementById("task-list");
+    if (!form || !list || !window.fetch) {
+        return;
+    }
+
+    function partial(url, options) {
+        options = options || {};
+        options.headers = { "X-Partial": "true" };
+        options.credentials = "same-origin";
+        return fetch(url, options).then(function (response) {
+            if (!response.ok) {
+                throw new Error("HTTP " + response.status);
+            }
+            return response;
+        });
+    }
+
+    // row buttons post the page's form, which holds the CSRF token
+    list.addEventListener("click", function (event) {
+        var button = event.target.closest("button[formaction]");
+        // the delete confirmation prevents the default when it's declined
+        if (!button || event.defaultPrevented) {
+            return;
+        }
+        event.preventDefault();
+        var row = button.closest(".todo-item-card");
+        partial(button.formAction, { method: "POST", body: new FormData(form) })
+            .then(function (response) {
+                if (response.status === 204) {
+                    row.remove();
+                    return;
+                }
+                return response.text().then(function (html) {
+                    row.outerHTML = html;
+                });
+            })
+            .catch(function () {
+                // the full page shows whatever happened
+                window.location.reload();
+            });
+    });
+
+    // infinite scroll: the rows of the next page are appended when the end
+    // of the list comes into view, X-Next-Page gives the page after them
+    var more = document.getElementById("task-list-more");
+    if (!more || !more.dataset.next || !window.IntersectionObserver) {
+        return;
+    }
+    var pagination = document.querySelector(".pagination");
+    if (pagination) {
+        pagination.hidden = true;
+    }
+    var loading = false;
+    var observer = new IntersectionObserver(function (entries) {
+        if (!entries[0].isIntersecting || loading || !more.dataset.next) {
+            return;
+        }
+        loading = true;
+        partial(more.dataset.next)
+            .then(function (response) {
+                more.dataset.next = response.headers.get("X-Next-Page") || "";
+                return response.text();
+            })
+            .then(function (html) {
+                list.insertAdjacentHTML("beforeend", html);
+                loading = false;
+                if (!more.dataset.next) {
+                    observer.disconnect();
+                    return;
+                }
+                // observed again, a short page leaves the end in view
+                observer.unobserve(more);
+                observer.observe(more);
+            })
+            .catch(function () {
+                loading = false;
+                if (pagination) {
+                    pagination.hidden = false;
+                }
+                observer.disconnect();
+            });
+    });
+    observer.observe(more);
+})();
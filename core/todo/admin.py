@@ -1,5 +1,7 @@
 from django.contrib import admin
-from todo.models import Task
+from todo.models import Task, ShardPlacement, Job
 
 
 admin.site.register(Task)
+admin.site.register(ShardPlacement)
+admin.site.register(Job)
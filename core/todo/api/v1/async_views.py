@@ -0,0 +1,162 @@
+"""
+Async (ASGI) versions of the task list, retrieve, create and toggle endpoints.
+
+Django 3.2 has no async ORM, every database call is awaited through
+sync_to_async (thread sensitive, so it reuses the request's connection)
+while parsing, validation and rendering stay on the event loop. Querysets,
+filters and serializers are the ones of TaskModelViewSet so both APIs
+return the same payloads.
+"""
+
+import functools
+
+from asgiref.sync import sync_to_async
+from django.http import Http404, HttpResponse
+from django.shortcuts import get_object_or_404
+from rest_framework import exceptions, status
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from todo.api.v1.views import TaskModelViewSet
+
+
+@sync_to_async
+def authenticate(request):
+    """
+    Run the DRF authentication classes (basic, session, token, jwt) off the
+    event loop, they all hit the database
+    """
+    return request.user.is_authenticated
+
+
+def async_api_view(methods):
+    """
+    Decorator for async API views which authenticates the request and turns
+    API exceptions into JSON error responses like DRF views do
+    """
+
+    def decorator(view):
+        @functools.wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if request.method not in methods:
+                return render_response(
+                    {"detail": 'Method "%s" not allowed.' % request.method},
+                    status.HTTP_405_METHOD_NOT_ALLOWED,
+                )
+            drf_request = Request(
+                request,
+                parsers=[parser() for parser in api_settings.DEFAULT_PARSER_CLASSES],
+                authenticators=[
+                    auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES
+                ],
+                parser_context={"kwargs": kwargs},
+            )
+            try:
+                if not await authenticate(drf_request):
+                    raise exceptions.NotAuthenticated()
+                return await view(drf_request, *args, **kwargs)
+            except Http404:
+                return render_response(
+                    {"detail": "Not found."}, status.HTTP_404_NOT_FOUND
+                )
+            except exceptions.APIException as exc:
+                return api_exception_response(exc)
+
+        # DRF checks CSRF itself for session authenticated requests
+        wrapper.csrf_exempt = True
+        return wrapper
+
+    return decorator
+
+
+def render_response(data, status_code=status.HTTP_200_OK):
+    """
+    Response rendered by the JSON renderer of the API (the first of
+    DEFAULT_RENDERER_CLASSES), like the responses of the sync views
+    """
+    renderer = api_settings.DEFAULT_RENDERER_CLASSES[0]()
+    return HttpResponse(
+        renderer.render(data), status=status_code, content_type=renderer.media_type
+    )
+
+
+def api_exception_response(exc):
+    """
+    JSON response of an API exception, in the format of DRF's exception handler
+    """
+    if isinstance(exc.detail, (list, dict)):
+        data = exc.detail
+    else:
+        data = {"detail": exc.detail}
+    status_code = exc.status_code
+    if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+        # the first authentication class (basic) sends a WWW-Authenticate header
+        status_code = status.HTTP_401_UNAUTHORIZED
+    return render_response(data, status_code)
+
+
+def task_viewset(request, action, **kwargs):
+    """
+    TaskModelViewSet instance which provides the queryset, filters and
+    serializer of an action without going through its (sync) dispatch
+    """
+    return TaskModelViewSet(
+        request=request, action=action, args=(), kwargs=kwargs, format_kwarg=None
+    )
+
+
+@sync_to_async
+def paginate(viewset, queryset):
+    return viewset.paginate_queryset(queryset)
+
+
+@sync_to_async
+def save(serializer):
+    serializer.save()
+
+
+@sync_to_async
+def get_task(viewset):
+    queryset = viewset.get_queryset()
+    return get_object_or_404(queryset, pk=viewset.kwargs["pk"])
+
+
+@sync_to_async
+def toggle(task):
+    task.complete = not task.complete
+    task.save()
+
+
+@async_api_view(["GET", "POST"])
+async def task_list(request):
+    if request.method == "POST":
+        return await task_create(request)
+    viewset = task_viewset(request, "list")
+    queryset = await sync_to_async(viewset.get_queryset)()
+    queryset = viewset.filter_queryset(queryset)
+    page = await paginate(viewset, queryset)
+    serializer = viewset.get_serializer(page, many=True)
+    return render_response(viewset.get_paginated_response(serializer.data).data)
+
+
+async def task_create(request):
+    viewset = task_viewset(request, "create")
+    serializer = viewset.get_serializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    await save(serializer)
+    return render_response(serializer.data, status.HTTP_201_CREATED)
+
+
+@async_api_view(["GET"])
+async def task_detail(request, pk):
+    viewset = task_viewset(request, "retrieve", pk=pk)
+    task = await get_task(viewset)
+    return render_response(viewset.get_serializer(task).data)
+
+
+@async_api_view(["POST"])
+async def task_toggle(request, pk):
+    viewset = task_viewset(request, "partial_update", pk=pk)
+    task = await get_task(viewset)
+    await toggle(task)
+    return render_response(viewset.get_serializer(task).data)
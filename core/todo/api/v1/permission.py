@@ -1,6 +1,7 @@
 from rest_framework.permissions import BasePermission
+from accounts.models import get_profile
 
 
 class IsTaskOwner(BasePermission):
     def has_object_permission(self, request, view, obj):
-        return obj.user == request.user.profile
+        return obj.user_id == get_profile(request.user).pk
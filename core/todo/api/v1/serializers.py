@@ -1,6 +1,8 @@
 from rest_framework import serializers
-from todo.models import Task
+from todo.models import Task, Job
 from accounts.models import Profile
+from todo.sharding import create_task
+from todo import bulk
 
 
 class TaskSerializer(serializers.ModelSerializer):
@@ -24,6 +26,16 @@ class TaskSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ["user", "id"]
 
+    def get_fields(self):
+        fields = super().get_fields()
+        # sparse fieldsets (?fields=) of TaskModelViewSet reads
+        requested = self.context.get("fields")
+        if requested is not None:
+            fields = {
+                name: field for name, field in fields.items() if name in requested
+            }
+        return fields
+
     def get_abs_url(self, obj):
 
         request = self.context.get("request")
@@ -34,6 +46,8 @@ class TaskSerializer(serializers.ModelSerializer):
     def to_representation(self, instance):
         request = self.context.get("request")
         rep = super().to_representation(instance)
+        if self.context.get("fields") is not None:
+            return rep
         if request.parser_context.get("kwargs").get("pk"):
             rep.pop("snippet", None)
             rep.pop("relative_url", None)
@@ -43,7 +57,77 @@ class TaskSerializer(serializers.ModelSerializer):
         return rep
 
     def create(self, validated_data):
-        validated_data["user"] = Profile.objects.get(
-            user__id=self.context.get("request").user.id
-        )
-        return super().create(validated_data)
+        profile = Profile.objects.get(user__id=self.context.get("request").user.id)
+        return create_task(profile, **validated_data)
+
+
+class TaskChangeSerializer(TaskSerializer):
+    """
+    Tasks of delta syncs, with the fields of the task detail
+    """
+
+    snippet = None
+    relative_url = None
+    absolute_url = None
+
+    class Meta(TaskSerializer.Meta):
+        fields = [
+            "id",
+            "user",
+            "description",
+            "title",
+            "complete",
+            "created_date",
+            "updated_date",
+        ]
+
+    def to_representation(self, instance):
+        return serializers.ModelSerializer.to_representation(self, instance)
+
+
+class JobSerializer(serializers.ModelSerializer):
+    progress = serializers.ReadOnlyField(source="get_progress")
+
+    class Meta:
+        model = Job
+        fields = [
+            "id",
+            "kind",
+            "status",
+            "progress",
+            "total",
+            "processed",
+            "result",
+            "cancel_requested",
+            "created_date",
+            "updated_date",
+        ]
+        read_only_fields = fields
+
+
+class BulkFilterSerializer(serializers.Serializer):
+    """
+    Filter of a bulk operation, the query parameters of the task list
+    """
+
+    complete = serializers.BooleanField(required=False, allow_null=True)
+    search = serializers.CharField(required=False, allow_blank=True)
+    ordering = serializers.CharField(required=False, allow_blank=True)
+
+    def to_internal_value(self, data):
+        # a misspelled filter would widen a deletion to every task
+        unknown = set(data) - set(self.fields) if isinstance(data, dict) else ()
+        if unknown:
+            raise serializers.ValidationError(
+                "Unknown filter(s): %s." % ", ".join(sorted(unknown))
+            )
+        return super().to_internal_value(data)
+
+
+class BulkOperationSerializer(serializers.Serializer):
+    """
+    Bulk operation on the tasks matching filter, every task without one
+    """
+
+    operation = serializers.ChoiceField(choices=bulk.OPERATIONS)
+    filter = BulkFilterSerializer(required=False)
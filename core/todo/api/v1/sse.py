@@ -0,0 +1,133 @@
+"""
+Server-Sent Events stream of the authenticated user's task changes.
+
+A plain ASGI application, routed by core.asgi, because Django 3.2 can only
+stream synchronous iterators which would hold a thread per open stream.
+Clients (EventSource with the session cookie, or an Authorization header
+like the rest of the API) get the events of todo.events as they happen and
+a comment every HEARTBEAT_SECONDS which keeps proxies from closing idle
+connections.
+"""
+
+import asyncio
+import io
+import json
+from importlib import import_module
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user
+from django.core import signals
+from django.core.handlers.asgi import ASGIRequest
+from django.utils.functional import SimpleLazyObject
+from rest_framework import exceptions, status
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from accounts.models import Profile
+from todo import events
+
+HEARTBEAT_SECONDS = 15
+# how long EventSource waits before reconnecting, in milliseconds
+RETRY = b"retry: 3000\n\n"
+HEARTBEAT = b": heartbeat\n\n"
+
+
+@sync_to_async
+def authenticate(scope):
+    """
+    Return the profile id of the user of the request, None for anonymous
+    requests, with the session and the DRF authentication classes
+    """
+    request = ASGIRequest(scope, io.BytesIO())
+    engine = import_module(settings.SESSION_ENGINE)
+    request.session = engine.SessionStore(
+        request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+    )
+    request.user = SimpleLazyObject(lambda: get_user(request))
+    drf_request = Request(
+        request,
+        authenticators=[auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES],
+    )
+    try:
+        if not drf_request.user.is_authenticated:
+            return None
+        return (
+            Profile.objects.filter(user=drf_request.user)
+            .values_list("pk", flat=True)
+            .first()
+        )
+    except exceptions.APIException:
+        return None
+    finally:
+        # the stream doesn't use the database, release the connection like
+        # django does when a request finishes
+        signals.request_finished.send(sender=None)
+
+
+async def send_json(send, data, status_code):
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status_code,
+            "headers": [(b"content-type", b"application/json")],
+        }
+    )
+    await send({"type": "http.response.body", "body": json.dumps(data).encode()})
+
+
+async def wait_for_disconnect(receive):
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            return
+
+
+async def task_events(scope, receive, send):
+    if scope["method"] != "GET":
+        return await send_json(
+            send,
+            {"detail": 'Method "%s" not allowed.' % scope["method"]},
+            status.HTTP_405_METHOD_NOT_ALLOWED,
+        )
+    profile_id = await authenticate(scope)
+    if profile_id is None:
+        return await send_json(
+            send,
+            {"detail": str(exceptions.NotAuthenticated.default_detail)},
+            status.HTTP_401_UNAUTHORIZED,
+        )
+
+    async with events.get_broker().subscribe(profile_id) as subscription:
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status.HTTP_200_OK,
+                "headers": [
+                    (b"content-type", b"text/event-stream"),
+                    (b"cache-control", b"no-cache"),
+                    # nginx would buffer the events otherwise
+                    (b"x-accel-buffering", b"no"),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": RETRY, "more_body": True})
+        disconnected = asyncio.ensure_future(wait_for_disconnect(receive))
+        try:
+            while True:
+                getter = asyncio.ensure_future(subscription.get())
+                done, _ = await asyncio.wait(
+                    {getter, disconnected},
+                    timeout=HEARTBEAT_SECONDS,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                if getter not in done:
+                    getter.cancel()
+                if disconnected in done:
+                    break
+                chunk = getter.result().encode() if getter in done else HEARTBEAT
+                await send(
+                    {"type": "http.response.body", "body": chunk, "more_body": True}
+                )
+        finally:
+            disconnected.cancel()
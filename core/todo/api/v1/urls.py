@@ -1,12 +1,24 @@
+from django.urls import path
 from rest_framework.routers import DefaultRouter
-from todo.api.v1.views import TaskModelViewSet
+from todo.api.v1.views import TaskModelViewSet, JobViewSet
+from todo.api.v1 import async_views
 
 app_name = "api-v1"
 
 router = DefaultRouter()
 router.register("task", TaskModelViewSet, basename="task")
+router.register("job", JobViewSet, basename="job")
 
-urlpatterns = router.urls
+urlpatterns = router.urls + [
+    # async (ASGI) task endpoints
+    path("async/task/", async_views.task_list, name="async-task-list"),
+    path("async/task/<int:pk>/", async_views.task_detail, name="async-task-detail"),
+    path(
+        "async/task/<int:pk>/toggle/",
+        async_views.task_toggle,
+        name="async-task-toggle",
+    ),
+]
 
 # urlpatterns = [
 #     # path("task/<int:id>",task_detail,name="task-detaile"),
@@ -1,11 +1,35 @@
+import re
+
 from rest_framework.permissions import IsAuthenticated
-from todo.models import Task
-from todo.api.v1.serializers import TaskSerializer
-from rest_framework import viewsets
+from todo.models import Task, Job, with_snippet
+from todo.api.v1.serializers import (
+    TaskSerializer,
+    TaskChangeSerializer,
+    JobSerializer,
+    BulkOperationSerializer,
+)
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
 from todo.api.v1.permission import IsTaskOwner
 from todo.api.v1.paginations import DefaultPagination
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
+from django.conf import settings
+from django.db import transaction
+from django.http import StreamingHttpResponse
+from django.urls import reverse
+from django.utils.cache import patch_vary_headers
+from todo.sharding import tasks_for
+from accounts.models import get_profile
+from todo import bulk, exports, imports, sync, tasks
+
+CHANGES_LIMIT = 500
+# columns read for the serializer fields which aren't columns themselves,
+# user is always read, the owner permission checks it
+FIELD_COLUMNS = {"snippet": (), "relative_url": (), "absolute_url": ()}
+ACCEPTS_GZIP = re.compile(r"\bgzip\b")
 
 
 class TaskModelViewSet(viewsets.ModelViewSet):
@@ -18,7 +42,208 @@ class TaskModelViewSet(viewsets.ModelViewSet):
     pagination_class = DefaultPagination
 
     def get_queryset(self):
-        profile = getattr(self.request.user, "profile", None)
+        profile = get_profile(self.request.user)
         if not profile:
             return Task.objects.none()
-        return Task.objects.filter(user=profile)
+        read = self.action in ("list", "retrieve")
+        queryset = tasks_for(profile, read=read)
+        if not read:
+            return queryset
+        fields = self.get_requested_fields()
+        if fields is None:
+            # lists show the snippet instead of the description
+            if self.action == "list":
+                queryset = with_snippet(queryset.defer("description"))
+            return queryset
+        columns = {"user"}
+        for name in fields:
+            columns.update(FIELD_COLUMNS.get(name, (name,)))
+        queryset = queryset.only(*columns)
+        if "snippet" in fields:
+            queryset = with_snippet(queryset)
+        return queryset
+
+    def get_requested_fields(self):
+        """
+        Fields asked for with ?fields=id,title,complete on reads, None when
+        the serializer's default fields are wanted
+        """
+        if self.action not in ("list", "retrieve"):
+            return None
+        value = self.request.query_params.get("fields", "")
+        if not value.strip(", "):
+            return None
+        fields = [name.strip() for name in value.split(",") if name.strip()]
+        unknown = set(fields) - set(self.get_serializer_class().Meta.fields)
+        if unknown:
+            raise ValidationError(
+                {"fields": ["Unknown field(s): %s." % ", ".join(sorted(unknown))]}
+            )
+        return fields
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        fields = self.get_requested_fields()
+        if fields is None and self.action == "list":
+            # not only left out of the output, the deferred column isn't read
+            fields = [
+                name
+                for name in self.get_serializer_class().Meta.fields
+                if name != "description"
+            ]
+        context["fields"] = fields
+        return context
+
+    @action(detail=False, methods=["get"])
+    def changes(self, request):
+        """
+        Tasks changed and ids of the tasks deleted since the cursor of the
+        previous sync (?since=), with the cursor of the next sync. The last
+        seconds of changes (TASK_SYNC_OVERLAP) are returned again by the
+        next sync, clients apply them by id and updated_date
+        """
+        try:
+            since = request.query_params.get("since")
+            cursor = sync.decode_cursor(since) if since else None
+        except ValueError:
+            raise ValidationError({"since": ["Invalid cursor."]})
+        try:
+            limit = int(request.query_params.get("limit", CHANGES_LIMIT))
+        except ValueError:
+            raise ValidationError({"limit": ["A valid integer is required."]})
+        limit = max(1, min(limit, CHANGES_LIMIT))
+        try:
+            tasks, deleted, cursor, has_more = sync.changes_since(
+                get_profile(request.user), cursor, limit
+            )
+        except sync.CursorExpired:
+            return Response(
+                {"detail": "The cursor has expired, sync without since."},
+                status=status.HTTP_410_GONE,
+            )
+        serializer = TaskChangeSerializer(
+            tasks, many=True, context=self.get_serializer_context()
+        )
+        return Response(
+            {
+                "cursor": cursor,
+                "has_more": has_more,
+                "changed": serializer.data,
+                "deleted": deleted,
+            }
+        )
+
+    @action(detail=False, methods=["get"])
+    def export(self, request):
+        """
+        Stream the (filtered) tasks of the user as CSV or NDJSON (?type=),
+        gzipped for clients which accept it
+        """
+        export_type = request.query_params.get("type", "csv")
+        if export_type not in exports.FORMATS:
+            raise ValidationError(
+                {"type": ["Choose one of %s." % ", ".join(exports.FORMATS)]}
+            )
+        gzip = bool(ACCEPTS_GZIP.search(request.META.get("HTTP_ACCEPT_ENCODING", "")))
+        queryset = self.filter_queryset(tasks_for(get_profile(request.user), read=True))
+        response = StreamingHttpResponse(
+            exports.export_tasks(queryset, export_type, gzip=gzip),
+            content_type=exports.FORMATS[export_type][1],
+        )
+        filename = "tasks.%s" % export_type
+        response["Content-Disposition"] = 'attachment; filename="%s"' % filename
+        if gzip:
+            response["Content-Encoding"] = "gzip"
+        patch_vary_headers(response, ("Accept-Encoding",))
+        return response
+
+    @action(detail=False, methods=["post"], url_path="import", url_name="import")
+    def import_tasks(self, request):
+        """
+        Import tasks from an uploaded CSV or NDJSON file (file=), right away
+        for small files, with a job reporting the progress for larger ones
+        """
+        upload = request.FILES.get("file")
+        if upload is None:
+            raise ValidationError({"file": ["No file was submitted."]})
+        import_type = request.data.get("type") or imports.detect_type(
+            upload.name, upload.content_type
+        )
+        if import_type not in imports.TYPES:
+            raise ValidationError(
+                {"type": ["Choose one of %s." % ", ".join(imports.TYPES)]}
+            )
+        profile = get_profile(request.user)
+        if upload.size <= settings.TASK_IMPORT_INLINE_BYTES:
+            result = imports.import_tasks(profile, upload, import_type)
+            return Response(result, status=status.HTTP_201_CREATED)
+
+        job = Job.objects.create(
+            profile=profile,
+            kind="import",
+            params={"type": import_type},
+            total=upload.size,
+            file=upload,
+        )
+        transaction.on_commit(lambda: tasks.import_tasks.delay(job.pk))
+        serializer = JobSerializer(job, context=self.get_serializer_context())
+        return Response(
+            serializer.data,
+            status=status.HTTP_202_ACCEPTED,
+            headers={"Location": reverse("todo:api-v1:job-detail", args=[job.pk])},
+        )
+
+    @action(detail=False, methods=["post"])
+    def bulk(self, request):
+        """
+        Complete, reopen or delete every task matching a filter (the query
+        parameters of the list) with a job reporting the progress
+        """
+        serializer = BulkOperationSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        profile = get_profile(request.user)
+        spec = serializer.validated_data.get("filter", {})
+        # invalid filter values are reported now rather than by the job
+        total = bulk.filter_tasks(profile, spec).count()
+        job = Job.objects.create(
+            profile=profile,
+            kind="bulk",
+            params={
+                "operation": serializer.validated_data["operation"],
+                "filter": spec,
+            },
+            total=total,
+        )
+        transaction.on_commit(lambda: tasks.bulk_tasks.delay(job.pk))
+        return Response(
+            JobSerializer(job).data,
+            status=status.HTTP_202_ACCEPTED,
+            headers={"Location": reverse("todo:api-v1:job-detail", args=[job.pk])},
+        )
+
+
+class JobViewSet(viewsets.ReadOnlyModelViewSet):
+    permission_classes = [IsAuthenticated]
+    serializer_class = JobSerializer
+    pagination_class = DefaultPagination
+
+    def get_queryset(self):
+        profile = get_profile(self.request.user)
+        if not profile:
+            return Job.objects.none()
+        return Job.objects.filter(profile=profile).order_by("-created_date")
+
+    @action(detail=True, methods=["post"])
+    def cancel(self, request, pk=None):
+        """
+        Cancel a job, it stops at its next batch keeping the work done
+        """
+        job = self.get_object()
+        if job.status in Job.FINISHED:
+            return Response(
+                {"detail": "The job has already finished."},
+                status=status.HTTP_409_CONFLICT,
+            )
+        Job.objects.filter(pk=job.pk).update(cancel_requested=True)
+        job.refresh_from_db()
+        return Response(self.get_serializer(job).data, status=status.HTTP_202_ACCEPTED)
@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class TodoConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "todo"
+
+    def ready(self):
+        # registers the shard cleanup of deleted profiles, the publishing of
+        # task change events, the tombstones of deleted tasks and the
+        # invalidation of the cached task counters, and the checks of the
+        # settings needing a shared cache
+        from todo import sharding, events, sync, counters
+        from core import checks
@@ -0,0 +1,96 @@
+"""
+Bulk operations on the tasks matching a filter.
+
+The filter spec takes the query parameters of the task list endpoint
+(complete, search, ordering) and is applied by the filter backends of
+TaskModelViewSet, so an operation touches exactly the tasks the same list
+request would show. The tasks are processed in batches of CHUNK_SIZE, in
+primary key order whatever the ordering: the ids of a batch are read after
+the last id of the previous one and changed with one set-based update() or
+delete() in a transaction of their own, so a large operation never holds the
+write lock of the shard for long and can stop between two batches.
+"""
+
+from django.db import transaction
+from django.http import HttpRequest, QueryDict
+from django.utils import timezone
+from rest_framework.request import Request
+
+from core.routers import pin_to_primary
+from todo import counters, events, sync
+from todo.sharding import tasks_for
+
+CHUNK_SIZE = 500
+OPERATIONS = ["complete", "incomplete", "delete"]
+
+
+def filter_tasks(profile, spec):
+    """
+    Queryset of the tasks of profile on its shard primary matching a filter
+    spec, raises ValidationError for invalid filter values
+    """
+    from todo.api.v1.views import TaskModelViewSet
+
+    request = HttpRequest()
+    request.method = "GET"
+    request.GET = QueryDict(mutable=True)
+    for name, value in spec.items():
+        if value not in (None, ""):
+            request.GET[name] = str(value).lower() if name == "complete" else value
+    request.user = profile.user
+    view = TaskModelViewSet(
+        request=Request(request), action="list", kwargs={}, format_kwarg=None
+    )
+    return view.filter_queryset(tasks_for(profile))
+
+
+def _complete(tasks, ids, complete):
+    return tasks.filter(pk__in=ids).update(
+        complete=complete, updated_date=timezone.now()
+    )
+
+
+def _delete(tasks, ids, alias):
+    rows = list(tasks.filter(pk__in=ids).values_list("id", "user_id"))
+    tasks.filter(pk__in=ids).delete()
+    sync.record_tombstones(rows, using=alias)
+    events.publish_deleted(rows, using=alias)
+    return len(rows)
+
+
+def run_operation(profile, operation, spec, progress=None):
+    """
+    Apply operation to the tasks of profile matching spec, calling
+    progress(tasks processed, result) after each batch. Returns the result:
+    the number of tasks updated or deleted
+    """
+    tasks = filter_tasks(profile, spec).order_by("pk")
+    alias = tasks.db
+    key = "deleted" if operation == "delete" else "updated"
+    result = {"operation": operation, key: 0}
+    processed = 0
+    last = 0
+    try:
+        while True:
+            # the ids of the batch and its change are kept in step by the lock
+            with transaction.atomic(using=alias), events.suppressed():
+                ids = list(
+                    tasks.filter(pk__gt=last).values_list("pk", flat=True)[:CHUNK_SIZE]
+                )
+                if not ids:
+                    break
+                if operation == "delete":
+                    result[key] += _delete(tasks, ids, alias)
+                else:
+                    result[key] += _complete(tasks, ids, operation == "complete")
+            last = ids[-1]
+            processed += len(ids)
+            pin_to_primary(profile.pk)
+            if progress is not None:
+                progress(processed, result)
+    finally:
+        counters.invalidate(profile.pk, using=alias)
+        if operation != "delete" and result[key]:
+            # clients of the stream refetch instead of one event per task
+            events.publish(profile.pk, "resync", {}, using=alias)
+    return result
@@ -0,0 +1,50 @@
+"""
+Task counters of a profile (total, complete, pending).
+
+The counts of the profile page are read with one aggregate and kept in the
+two-tier cache (core.tiered_cache) until a task of the profile changes:
+single task writes invalidate them from the Task signals, bulk writes which
+don't send signals (update(), bulk_create) call invalidate themselves.
+"""
+
+from django.db import transaction
+from django.db.models import Count, Q
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from core.tiered_cache import TieredCache
+from todo.models import Task
+from todo.sharding import tasks_for
+
+counts = TieredCache("task-counts", timeout=60)
+
+
+def task_counts(profile):
+    """
+    {"total", "complete", "pending"} task counts of profile
+    """
+
+    def count():
+        result = tasks_for(profile, read=True).aggregate(
+            total=Count("id"), complete=Count("id", filter=Q(complete=True))
+        )
+        result["pending"] = result["total"] - result["complete"]
+        return result
+
+    return dict(counts.get_or_set(profile.pk, count))
+
+
+def invalidate(profile_id, using=None):
+    """
+    Drop the counts of a profile, again when the transaction commits in
+    case a read cached the counts it hasn't committed yet
+    """
+    counts.delete(profile_id)
+    transaction.on_commit(lambda: counts.delete(profile_id), using=using)
+
+
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+def invalidate_task_counts(sender, instance, using, **kwargs):
+    if instance.user_id:
+        invalidate(instance.user_id, using=using)
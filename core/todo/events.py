@@ -0,0 +1,229 @@
+"""
+Task change events for the SSE streams (todo.api.v1.sse).
+
+Writes publish an event on the channel of the task owner (a profile id)
+once their transaction commits: "created", "updated", "toggled" (complete
+changed) and "deleted". Single task writes publish from the Task signals,
+bulk paths publish one event per owner with publish_deleted. Every event is
+formatted as an SSE frame once, when it's published, so the streams only
+forward strings.
+
+The broker is settings.TASK_EVENTS_BROKER: InMemoryBroker for a single
+process (and tests) or RedisBroker when the streams and the writes (web
+processes, celery workers) run in several processes.
+"""
+
+import asyncio
+import contextlib
+import json
+import logging
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+from todo.models import Task
+
+CHANNEL = "task-events:%s"
+# events a subscriber may lag behind before it's told to resync
+QUEUE_SIZE = 100
+TASK_EVENT_FIELDS = [
+    "id",
+    "title",
+    "description",
+    "complete",
+    "created_date",
+    "updated_date",
+]
+
+logger = logging.getLogger(__name__)
+_local = threading.local()
+_brokers = {}
+
+
+def format_event(event, data):
+    return "event: %s\ndata: %s\n\n" % (
+        event,
+        json.dumps(data, cls=DjangoJSONEncoder, separators=(",", ":")),
+    )
+
+
+# sent instead of the events a subscriber missed because it fell behind
+RESYNC = format_event("resync", {})
+
+
+class InMemorySubscription:
+    def __init__(self, loop):
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+
+    def put(self, message):
+        """
+        Called on the event loop of the subscriber
+        """
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC)
+
+    async def get(self):
+        return await self.queue.get()
+
+
+class InMemoryBroker:
+    """
+    Pub/sub within one process, publish can be called from any thread
+    """
+
+    def __init__(self):
+        self._subscriptions = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def publish(self, channel, message):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(channel, ()))
+        for subscription in subscriptions:
+            subscription.loop.call_soon_threadsafe(subscription.put, message)
+
+    @contextlib.asynccontextmanager
+    async def subscribe(self, channel):
+        subscription = InMemorySubscription(asyncio.get_running_loop())
+        with self._lock:
+            self._subscriptions[channel].add(subscription)
+        try:
+            yield subscription
+        finally:
+            with self._lock:
+                self._subscriptions[channel].discard(subscription)
+                if not self._subscriptions[channel]:
+                    del self._subscriptions[channel]
+
+
+class RedisSubscription:
+    def __init__(self, pubsub):
+        self.pubsub = pubsub
+
+    async def get(self):
+        while True:
+            message = await self.pubsub.get_message(
+                ignore_subscribe_messages=True, timeout=None
+            )
+            if message is not None:
+                return message["data"].decode()
+
+
+class RedisBroker:
+    """
+    Pub/sub through redis channels, shared by every process
+    """
+
+    def __init__(self, url=None):
+        import redis
+
+        self.url = url or settings.TASK_EVENTS_REDIS_URL
+        self.client = redis.Redis.from_url(self.url)
+
+    def publish(self, channel, message):
+        import redis
+
+        try:
+            self.client.publish(CHANNEL % channel, message)
+        except redis.RedisError:
+            # the write is committed, its streams miss the event
+            logger.warning("task event for %s not published", channel)
+
+    @contextlib.asynccontextmanager
+    async def subscribe(self, channel):
+        from redis import asyncio as aioredis
+
+        client = aioredis.Redis.from_url(self.url)
+        pubsub = client.pubsub()
+        await pubsub.subscribe(CHANNEL % channel)
+        try:
+            yield RedisSubscription(pubsub)
+        finally:
+            await pubsub.unsubscribe()
+            await pubsub.close()
+            await client.close()
+
+
+def get_broker():
+    path = settings.TASK_EVENTS_BROKER
+    if path not in _brokers:
+        _brokers[path] = import_string(path)()
+    return _brokers[path]
+
+
+@contextlib.contextmanager
+def suppressed():
+    """
+    Don't publish events nor record tombstones (todo.sync) for the task
+    signals of the block, for writes which aren't changes of the user
+    (moving shards) or which do it themselves in bulk
+    """
+    previous = getattr(_local, "suppressed", False)
+    _local.suppressed = True
+    try:
+        yield
+    finally:
+        _local.suppressed = previous
+
+
+def is_suppressed():
+    return getattr(_local, "suppressed", False)
+
+
+def publish(profile_id, event, data, using=None):
+    """
+    Publish an event to the streams of a profile when the transaction
+    commits, right away outside of transactions
+    """
+    message = format_event(event, data)
+    transaction.on_commit(
+        lambda: get_broker().publish(profile_id, message), using=using
+    )
+
+
+def publish_deleted(rows, using=None):
+    """
+    Publish the deletion of (id, profile id) rows, one event per profile
+    """
+    ids = defaultdict(list)
+    for task_id, profile_id in rows:
+        if profile_id:
+            ids[profile_id].append(task_id)
+    for profile_id, task_ids in ids.items():
+        publish(profile_id, "deleted", {"ids": task_ids}, using=using)
+
+
+def task_data(task):
+    return {field: getattr(task, field) for field in TASK_EVENT_FIELDS}
+
+
+@receiver(post_save, sender=Task)
+def publish_task_saved(sender, instance, created, using, **kwargs):
+    if is_suppressed() or not instance.user_id:
+        return
+    loaded_complete = getattr(instance, "_loaded_complete", None)
+    if created:
+        event = "created"
+    elif loaded_complete is not None and loaded_complete != instance.complete:
+        event = "toggled"
+    else:
+        event = "updated"
+    instance._loaded_complete = instance.complete
+    publish(instance.user_id, event, task_data(instance), using=using)
+
+
+@receiver(post_delete, sender=Task)
+def publish_task_deleted(sender, instance, using, **kwargs):
+    if is_suppressed():
+        return
+    publish_deleted([(instance.pk, instance.user_id)], using=using)
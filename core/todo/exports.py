@@ -0,0 +1,89 @@
+"""
+Streaming export of a profile's tasks as CSV or NDJSON.
+
+Rows are read with a server side cursor (iterator) as values_list tuples
+and encoded as they are sent, optionally gzipped on the fly, so the memory
+used doesn't depend on the number of tasks.
+"""
+
+import csv
+import json
+import zlib
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+EXPORT_FIELDS = [
+    "id",
+    "title",
+    "description",
+    "complete",
+    "created_date",
+    "updated_date",
+]
+# rows fetched from the database at a time
+CHUNK_SIZE = 2000
+# bytes sent at a time, one write per row would dominate the export
+BUFFER_SIZE = 64 * 1024
+
+
+class Echo:
+    """
+    File-like object of csv.writer which returns the lines it's given
+    """
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def ndjson_lines(rows):
+    encoder = DjangoJSONEncoder(separators=(",", ":"))
+    for row in rows:
+        yield encoder.encode(dict(zip(EXPORT_FIELDS, row))) + "\n"
+
+
+FORMATS = {
+    "csv": (csv_lines, "text/csv"),
+    "ndjson": (ndjson_lines, "application/x-ndjson"),
+}
+
+
+def buffered(lines, size):
+    """
+    Encode lines and join them into chunks of about size bytes
+    """
+    buffer, buffered_size = [], 0
+    for line in lines:
+        data = line.encode()
+        buffer.append(data)
+        buffered_size += len(data)
+        if buffered_size >= size:
+            yield b"".join(buffer)
+            buffer, buffered_size = [], 0
+    if buffer:
+        yield b"".join(buffer)
+
+
+def gzipped(chunks, level=6):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_tasks(queryset, format="csv", gzip=False):
+    """
+    Iterator over the bytes of the export of a task queryset
+    """
+    lines = FORMATS[format][0]
+    rows = queryset.order_by("id").values_list(*EXPORT_FIELDS)
+    chunks = buffered(lines(rows.iterator(chunk_size=CHUNK_SIZE)), BUFFER_SIZE)
+    return gzipped(chunks) if gzip else chunks
@@ -0,0 +1,170 @@
+"""
+Streaming import of tasks from CSV or NDJSON files.
+
+Files are read line by line, rows are checked by a light validator (the
+columns of todo.exports, only title is required) and inserted with
+bulk_create, one transaction per BATCH_SIZE rows so a large import never
+holds the write lock of the shard for long. Invalid rows are skipped and
+reported with their line number.
+"""
+
+import codecs
+import csv
+import json
+
+from django.conf import settings
+from django.db import transaction
+
+from core.routers import pin_to_primary
+from todo import counters, events
+from todo.models import Task
+from todo.sharding import allocate_task_ids, shard_for
+
+BATCH_SIZE = 1000
+# errors reported back, the rows after are still skipped but not listed
+MAX_ERRORS = 100
+TYPES = {
+    "csv": ("text/csv", ".csv"),
+    "ndjson": ("application/x-ndjson", ".ndjson"),
+}
+TRUE = {"1", "true", "t", "yes", "y"}
+FALSE = {"", "0", "false", "f", "no", "n"}
+TITLE_MAX_LENGTH = Task._meta.get_field("title").max_length
+
+
+class RowError(ValueError):
+    pass
+
+
+def detect_type(name, content_type):
+    """
+    Type of an uploaded file from its content type or extension, or None
+    """
+    for import_type, (type_content_type, extension) in TYPES.items():
+        if content_type == type_content_type or name.lower().endswith(extension):
+            return import_type
+    return None
+
+
+def csv_rows(lines):
+    reader = csv.DictReader(codecs.iterdecode(lines, "utf-8-sig"))
+    for row in reader:
+        yield reader.line_num, row
+
+
+def ndjson_rows(lines):
+    for line_number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            yield line_number, RowError("Invalid JSON.")
+            continue
+        if not isinstance(row, dict):
+            row = RowError("Expected an object.")
+        yield line_number, row
+
+
+ROW_READERS = {"csv": csv_rows, "ndjson": ndjson_rows}
+
+
+def to_bool(value):
+    if isinstance(value, bool):
+        return value
+    value = str(value).strip().lower()
+    if value in TRUE:
+        return True
+    if value in FALSE:
+        return False
+    raise RowError("complete: Must be a valid boolean.")
+
+
+def clean_row(row):
+    """
+    Task fields of a row, RowError when it's invalid
+    """
+    if isinstance(row, RowError):
+        raise row
+    title = row.get("title")
+    if not isinstance(title, str) or not title.strip():
+        raise RowError("title: This field is required.")
+    if len(title) > TITLE_MAX_LENGTH:
+        raise RowError(
+            "title: Ensure this field has no more than %s characters."
+            % TITLE_MAX_LENGTH
+        )
+    description = row.get("description") or ""
+    if not isinstance(description, str):
+        raise RowError("description: Not a valid string.")
+    return {
+        "title": title,
+        "description": description,
+        "complete": to_bool(row.get("complete") or False),
+    }
+
+
+def counted(lines, counter):
+    """
+    Pass lines through, adding their size in bytes to counter["bytes"]
+    """
+    for line in lines:
+        counter["bytes"] += len(line)
+        yield line
+
+
+def _insert(profile, alias, fields, order):
+    tasks = [
+        Task(user=profile, _order=order + i, **row) for i, row in enumerate(fields)
+    ]
+    # bulk_create sends no pre_save, ids unique across the shards are set here
+    if len(settings.TASK_SHARDS) > 1:
+        for task, pk in zip(tasks, allocate_task_ids(len(tasks))):
+            task.pk = pk
+    with transaction.atomic(using=alias):
+        Task.objects.using(alias).bulk_create(tasks)
+        # bulk_create sends no signals, clients refetch what changed
+        events.publish(profile.pk, "resync", {}, using=alias)
+        counters.invalidate(profile.pk, using=alias)
+
+
+def import_tasks(profile, lines, import_type, progress=None):
+    """
+    Import the tasks of the byte lines of a file for profile, calling
+    progress(bytes read, result) after each batch. Returns the result:
+    the number of created tasks and the errors of the skipped rows
+    """
+    alias = shard_for(profile.pk)
+    result = {"created": 0, "errors": [], "error_count": 0}
+    counter = {"bytes": 0}
+    order = Task.objects.using(alias).filter(user=profile).count()
+    batch = []
+
+    def flush():
+        nonlocal order
+        if batch:
+            _insert(profile, alias, batch, order)
+            order += len(batch)
+            result["created"] += len(batch)
+            batch.clear()
+        if progress is not None:
+            progress(counter["bytes"], result)
+
+    rows = ROW_READERS[import_type](counted(lines, counter))
+    try:
+        for line_number, row in rows:
+            try:
+                batch.append(clean_row(row))
+            except RowError as e:
+                result["error_count"] += 1
+                if len(result["errors"]) < MAX_ERRORS:
+                    result["errors"].append({"line": line_number, "error": str(e)})
+            if len(batch) >= BATCH_SIZE:
+                flush()
+    except (csv.Error, UnicodeDecodeError) as e:
+        # the rest of the file can't be read, keep what was imported
+        result["error_count"] += 1
+        result["errors"].append({"line": None, "error": str(e)})
+    flush()
+    pin_to_primary(profile.pk)
+    return result
@@ -0,0 +1,78 @@
+"""
+Filtered, keyset paginated rows of the HTML task list.
+
+The status and search filters are WHERE clauses and a page is the PAGE_SIZE
+tasks after (or before) the id of the last task of the previous page, read
+in id order from the user index (sqlite keeps the rowid in it), so a page
+costs the same at the first and at the 20000th task and the tasks are never
+counted. Rows are dicts of the columns the template shows, the description
+cut to EXCERPT_LENGTH characters by the database. The template renders each
+row once per version of the task, cached by {% cache %} under its id and
+updated_date.
+"""
+
+from dataclasses import dataclass
+
+from django.db.models import Q
+from django.db.models.functions import Substr
+
+PAGE_SIZE = 50
+# more than the 15 words the list shows of the description
+EXCERPT_LENGTH = 200
+# updated_date keys the cached row fragments (todo/task_row.html)
+ROW_FIELDS = ["id", "title", "complete", "created_date", "updated_date", "excerpt"]
+STATUSES = {"pending": False, "completed": True}
+
+
+@dataclass
+class Page:
+    rows: list
+    # ids the links to the neighbouring pages start after or before
+    next_after: int = None
+    previous_before: int = None
+
+
+def filter_tasks(queryset, status=None, search=None):
+    """
+    Tasks of a status ("pending" or "completed") whose title or description
+    contains every word of search
+    """
+    if status in STATUSES:
+        queryset = queryset.filter(complete=STATUSES[status])
+    for word in (search or "").split():
+        queryset = queryset.filter(
+            Q(title__icontains=word) | Q(description__icontains=word)
+        )
+    return queryset
+
+
+def rows(queryset):
+    return queryset.annotate(excerpt=Substr("description", 1, EXCERPT_LENGTH)).values(
+        *ROW_FIELDS
+    )
+
+
+def keyset_page(queryset, after=None, before=None, size=PAGE_SIZE):
+    """
+    Page of the rows after the id after, or before the id before, the first
+    page without either. One more row than the page is read to know whether
+    there's another page
+    """
+    if before is not None:
+        found = list(rows(queryset.filter(id__lt=before).order_by("-id"))[: size + 1])
+        page = Page(found[:size][::-1])
+        # the task before was on the next page, rows or not before it
+        page.next_after = page.rows[-1]["id"] if page.rows else before - 1
+        if len(found) > size:
+            page.previous_before = page.rows[0]["id"]
+        return page
+
+    if after is not None:
+        queryset = queryset.filter(id__gt=after)
+    found = list(rows(queryset.order_by("id"))[: size + 1])
+    page = Page(found[:size])
+    if len(found) > size:
+        page.next_after = page.rows[-1]["id"]
+    if after is not None:
+        page.previous_before = page.rows[0]["id"] if page.rows else after + 1
+    return page
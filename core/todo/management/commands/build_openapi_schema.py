@@ -0,0 +1,31 @@
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.schema import FORMATS, code_version, generate_schema, schema_path
+
+
+class Command(BaseCommand):
+    help = "building the OpenAPI schema of the running code into static files"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output",
+            help="directory of the schema files (default OPENAPI_SCHEMA_DIR)",
+        )
+
+    def handle(self, *args, **options):
+        if options["output"]:
+            settings.OPENAPI_SCHEMA_DIR = options["output"]
+        directory = Path(settings.OPENAPI_SCHEMA_DIR)
+        directory.mkdir(parents=True, exist_ok=True)
+        version = code_version()
+        built = {schema_path(format, version) for format in FORMATS}
+        # the schemas of previous versions are never served again
+        for path in directory.glob("swagger-*"):
+            if path not in built:
+                path.unlink()
+        for path in sorted(built):
+            path.write_bytes(generate_schema(path.suffix[1:]))
+        self.stdout.write("built the schema of version %s in %s" % (version, directory))
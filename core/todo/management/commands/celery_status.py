@@ -0,0 +1,72 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.celery import app
+from core.task_metrics import queue_stats
+
+
+class Command(BaseCommand):
+    help = "reporting the depth and oldest message age of the celery queues"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--queue",
+            action="append",
+            dest="queues",
+            help="queue to report, every configured queue by default",
+        )
+        parser.add_argument(
+            "--max-age",
+            type=float,
+            help="fail when a message has waited longer than this (seconds)",
+        )
+        parser.add_argument(
+            "--workers",
+            action="store_true",
+            help="also report the task totals of the running workers",
+        )
+        parser.add_argument("--timeout", type=float, default=1)
+
+    def handle(self, *args, **options):
+        stats = queue_stats(app, options["queues"])
+        self.stdout.write("%-20s %8s %12s" % ("queue", "depth", "oldest"))
+        for queue, depth, age in stats:
+            oldest = "-" if age is None else "%.1fs" % age
+            self.stdout.write("%-20s %8s %12s" % (queue, depth, oldest))
+
+        if options["workers"]:
+            self.write_workers(options["timeout"])
+
+        max_age = options["max_age"]
+        late = [
+            queue
+            for queue, _, age in stats
+            if max_age is not None and (age or 0) > max_age
+        ]
+        if late:
+            raise CommandError(
+                "messages older than %ss in %s" % (max_age, ", ".join(late))
+            )
+
+    def write_workers(self, timeout):
+        replies = app.control.broadcast("task_metrics", reply=True, timeout=timeout)
+        if not replies:
+            self.stdout.write("no worker replied")
+        for reply in replies:
+            for worker, metrics in reply.items():
+                self.stdout.write(worker)
+                for name, task in sorted(metrics.items()):
+                    runtime, wait = task["runtime"], task["wait"]
+                    self.stdout.write(
+                        "  %s: %s ok %s retried %s failed, runtime avg %.3fs"
+                        " max %.3fs, wait avg %.3fs max %.3fs"
+                        % (
+                            name,
+                            task["succeeded"],
+                            task["retried"],
+                            task["failed"],
+                            runtime["total"] / (runtime["count"] or 1),
+                            runtime["max"],
+                            wait["total"] / (wait["count"] or 1),
+                            wait["max"],
+                        )
+                    )
@@ -1,21 +1,21 @@
 from django.core.management.base import BaseCommand
 
-from faker import Faker
 import random
 from datetime import datetime
 
 from accounts.models import User, Profile
-from todo.models import Task
+from todo.sharding import create_task
 
 
 class Command(BaseCommand):
     help = "inserting dummy data"
 
-    def __init__(self, *args, **kwargs):
-        super(Command, self).__init__(*args, **kwargs)
-        self.fake = Faker()
-
     def handle(self, *args, **options):
+        # a testing requirement, imported by this command only, not by every
+        # process loading the commands
+        from faker import Faker
+
+        self.fake = Faker()
         user = User.objects.create_user(email=self.fake.email(), password="Test@123456")
         profile = Profile.objects.get(user=user)
         profile.first_name = self.fake.first_name()
@@ -24,8 +24,8 @@ class Command(BaseCommand):
         profile.save()
 
         for _ in range(5):
-            Task.objects.create(
-                user=profile,
+            create_task(
+                profile,
                 title=self.fake.paragraph(nb_sentences=1),
                 description=self.fake.paragraph(nb_sentences=10),
                 complete=random.choice([True, False]),
@@ -0,0 +1,40 @@
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from accounts.sessions import get_store
+
+
+class Command(BaseCommand):
+    help = "copying the live sessions of the database backend to the session store"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--delete",
+            action="store_true",
+            help="empty the session table (expired sessions too) once copied",
+        )
+
+    def handle(self, *args, **options):
+        store = get_store()
+        now = timezone.now()
+        live = Session.objects.filter(expire_date__gt=now)
+        batch = []
+        copied = 0
+        # the encoded data of both backends is the same, copied as it is and
+        # expiring when it would have in the database
+        for key, data, expire_date in live.values_list(
+            "session_key", "session_data", "expire_date"
+        ).iterator(chunk_size=options["batch_size"]):
+            batch.append((key, data, int((expire_date - now).total_seconds())))
+            if len(batch) >= options["batch_size"]:
+                store.set_many(batch)
+                copied += len(batch)
+                batch.clear()
+        store.set_many(batch)
+        copied += len(batch)
+
+        if options["delete"]:
+            Session.objects.all().delete()
+        self.stdout.write("copied %s sessions to %s" % (copied, type(store).__name__))
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.models import Profile
+from todo.sharding import PLACEMENT_TIMEOUT, move_tasks, shard_for
+
+
+class Command(BaseCommand):
+    help = "moving the tasks of a profile to another shard database"
+
+    def add_arguments(self, parser):
+        parser.add_argument("profile_id", type=int)
+        parser.add_argument("database", help="one of settings.TASK_SHARDS")
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument(
+            "--grace",
+            type=float,
+            default=PLACEMENT_TIMEOUT,
+            help="seconds to wait for requests which still use the old shard, "
+            "shorter than the placement cache timeout only with a shared cache",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            profile = Profile.objects.get(pk=options["profile_id"])
+        except Profile.DoesNotExist:
+            raise CommandError("profile %s does not exist" % options["profile_id"])
+        source = shard_for(profile.pk)
+        try:
+            moved = move_tasks(
+                profile,
+                options["database"],
+                batch_size=options["batch_size"],
+                grace=options["grace"],
+            )
+        except ValueError as e:
+            raise CommandError(e)
+        self.stdout.write(
+            "moved %s tasks of %s from %s to %s"
+            % (moved, profile, source, options["database"])
+        )
@@ -0,0 +1,50 @@
+# Generated by Django 3.2.25 on 2026-10-19 04:38
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0003_alter_profile_description"),
+        ("todo", "0002_task_description"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="task",
+            name="user",
+            field=models.ForeignKey(
+                blank=True,
+                db_constraint=False,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                to="accounts.profile",
+            ),
+        ),
+        migrations.CreateModel(
+            name="ShardPlacement",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("database", models.CharField(max_length=100)),
+                ("updated_date", models.DateTimeField(auto_now=True)),
+                (
+                    "profile",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="shard_placement",
+                        to="accounts.profile",
+                    ),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 3.2.25 on 2026-10-19 04:51
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0003_alter_profile_description"),
+        ("todo", "0003_task_shards"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TaskTombstone",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("task_id", models.BigIntegerField()),
+                (
+                    "deleted_date",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(
+                fields=["user", "updated_date", "id"], name="todo_task_changes_idx"
+            ),
+        ),
+        migrations.AddField(
+            model_name="tasktombstone",
+            name="user",
+            field=models.ForeignKey(
+                db_constraint=False,
+                on_delete=django.db.models.deletion.DO_NOTHING,
+                related_name="+",
+                to="accounts.profile",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="tasktombstone",
+            index=models.Index(
+                fields=["user", "deleted_date", "id"], name="todo_tombstone_changes_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 3.2.25 on 2026-10-19 05:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("todo", "0005_jobs"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="job",
+            name="cancel_requested",
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AlterField(
+            model_name="job",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("pending", "Pending"),
+                    ("running", "Running"),
+                    ("done", "Done"),
+                    ("failed", "Failed"),
+                    ("cancelled", "Cancelled"),
+                ],
+                default="pending",
+                max_length=20,
+            ),
+        ),
+    ]
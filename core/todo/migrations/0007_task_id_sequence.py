@@ -0,0 +1,28 @@
+# Generated by Django 3.2.25 on 2026-10-19 06:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("todo", "0006_job_cancellation"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TaskIdSequence",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("last_id", models.BigIntegerField(default=0)),
+            ],
+        ),
+    ]
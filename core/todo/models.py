@@ -1,10 +1,33 @@
 from django.db import models
+from django.db.models.functions import Substr
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
 from django.urls import reverse
+from django.utils import timezone
+
+from core.querycache import CachedQuerySet, bump_instance
+from core.routers import pin_to_primary
+
+SNIPPET_LENGTH = 5
+
+
+def with_snippet(queryset):
+    """
+    Annotate a task queryset with the snippet of the description computed by
+    the database, so the description itself can be deferred
+    """
+    return queryset.annotate(snippet=Substr("description", 1, SNIPPET_LENGTH))
 
 
 class Task(models.Model):
+    # tasks may live on another database (shard) than their profile, so the
+    # reference can't be enforced by a database constraint
     user = models.ForeignKey(
-        "accounts.Profile", on_delete=models.CASCADE, null=True, blank=True
+        "accounts.Profile",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        db_constraint=False,
     )
     description = models.TextField(blank=True)
     title = models.CharField(max_length=200)
@@ -12,14 +35,159 @@ class Task(models.Model):
     created_date = models.DateTimeField(auto_now_add=True)
     updated_date = models.DateTimeField(auto_now=True)
 
+    # reads are cached (see core.querycache) per owning profile
+    cache_scope = "user"
+    objects = CachedQuerySet.as_manager()
+
     def __str__(self):
         return self.title
 
     class Meta:
         order_with_respect_to = "user"
+        indexes = [
+            # delta sync (todo.sync) reads the tasks changed since a cursor
+            models.Index(
+                fields=["user", "updated_date", "id"], name="todo_task_changes_idx"
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # tells toggles apart from other updates (see todo.events), without
+        # loading the field when it's deferred
+        instance._loaded_complete = instance.__dict__.get("complete")
+        return instance
 
     def get_snippet(self):
-        return self.description[0:5]
+        # lists compute it in SQL (with_snippet) and defer the description
+        if "snippet" in self.__dict__:
+            return self.snippet
+        return self.description[0:SNIPPET_LENGTH]
 
     def get_absolute_api_url(self):
         return reverse("todo:api-v1:task-detail", kwargs={"pk": self.pk})
+
+
+class ShardPlacement(models.Model):
+    """
+    Database holding a profile's tasks when it differs from the hash based
+    shard, written when the tasks are moved with the move_task_shard command
+    """
+
+    profile = models.OneToOneField(
+        "accounts.Profile", on_delete=models.CASCADE, related_name="shard_placement"
+    )
+    database = models.CharField(max_length=100)
+    updated_date = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return "%s -> %s" % (self.profile, self.database)
+
+
+class TaskIdSequence(models.Model):
+    """
+    Last task id handed out on a sharded setup, kept on the default database
+    so ids are unique across the shards and moved tasks keep theirs
+    """
+
+    last_id = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return str(self.last_id)
+
+
+class TaskTombstone(models.Model):
+    """
+    Id of a deleted task, kept on the shard of its profile for
+    TASK_TOMBSTONE_DAYS so syncing clients learn about the deletion
+    """
+
+    task_id = models.BigIntegerField()
+    # removed with the profile by todo.sync, not by the deletion cascade
+    user = models.ForeignKey(
+        "accounts.Profile",
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name="+",
+    )
+    deleted_date = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["user", "deleted_date", "id"], name="todo_tombstone_changes_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return "task %s" % self.task_id
+
+
+class Job(models.Model):
+    """
+    Background work of a profile (task imports, bulk operations) run by
+    celery, clients follow its progress at /api/v1/job/<id>/ and can cancel
+    it, the job stops at its next batch
+    """
+
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+    STATUS_CHOICES = [
+        (PENDING, "Pending"),
+        (RUNNING, "Running"),
+        (DONE, "Done"),
+        (FAILED, "Failed"),
+        (CANCELLED, "Cancelled"),
+    ]
+    FINISHED = (DONE, FAILED, CANCELLED)
+
+    profile = models.ForeignKey(
+        "accounts.Profile", on_delete=models.CASCADE, related_name="jobs"
+    )
+    kind = models.CharField(max_length=50)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=PENDING)
+    params = models.JSONField(default=dict, blank=True)
+    # units of work (bytes of an import) done out of total
+    total = models.PositiveBigIntegerField(default=0)
+    processed = models.PositiveBigIntegerField(default=0)
+    result = models.JSONField(default=dict, blank=True)
+    file = models.FileField(upload_to="jobs/", blank=True)
+    # asked for by the client, checked by the job between batches
+    cancel_requested = models.BooleanField(default=False)
+    created_date = models.DateTimeField(auto_now_add=True)
+    updated_date = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return "%s job %s (%s)" % (self.kind, self.pk, self.status)
+
+    def is_cancel_requested(self):
+        """
+        Whether the job was cancelled since it was loaded
+        """
+        return Job.objects.filter(pk=self.pk, cancel_requested=True).exists()
+
+    def get_progress(self):
+        if self.status == self.DONE:
+            return 100
+        if not self.total:
+            return 0
+        return min(100, self.processed * 100 // self.total)
+
+
+post_save.connect(bump_instance, sender=Task)
+post_delete.connect(bump_instance, sender=Task)
+
+
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+def pin_task_owner(sender, instance, **kwargs):
+    """
+    Signal for task writes which sends the owner's reads to the primary
+    database for a while so they don't read stale data from a replica
+    """
+    if instance.user_id:
+        pin_to_primary(instance.user_id)
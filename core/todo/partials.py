@@ -0,0 +1,54 @@
+"""
+Partial HTML responses of the task views, for in place list updates.
+
+A request with the X-Partial header gets the rows it changed instead of a
+redirect to the whole list: toggles and edits the row of the task
+(todo/task_rows.html, the cached fragments of todo_list.html), deletes an
+empty 204, and the list the rows of the page with the url of the next one in
+X-Next-Page (empty on the last page), the chunks of its infinite scroll.
+static/js/task_list.js sends them and swaps the rows in the page.
+"""
+
+from django.conf import settings
+from django.shortcuts import render
+from django.utils.cache import patch_vary_headers
+
+from core.schema import code_version
+from todo import listing
+
+HEADER = "X-Partial"
+
+
+def requested(request):
+    return bool(request.headers.get(HEADER))
+
+
+def row_context():
+    """
+    Context of the cached row fragments
+    """
+    return {
+        # rows rendered by other code are never reused
+        "row_version": code_version(),
+        "row_cache_timeout": settings.TASK_ROW_CACHE_TIMEOUT,
+    }
+
+
+def vary(response):
+    # the same url answers the page or the rows
+    patch_vary_headers(response, (HEADER,))
+    return response
+
+
+def render_rows(request, rows):
+    return vary(
+        render(request, "todo/task_rows.html", {"tasks": rows, **row_context()})
+    )
+
+
+def render_row(request, queryset, pk):
+    """
+    Row of the task pk read from queryset, the database the task was
+    written to
+    """
+    return render_rows(request, list(listing.rows(queryset.filter(pk=pk))))
@@ -0,0 +1,237 @@
+import time
+import zlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import F, Max
+from django.db.models.signals import pre_delete, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from accounts.models import Profile
+from core.routers import read_db_for
+from todo import events
+from todo.models import Task, TaskIdSequence, TaskTombstone, ShardPlacement
+
+PLACEMENT_KEY = "task-shard:%s"
+# processes may write to the old shard of a moved profile for this long
+# unless the cache is shared, move_tasks waits as long before the last sync
+PLACEMENT_TIMEOUT = 60
+# fields copied as they are when tasks move between shards
+TASK_FIELDS = [f.attname for f in Task._meta.concrete_fields]
+
+
+def hash_shard(profile_id):
+    """
+    Stable (process and restart independent) shard of a profile id
+    """
+    shards = settings.TASK_SHARDS
+    return shards[zlib.crc32(str(profile_id).encode()) % len(shards)]
+
+
+def shard_for(profile_id):
+    """
+    Return the database alias holding the tasks of a profile
+    """
+    if len(settings.TASK_SHARDS) == 1:
+        return settings.TASK_SHARDS[0]
+    key = PLACEMENT_KEY % profile_id
+    alias = cache.get(key)
+    if alias is None:
+        alias = (
+            ShardPlacement.objects.filter(profile_id=profile_id)
+            .values_list("database", flat=True)
+            .first()
+        ) or hash_shard(profile_id)
+        cache.set(key, alias, PLACEMENT_TIMEOUT)
+    return alias
+
+
+def tasks_for(profile, read=False):
+    """
+    Queryset of a profile's tasks on its shard, read=True allows safe-method
+    reads to be served by the replica of the shard
+    """
+    alias = shard_for(profile.pk)
+    if read:
+        alias = read_db_for(profile.pk, alias)
+    return Task.objects.using(alias).filter(user=profile)
+
+
+def create_task(profile, **fields):
+    return Task.objects.using(shard_for(profile.pk)).create(user=profile, **fields)
+
+
+def allocate_task_ids(count):
+    """
+    Reserve count task ids unique across the shards, the autoincrement of
+    each shard would hand out ids the others have, which collide when tasks
+    are moved. The sequence starts after the largest id of every shard
+    """
+    with transaction.atomic(using=DEFAULT_DB_ALIAS):
+        sequence = TaskIdSequence.objects.using(DEFAULT_DB_ALIAS)
+        if not sequence.filter(pk=1).update(last_id=F("last_id") + count):
+            largest = max(
+                Task.objects.using(alias).aggregate(Max("id"))["id__max"] or 0
+                for alias in settings.TASK_SHARDS
+            )
+            sequence.create(pk=1, last_id=largest + count)
+        last_id = sequence.values_list("last_id", flat=True).get(pk=1)
+    return list(range(last_id - count + 1, last_id + 1))
+
+
+@receiver(pre_save, sender=Task)
+def assign_task_id(sender, instance, raw=False, **kwargs):
+    """
+    Signal for task saves which gives new tasks an id of the shared sequence
+    when there are several shards
+    """
+    if instance.pk is None and not raw and len(settings.TASK_SHARDS) > 1:
+        instance.pk = allocate_task_ids(1)[0]
+
+
+class TaskShardRouter:
+    """
+    Database router which writes tasks to the shard of their profile and
+    keeps every other model on the default database
+    """
+
+    def db_for_read(self, model, **hints):
+        return self._db_for(model, hints.get("instance"))
+
+    def db_for_write(self, model, **hints):
+        return self._db_for(model, hints.get("instance"))
+
+    def _db_for(self, model, instance):
+        if model is Task:
+            if isinstance(instance, Task) and instance.user_id:
+                return shard_for(instance.user_id)
+            if isinstance(instance, Profile):
+                return shard_for(instance.pk)
+            return None
+        if isinstance(instance, Task):
+            # related objects of a task (its profile) are not sharded
+            return DEFAULT_DB_ALIAS
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if {type(obj1), type(obj2)} == {Task, Profile}:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return None
+
+
+@receiver(pre_delete, sender=Profile)
+def delete_sharded_tasks(sender, instance, **kwargs):
+    """
+    Signal for profile deletion which deletes its tasks on other shards,
+    the cascade of the default database only reaches its own tasks
+    """
+    alias = shard_for(instance.pk)
+    if alias != kwargs.get("using", DEFAULT_DB_ALIAS):
+        with events.suppressed():
+            Task.objects.using(alias).filter(user_id=instance.pk).delete()
+    cache.delete(PLACEMENT_KEY % instance.pk)
+
+
+def _copy_rows(profile, rows, target):
+    """
+    Insert task rows (values() dicts) of profile into target keeping ids,
+    order and dates, replacing the profile's earlier copies. Ids another
+    profile has on target (from before ids were unique across the shards)
+    are refused, nothing is overwritten
+    """
+    ids = [row["id"] for row in rows]
+    with transaction.atomic(using=target):
+        tasks = Task.objects.using(target)
+        if tasks.filter(id__in=ids).exclude(user=profile).exists():
+            raise ValueError("task ids of %s are taken on %s" % (profile, target))
+        tasks.filter(user=profile, id__in=ids).delete()
+        Task.objects.using(target).bulk_create([Task(**row) for row in rows])
+        # bulk_create stamps auto_now(_add) fields, put the originals back
+        Task.objects.using(target).bulk_update(
+            [Task(**row) for row in rows], ["created_date", "updated_date"]
+        )
+
+
+def _sync_tasks(profile, source, target, since, copied):
+    """
+    Bring target up to date with the writes made on source since a moment.
+    copied is the set of ids copied from source so far, only those are
+    deleted from target when they're gone from source, tasks created on
+    target once it's the profile's shard are left alone
+    """
+    rows = list(
+        Task.objects.using(source)
+        .filter(user=profile, updated_date__gte=since)
+        .values(*TASK_FIELDS)
+    )
+    if rows:
+        _copy_rows(profile, rows, target)
+        copied.update(row["id"] for row in rows)
+    # tasks deleted on source meanwhile
+    source_ids = Task.objects.using(source).filter(user=profile)
+    deleted = copied - set(source_ids.values_list("id", flat=True))
+    if deleted:
+        Task.objects.using(target).filter(user=profile, id__in=deleted).delete()
+        copied -= deleted
+
+
+# the copies and deletions aren't changes of the tasks, don't publish them
+@events.suppressed()
+def move_tasks(profile, target, batch_size=500, grace=PLACEMENT_TIMEOUT):
+    """
+    Move the tasks of a profile to another shard while it keeps working:
+    copy in batches, catch up with the writes made meanwhile while holding
+    the write lock of the source and switch the placement, then after a grace
+    period for requests which still resolved the old shard sync once more
+    and remove the tasks from the source. Processes cache the placement for
+    PLACEMENT_TIMEOUT, a shorter grace is only safe with a shared cache
+    (redis) where they all see the switch at once. Returns the number of
+    moved tasks
+    """
+    if target not in settings.TASK_SHARDS:
+        raise ValueError("%s is not one of TASK_SHARDS" % target)
+    source = shard_for(profile.pk)
+    if source == target:
+        return 0
+
+    started = timezone.now()
+    tasks = Task.objects.using(source).filter(user=profile).order_by("id")
+    last_id = 0
+    copied = set()
+    while True:
+        rows = list(tasks.filter(id__gt=last_id).values(*TASK_FIELDS)[:batch_size])
+        if not rows:
+            break
+        _copy_rows(profile, rows, target)
+        copied.update(row["id"] for row in rows)
+        last_id = rows[-1]["id"]
+
+    with transaction.atomic(using=source):
+        switched = timezone.now()
+        _sync_tasks(profile, source, target, since=started, copied=copied)
+        if target == hash_shard(profile.pk):
+            ShardPlacement.objects.filter(profile=profile).delete()
+        else:
+            ShardPlacement.objects.update_or_create(
+                profile=profile, defaults={"database": target}
+            )
+        cache.set(PLACEMENT_KEY % profile.pk, target, PLACEMENT_TIMEOUT)
+
+    time.sleep(grace)
+    _sync_tasks(profile, source, target, since=switched, copied=copied)
+    Task.objects.using(source).filter(user=profile).delete()
+    # delta syncs read the tombstones from the shard of the tasks
+    tombstones = TaskTombstone.objects.using(source).filter(user=profile)
+    TaskTombstone.objects.using(target).bulk_create(
+        [
+            TaskTombstone(**row)
+            for row in tombstones.values("task_id", "user_id", "deleted_date")
+        ]
+    )
+    tombstones.delete()
+    return Task.objects.using(target).filter(user=profile).count()
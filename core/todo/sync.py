@@ -0,0 +1,161 @@
+"""
+Delta sync of a profile's tasks.
+
+Changes are the tasks updated (or created) and the tombstones of the tasks
+deleted since a cursor, read in (date, kind, id) order from the
+(user, updated_date, id) and (user, deleted_date, id) indexes. The cursor is
+the position of the last change returned, so a sync reads only the changes
+whatever the number of tasks and pages of changes never skip or repeat rows
+sharing a date.
+
+Dates are stamped by the writing process before the write commits (it may
+wait on the sqlite lock) and by its own clock, a change can commit behind
+the cursor of a sync which already passed its date. The cursor ending a
+sync (no more pages) is kept TASK_SYNC_OVERLAP seconds back, the next sync
+reads the changes of those seconds again and clients apply them by id,
+skipping tasks whose updated_date they already have.
+"""
+
+import heapq
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from accounts.models import Profile
+from todo import events
+from todo.models import Task, TaskTombstone
+from todo.sharding import shard_for
+
+TASK, TOMBSTONE = 0, 1
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+class CursorExpired(Exception):
+    """
+    The cursor is older than the tombstones kept, the client has to sync
+    from scratch
+    """
+
+
+def encode_cursor(position):
+    date, kind, pk = position
+    return "%d.%d.%d" % ((date - EPOCH) // timedelta(microseconds=1), kind, pk)
+
+
+def decode_cursor(value):
+    """
+    Position of a cursor, ValueError for malformed ones
+    """
+    micros, kind, pk = (int(part) for part in value.split("."))
+    if kind not in (TASK, TOMBSTONE):
+        raise ValueError("unknown kind %s" % kind)
+    return EPOCH + timedelta(microseconds=micros), kind, pk
+
+
+def _after(field, date, pk=None):
+    """
+    Rows past a (date, id) position, all the rows of date when pk is None
+    """
+    if pk is None:
+        return Q(**{field + "__gte": date})
+    return Q(**{field + "__gt": date}) | Q(**{field: date, "id__gt": pk})
+
+
+def changes_since(profile, cursor=None, limit=500):
+    """
+    Return (tasks, deleted task ids, cursor, has_more) for the changes made
+    after cursor, every task when cursor is None
+    """
+    # read from the primary, a lagging replica would let the cursor pass
+    # changes it hasn't received yet
+    alias = shard_for(profile.pk)
+    tasks = Task.objects.using(alias).filter(user=profile)
+    tombstones = TaskTombstone.objects.using(alias).filter(user=profile)
+    if cursor is None:
+        tombstones = tombstones.none()
+    else:
+        date, kind, pk = cursor
+        expired = timezone.now() - timedelta(days=settings.TASK_TOMBSTONE_DAYS)
+        # cursors at the epoch come from syncs which found nothing, there
+        # are no deletions they could have missed
+        if EPOCH < date < expired:
+            raise CursorExpired()
+        if kind == TASK:
+            tasks = tasks.filter(_after("updated_date", date, pk))
+            tombstones = tombstones.filter(_after("deleted_date", date))
+        else:
+            tasks = tasks.filter(updated_date__gt=date)
+            tombstones = tombstones.filter(_after("deleted_date", date, pk))
+
+    changed = [
+        ((task.updated_date, TASK, task.pk), task)
+        for task in tasks.order_by("updated_date", "id")[: limit + 1]
+    ]
+    deleted = [
+        ((deleted_date, TOMBSTONE, pk), task_id)
+        for deleted_date, pk, task_id in tombstones.order_by(
+            "deleted_date", "id"
+        ).values_list("deleted_date", "id", "task_id")[: limit + 1]
+    ]
+    page = list(heapq.merge(changed, deleted, key=lambda change: change[0]))
+    has_more = len(page) > limit
+    page = page[:limit]
+    if page:
+        cursor = page[-1][0]
+    if cursor is not None and not has_more:
+        overlap = timezone.now() - timedelta(seconds=settings.TASK_SYNC_OVERLAP)
+        cursor = min(cursor, (overlap, TASK, 0))
+    return (
+        [task for position, task in page if position[1] == TASK],
+        [task_id for position, task_id in page if position[1] == TOMBSTONE],
+        encode_cursor(cursor or (EPOCH, TASK, 0)),
+        has_more,
+    )
+
+
+def record_tombstones(rows, using):
+    """
+    Record the deletion of (id, profile id) task rows
+    """
+    TaskTombstone.objects.using(using).bulk_create(
+        [
+            TaskTombstone(task_id=task_id, user_id=profile_id)
+            for task_id, profile_id in rows
+            if profile_id
+        ]
+    )
+
+
+@receiver(post_delete, sender=Task)
+def record_task_tombstone(sender, instance, using, **kwargs):
+    if not events.is_suppressed():
+        record_tombstones([(instance.pk, instance.user_id)], using)
+
+
+@receiver(post_delete, sender=Profile)
+def delete_profile_tombstones(sender, instance, **kwargs):
+    """
+    Signal for profile deletion which removes its tombstones, they are not
+    reached by the deletion cascade
+    """
+    for alias in settings.TASK_SHARDS:
+        TaskTombstone.objects.using(alias).filter(user_id=instance.pk).delete()
+
+
+def prune_tombstones():
+    """
+    Delete the tombstones older than TASK_TOMBSTONE_DAYS, returns how many
+    """
+    expired = timezone.now() - timedelta(days=settings.TASK_TOMBSTONE_DAYS)
+    pruned = 0
+    for alias in settings.TASK_SHARDS:
+        pruned += (
+            TaskTombstone.objects.using(alias)
+            .filter(deleted_date__lt=expired)
+            .delete()[0]
+        )
+    return pruned
@@ -1,7 +1,135 @@
 from celery import shared_task
-from .models import Task
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from todo import bulk, events, imports, sync
+from .models import Task, Job
+
+
+class JobCancelled(Exception):
+    pass
+
+
+def save_progress(job, processed, result):
+    """
+    Save the progress of a job after a batch, stopping it with JobCancelled
+    when it was cancelled meanwhile
+    """
+    Job.objects.filter(pk=job.pk).update(
+        processed=processed, result=result, updated_date=timezone.now()
+    )
+    if job.is_cancel_requested():
+        raise JobCancelled
+
+
+def start_job(job):
+    """
+    Mark a job running, or cancelled when it was cancelled before it
+    started. Returns whether it should run
+    """
+    status = Job.CANCELLED if job.cancel_requested else Job.RUNNING
+    Job.objects.filter(pk=job.pk).update(status=status, updated_date=timezone.now())
+    return status == Job.RUNNING
 
 
 @shared_task
 def clear_done_tasks():
-    Task.objects.filter(complete=True).delete()
+    for alias in settings.TASK_SHARDS:
+        done = Task.objects.using(alias).filter(complete=True)
+        # the write lock of the transaction keeps the rows and the deletion
+        # in step, owners get one event instead of one per deleted task and
+        # the tombstones are inserted at once
+        with transaction.atomic(using=alias), events.suppressed():
+            rows = list(done.values_list("id", "user_id"))
+            done.delete()
+            sync.record_tombstones(rows, using=alias)
+            events.publish_deleted(rows, using=alias)
+
+
+@shared_task
+def prune_tombstones():
+    return sync.prune_tombstones()
+
+
+@shared_task
+def import_tasks(job_id):
+    """
+    Import the uploaded file of an import job, saving its progress after
+    every batch
+    """
+    job = Job.objects.select_related("profile").get(pk=job_id)
+    if not start_job(job):
+        job.file.delete(save=False)
+        Job.objects.filter(pk=job.pk).update(file="")
+        return None
+
+    try:
+        with job.file.open("rb") as lines:
+            result = imports.import_tasks(
+                job.profile,
+                lines,
+                job.params["type"],
+                lambda processed, result: save_progress(job, processed, result),
+            )
+    except JobCancelled:
+        # the batches imported until then are kept
+        Job.objects.filter(pk=job.pk).update(
+            status=Job.CANCELLED, file="", updated_date=timezone.now()
+        )
+        return None
+    except Exception as e:
+        Job.objects.filter(pk=job.pk).update(
+            status=Job.FAILED, result={"error": str(e)}, updated_date=timezone.now()
+        )
+        raise
+    finally:
+        job.file.delete(save=False)
+    Job.objects.filter(pk=job.pk).update(
+        status=Job.DONE,
+        processed=job.total,
+        result=result,
+        file="",
+        updated_date=timezone.now(),
+    )
+    return result
+
+
+@shared_task
+def bulk_tasks(job_id):
+    """
+    Run the operation of a bulk job on the tasks matching its filter,
+    saving its progress after every batch
+    """
+    job = Job.objects.select_related("profile").get(pk=job_id)
+    if not start_job(job):
+        return None
+    operation, spec = job.params["operation"], job.params["filter"]
+    # tasks created or changed since the job was queued count too
+    total = bulk.filter_tasks(job.profile, spec).count()
+    Job.objects.filter(pk=job.pk).update(total=total)
+
+    try:
+        result = bulk.run_operation(
+            job.profile,
+            operation,
+            spec,
+            lambda processed, result: save_progress(job, processed, result),
+        )
+    except JobCancelled:
+        # the batches done until then are kept
+        Job.objects.filter(pk=job.pk).update(
+            status=Job.CANCELLED, updated_date=timezone.now()
+        )
+        return None
+    except Exception as e:
+        Job.objects.filter(pk=job.pk).update(
+            status=Job.FAILED, result={"error": str(e)}, updated_date=timezone.now()
+        )
+        raise
+    Job.objects.filter(pk=job.pk).update(
+        status=Job.DONE,
+        processed=total,
+        result=result,
+        updated_date=timezone.now(),
+    )
+    return result
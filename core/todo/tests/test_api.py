@@ -412,3 +412,59 @@ class TestTaskFilteringAndSearch:
         assert "results" in response.data
         assert response.data["total_objects"] == 15
         assert response.data["total_pages"] > 1
+
+
+@pytest.mark.django_db
+class TestSparseFieldsets:
+    """Test suite for ?fields= and the columns read by the task API"""
+
+    url = reverse("todo:api-v1:task-list")
+
+    def test_list_fields(self, authenticated_client, task):
+        """Test that only the requested fields are returned"""
+        response = authenticated_client.get(self.url, {"fields": "id,title,complete"})
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["results"] == [
+            {"id": task.id, "title": "Test Task", "complete": False}
+        ]
+
+    def test_retrieve_fields(self, authenticated_client, task):
+        url = reverse("todo:api-v1:task-detail", kwargs={"pk": task.pk})
+        response = authenticated_client.get(url, {"fields": "description"})
+        assert response.data == {"description": task.description}
+
+    def test_requested_description_in_list(self, authenticated_client, task):
+        """Test that lists return the description when it's asked for"""
+        response = authenticated_client.get(self.url, {"fields": "id,description"})
+        assert response.data["results"][0]["description"] == task.description
+
+    def test_unknown_field(self, authenticated_client):
+        response = authenticated_client.get(self.url, {"fields": "id,password"})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "password" in response.data["fields"][0]
+
+    def test_sql_columns(self, authenticated_client, task, django_assert_num_queries):
+        """Test that the SQL reads only the columns of the requested fields"""
+        with django_assert_num_queries(4) as context:
+            authenticated_client.get(self.url, {"fields": "id,title"})
+        sql = context.captured_queries[-1]["sql"]
+        assert '"title"' in sql
+        assert '"complete"' not in sql and '"description"' not in sql
+
+    def test_list_defers_description(
+        self, authenticated_client, task, django_assert_num_queries
+    ):
+        """Test that lists compute the snippet in SQL, not from description"""
+        with django_assert_num_queries(4) as context:
+            response = authenticated_client.get(self.url)
+        sql = context.captured_queries[-1]["sql"]
+        assert "SUBSTR" in sql.upper()
+        assert '"todo_task"."description"' not in sql.split("SUBSTR")[0]
+        assert response.data["results"][0]["snippet"] == task.description[:5]
+
+    def test_writes_ignore_fields(self, authenticated_client, task):
+        url = reverse("todo:api-v1:task-detail", kwargs={"pk": task.pk})
+        response = authenticated_client.patch(
+            url + "?fields=id", {"title": "Renamed"}, format="json"
+        )
+        assert response.data["title"] == "Renamed"
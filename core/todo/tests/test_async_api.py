@@ -0,0 +1,129 @@
+import pytest
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from accounts.models import User
+from todo.models import Task
+
+
+@pytest.fixture
+def user(db):
+    """Create a verified user for testing"""
+    return User.objects.create_user(
+        email="testuser@example.com", password="testpass123", is_verified=True
+    )
+
+
+@pytest.fixture
+def profile(user):
+    return user.profile
+
+
+@pytest.fixture
+def authenticated_client(user):
+    """Create a token authenticated API client"""
+    client = APIClient()
+    token, _ = Token.objects.get_or_create(user=user)
+    client.credentials(HTTP_AUTHORIZATION="Token " + token.key)
+    return client
+
+
+@pytest.fixture
+def task(profile):
+    return Task.objects.create(
+        user=profile, title="Test Task", description="This is a test task description"
+    )
+
+
+@pytest.fixture
+def completed_task(profile):
+    return Task.objects.create(user=profile, title="Completed Task", complete=True)
+
+
+@pytest.mark.django_db
+class TestAsyncTaskApi:
+    """Test suite for the async task endpoints"""
+
+    def test_list_unauthenticated(self, client):
+        """Test that unauthenticated users get a 401"""
+        response = client.get(reverse("todo:api-v1:async-task-list"))
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_list_matches_sync_api(self, authenticated_client, task, completed_task):
+        """Test that the async list returns the same payload as the viewset"""
+        sync = authenticated_client.get(reverse("todo:api-v1:task-list"))
+        response = authenticated_client.get(reverse("todo:api-v1:async-task-list"))
+        assert response.status_code == status.HTTP_200_OK
+        data, expected = response.json(), sync.json()
+        # absolute_url is built relative to the request path
+        for task_data in data["results"] + expected["results"]:
+            task_data.pop("absolute_url")
+        assert data == expected
+        assert data["total_objects"] == 2
+
+    def test_list_filters(self, authenticated_client, task, completed_task):
+        """Test that the list supports the filters of the viewset"""
+        url = reverse("todo:api-v1:async-task-list")
+        response = authenticated_client.get(url, {"complete": "true"})
+        assert [t["id"] for t in response.json()["results"]] == [completed_task.id]
+        response = authenticated_client.get(url, {"search": "description"})
+        assert [t["id"] for t in response.json()["results"]] == [task.id]
+
+    def test_retrieve_matches_sync_api(self, authenticated_client, task):
+        """Test that the async retrieve returns the same payload as the viewset"""
+        sync = authenticated_client.get(
+            reverse("todo:api-v1:task-detail", kwargs={"pk": task.pk})
+        )
+        url = reverse("todo:api-v1:async-task-detail", kwargs={"pk": task.pk})
+        response = authenticated_client.get(url)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == sync.json()
+
+    def test_retrieve_other_user(self, authenticated_client):
+        """Test that users cannot retrieve other users' tasks"""
+        other = User.objects.create_user(email="other@example.com", password="x")
+        other_task = Task.objects.create(user=other.profile, title="Other Task")
+        url = reverse("todo:api-v1:async-task-detail", kwargs={"pk": other_task.pk})
+        response = authenticated_client.get(url)
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_create(self, authenticated_client, profile):
+        """Test that tasks are created for the authenticated user"""
+        url = reverse("todo:api-v1:async-task-list")
+        response = authenticated_client.post(
+            url, {"title": "New Task", "description": "New"}, format="json"
+        )
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.json()["user"] == profile.id
+        assert Task.objects.get(title="New Task").description == "New"
+
+    def test_create_invalid(self, authenticated_client):
+        """Test that validation errors come back like DRF's"""
+        url = reverse("todo:api-v1:async-task-list")
+        response = authenticated_client.post(url, {}, format="json")
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "title" in response.json()
+
+    def test_toggle(self, authenticated_client, task):
+        """Test that toggle flips the completion status"""
+        url = reverse("todo:api-v1:async-task-toggle", kwargs={"pk": task.pk})
+        response = authenticated_client.post(url)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["complete"] is True
+        task.refresh_from_db()
+        assert task.complete is True
+
+    def test_toggle_requires_post(self, authenticated_client, task):
+        """Test that other methods are rejected"""
+        url = reverse("todo:api-v1:async-task-toggle", kwargs={"pk": task.pk})
+        response = authenticated_client.get(url)
+        assert response.status_code == status.HTTP_405_METHOD_NOT_ALLOWED
+
+    def test_session_auth_enforces_csrf(self, user, task):
+        """Test that session authenticated writes still need a CSRF token"""
+        client = APIClient(enforce_csrf_checks=True)
+        client.force_login(user)
+        url = reverse("todo:api-v1:async-task-toggle", kwargs={"pk": task.pk})
+        response = client.post(url)
+        assert response.status_code == status.HTTP_403_FORBIDDEN
@@ -0,0 +1,194 @@
+import pytest
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from accounts.models import User
+from todo import bulk, counters, tasks
+from todo.models import Task, TaskTombstone, Job
+
+
+@pytest.fixture
+def user(db):
+    """Create a verified user for testing"""
+    return User.objects.create_user(
+        email="testuser@example.com", password="testpass123", is_verified=True
+    )
+
+
+@pytest.fixture
+def profile(user):
+    return user.profile
+
+
+@pytest.fixture
+def api_client(user):
+    client = APIClient()
+    token, _ = Token.objects.get_or_create(user=user)
+    client.credentials(HTTP_AUTHORIZATION="Token " + token.key)
+    return client
+
+
+@pytest.fixture
+def task_list(profile):
+    """Five tasks, the even ones complete, and a task of another user"""
+    other = User.objects.create_user(email="other@example.com", password="x")
+    Task.objects.create(user=other.profile, title="Report of other")
+    return [
+        Task.objects.create(
+            user=profile,
+            title="Report %s" % i if i < 3 else "Chore",
+            complete=not i % 2,
+        )
+        for i in range(5)
+    ]
+
+
+@pytest.fixture
+def run_bulk(api_client, django_capture_on_commit_callbacks):
+    """POST a bulk operation and run its job, returns the response"""
+    url = reverse("todo:api-v1:task-bulk")
+
+    def run(data):
+        with django_capture_on_commit_callbacks(execute=True):
+            return api_client.post(url, data, format="json")
+
+    return run
+
+
+@pytest.mark.django_db
+class TestBulkOperations:
+    """Test suite for the bulk operations on the tasks matching a filter"""
+
+    def test_complete_matching_tasks(
+        self, monkeypatch, api_client, run_bulk, task_list
+    ):
+        """Test that the tasks of the search are completed batch by batch"""
+        monkeypatch.setattr(bulk, "CHUNK_SIZE", 2)
+        updates = []
+        complete = bulk._complete
+        monkeypatch.setattr(
+            bulk, "_complete", lambda *args: updates.append(1) or complete(*args)
+        )
+        response = run_bulk(
+            {"operation": "complete", "filter": {"search": "report", "complete": False}}
+        )
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        assert response.data["kind"] == "bulk"
+        assert response.data["total"] == 1
+
+        response = api_client.get(response["Location"])
+        assert response.data["status"] == Job.DONE
+        assert response.data["progress"] == 100
+        assert response.data["result"] == {"operation": "complete", "updated": 1}
+        assert updates == [1]
+        assert Task.objects.get(pk=task_list[1].pk).complete is True
+        assert Task.objects.get(pk=task_list[3].pk).complete is False
+        assert Task.objects.get(title="Report of other").complete is False
+
+    def test_every_task_without_filter(self, monkeypatch, run_bulk, profile, task_list):
+        monkeypatch.setattr(bulk, "CHUNK_SIZE", 2)
+        response = run_bulk({"operation": "incomplete"})
+        job = Job.objects.get(pk=response.data["id"])
+        assert job.result["updated"] == 5
+        assert job.processed == job.total == 5
+        assert not Task.objects.filter(user=profile, complete=True).exists()
+
+    def test_delete_records_tombstones(self, monkeypatch, run_bulk, profile, task_list):
+        """Test that deleted tasks are reported to the syncing clients"""
+        monkeypatch.setattr(bulk, "CHUNK_SIZE", 2)
+        response = run_bulk({"operation": "delete", "filter": {"complete": True}})
+        job = Job.objects.get(pk=response.data["id"])
+        assert job.result == {"operation": "delete", "deleted": 3}
+        assert list(Task.objects.filter(user=profile)) == task_list[1::2]
+        tombstones = TaskTombstone.objects.values_list("task_id", flat=True)
+        assert sorted(tombstones) == [task.pk for task in task_list[::2]]
+
+    def test_counters_are_invalidated(self, run_bulk, profile, task_list):
+        """Test that the cached counts see updates which send no signals"""
+        assert counters.task_counts(profile)["complete"] == 3
+        run_bulk({"operation": "complete"})
+        assert counters.task_counts(profile) == {
+            "total": 5,
+            "complete": 5,
+            "pending": 0,
+        }
+
+    def test_queries_dont_grow_with_the_tasks(
+        self, profile, django_assert_max_num_queries
+    ):
+        """Test that tasks are changed with set-based updates"""
+        Task.objects.bulk_create(
+            Task(user=profile, title="Task %s" % i, _order=i) for i in range(200)
+        )
+        job = Job.objects.create(
+            profile=profile,
+            kind="bulk",
+            params={"operation": "complete", "filter": {}},
+        )
+        with django_assert_max_num_queries(20):
+            tasks.bulk_tasks(job.pk)
+        assert Task.objects.filter(complete=True).count() == 200
+
+    @pytest.mark.parametrize(
+        "data",
+        [
+            {"operation": "archive"},
+            {"operation": "delete", "filter": {"title": "x"}},
+            {"operation": "delete", "filter": {"complete": "maybe"}},
+        ],
+    )
+    def test_invalid_operations(self, api_client, task_list, data):
+        url = reverse("todo:api-v1:task-bulk")
+        response = api_client.post(url, data, format="json")
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert not Job.objects.exists()
+        assert Task.objects.count() == 6
+
+
+@pytest.mark.django_db
+class TestJobCancellation:
+    """Test suite for the cancellation of jobs"""
+
+    def job(self, profile, operation="delete"):
+        return Job.objects.create(
+            profile=profile,
+            kind="bulk",
+            params={"operation": operation, "filter": {}},
+        )
+
+    def cancel(self, api_client, job):
+        return api_client.post(reverse("todo:api-v1:job-cancel", args=[job.pk]))
+
+    def test_cancelled_before_it_runs(self, api_client, profile, task_list):
+        job = self.job(profile)
+        response = self.cancel(api_client, job)
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        assert response.data["cancel_requested"] is True
+        tasks.bulk_tasks(job.pk)
+        job.refresh_from_db()
+        assert job.status == Job.CANCELLED
+        assert Task.objects.filter(user=profile).count() == 5
+
+    def test_stops_at_the_next_batch(self, monkeypatch, profile, task_list):
+        """Test that a running job keeps the batches done before its cancel"""
+        monkeypatch.setattr(bulk, "CHUNK_SIZE", 2)
+        monkeypatch.setattr(Job, "is_cancel_requested", lambda job: True)
+        job = self.job(profile, "complete")
+        tasks.bulk_tasks(job.pk)
+        job.refresh_from_db()
+        assert job.status == Job.CANCELLED
+        assert job.processed == 2
+        assert job.result["updated"] == 2
+        assert Task.objects.filter(user=profile, complete=True).count() == 4
+
+    def test_finished_jobs_cant_be_cancelled(self, api_client, profile):
+        job = self.job(profile)
+        Job.objects.filter(pk=job.pk).update(status=Job.DONE)
+        response = self.cancel(api_client, job)
+        assert response.status_code == status.HTTP_409_CONFLICT
+
+    def test_jobs_of_other_users(self, api_client):
+        other = User.objects.create_user(email="other@example.com", password="x")
+        response = self.cancel(api_client, self.job(other.profile))
+        assert response.status_code == status.HTTP_404_NOT_FOUND
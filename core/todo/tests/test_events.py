@@ -0,0 +1,273 @@
+import asyncio
+import json
+import threading
+
+import pytest
+from asgiref.sync import async_to_sync, sync_to_async
+from django.core import signals
+from django.db import close_old_connections, transaction
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from accounts.models import User
+from todo import events
+from todo.api.v1.sse import task_events
+from todo.models import Task
+from todo.tasks import clear_done_tasks
+
+
+class RecordingBroker:
+    """Broker which keeps the published messages"""
+
+    def __init__(self):
+        self.messages = []
+
+    def publish(self, channel, message):
+        self.messages.append((channel, message))
+
+
+@pytest.fixture
+def user(db):
+    """Create a verified user for testing"""
+    return User.objects.create_user(
+        email="testuser@example.com", password="testpass123", is_verified=True
+    )
+
+
+@pytest.fixture
+def profile(user):
+    return user.profile
+
+
+@pytest.fixture
+def api_client(user):
+    client = APIClient()
+    token, _ = Token.objects.get_or_create(user=user)
+    client.credentials(HTTP_AUTHORIZATION="Token " + token.key)
+    return client
+
+
+@pytest.fixture
+def broker(settings):
+    settings.TASK_EVENTS_BROKER = "todo.tests.test_events.RecordingBroker"
+    broker = events.get_broker()
+    broker.messages.clear()
+    return broker
+
+
+@pytest.fixture
+def commit(django_capture_on_commit_callbacks):
+    """Run the on commit callbacks (the publishing) of the writes of a block"""
+    return lambda: django_capture_on_commit_callbacks(execute=True)
+
+
+def published(broker):
+    """(channel, event, data) of the published messages"""
+    result = []
+    for channel, message in broker.messages:
+        event, data = message.splitlines()[:2]
+        result.append((channel, event[7:], json.loads(data[6:])))
+    return result
+
+
+@pytest.mark.django_db
+class TestTaskEvents:
+    """Test suite for the events published by task writes"""
+
+    def test_created_updated_deleted(self, broker, commit, profile):
+        """Test that single task writes publish to the owner's channel"""
+        with commit():
+            task = Task.objects.create(user=profile, title="New Task")
+        with commit():
+            task = Task.objects.get(pk=task.pk)
+            task.title = "Renamed Task"
+            task.save()
+        task_id = task.id
+        with commit():
+            task.delete()
+        assert [(c, e) for c, e, _ in published(broker)] == [
+            (profile.pk, "created"),
+            (profile.pk, "updated"),
+            (profile.pk, "deleted"),
+        ]
+        assert published(broker)[1][2]["title"] == "Renamed Task"
+        assert published(broker)[2][2] == {"ids": [task_id]}
+
+    def test_toggled(self, broker, commit, api_client, profile):
+        """Test that changing complete publishes a toggled event"""
+        task = Task.objects.create(user=profile, title="Task")
+        url = reverse("todo:api-v1:async-task-toggle", kwargs={"pk": task.pk})
+        with commit():
+            api_client.post(url)
+        channel, event, data = published(broker)[-1]
+        assert (channel, event) == (profile.pk, "toggled")
+        assert (data["id"], data["complete"]) == (task.id, True)
+
+    def test_nothing_published_on_rollback(self, broker, profile):
+        """Test that events are only published once the write commits"""
+        with pytest.raises(RuntimeError):
+            with transaction.atomic():
+                Task.objects.create(user=profile, title="Rolled Back Task")
+                raise RuntimeError
+        assert broker.messages == []
+
+    def test_redis_down_does_not_fail_the_write(
+        self, monkeypatch, settings, commit, profile
+    ):
+        """Test that a committed write succeeds when redis can't be reached"""
+        monkeypatch.setattr(events, "_brokers", {})
+        settings.TASK_EVENTS_BROKER = "todo.events.RedisBroker"
+        settings.TASK_EVENTS_REDIS_URL = "redis://127.0.0.1:1/0"
+        with commit():
+            task = Task.objects.create(user=profile, title="Unpublished Task")
+        assert Task.objects.filter(pk=task.pk).exists()
+
+    def test_clear_done_tasks_publishes_per_owner(self, broker, commit, profile):
+        """Test that the bulk deletion publishes one event per owner"""
+        done = [
+            Task.objects.create(user=profile, title="Task %s" % i, complete=True)
+            for i in range(3)
+        ]
+        Task.objects.create(user=profile, title="Open Task")
+        broker.messages.clear()
+        with commit():
+            clear_done_tasks()
+        assert published(broker) == [
+            (profile.pk, "deleted", {"ids": [task.id for task in done]})
+        ]
+
+
+class TestInMemoryBroker:
+    """Test suite for the single process pub/sub"""
+
+    def test_publish_from_another_thread(self):
+        """Test that writes in worker threads reach the subscribers"""
+        broker = events.InMemoryBroker()
+
+        async def run():
+            async with broker.subscribe(1) as subscription:
+                thread = threading.Thread(target=broker.publish, args=(1, "message"))
+                thread.start()
+                thread.join()
+                broker.publish(2, "other channel")
+                return await asyncio.wait_for(subscription.get(), 1)
+
+        assert asyncio.run(run()) == "message"
+        assert broker._subscriptions == {}
+
+    def test_slow_subscriber_is_told_to_resync(self):
+        """Test that a subscriber which falls behind gets a resync event"""
+        broker = events.InMemoryBroker()
+
+        async def run():
+            async with broker.subscribe(1) as subscription:
+                for i in range(events.QUEUE_SIZE + 1):
+                    broker.publish(1, "message %s" % i)
+                await asyncio.sleep(0)
+                return [await subscription.get()], subscription.queue.qsize()
+
+        assert asyncio.run(run()) == ([events.RESYNC], 0)
+
+
+@pytest.fixture
+def keep_test_connection():
+    """The test database lives in a transaction, don't let the stream close it"""
+    signals.request_finished.disconnect(close_old_connections)
+    yield
+    signals.request_finished.connect(close_old_connections)
+
+
+def scope(method="GET", headers=()):
+    return {
+        "type": "http",
+        "method": method,
+        "path": "/api/v1/task/events/",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"testserver")] + list(headers),
+    }
+
+
+def stream(scope, write=None, app=task_events):
+    """
+    Run the stream app until it sent its preamble, make the write, wait for
+    its event and disconnect. Returns the sent messages
+    """
+
+    async def run():
+        sent, inbox = [], asyncio.Queue()
+
+        async def receive():
+            return await inbox.get()
+
+        async def send(message):
+            sent.append(message)
+
+        async def wait_for(count):
+            for _ in range(100):
+                if len(sent) >= count or task.done():
+                    return
+                await asyncio.sleep(0.01)
+
+        task = asyncio.ensure_future(app(scope, receive, send))
+        await wait_for(2)
+        if write is not None:
+            await sync_to_async(write)()
+            await wait_for(3)
+        inbox.put_nowait({"type": "http.disconnect"})
+        await asyncio.wait_for(task, 1)
+        return sent
+
+    return async_to_sync(run)()
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("keep_test_connection")
+class TestTaskEventStream:
+    """Test suite for the SSE endpoint"""
+
+    def test_unauthenticated(self):
+        """Test that anonymous requests get a 401"""
+        sent = stream(scope())
+        assert sent[0]["status"] == 401
+
+    def test_served_by_asgi_application(self):
+        """Test that core.asgi routes the stream path to the SSE app"""
+        from core.asgi import application
+
+        sent = stream(scope(), app=application)
+        assert sent[0]["status"] == 401
+        assert (b"content-type", b"application/json") in sent[0]["headers"]
+
+    def test_method_not_allowed(self, user):
+        sent = stream(scope(method="POST"))
+        assert sent[0]["status"] == 405
+
+    def test_token_stream(self, settings, user, profile, commit):
+        """Test that a token authenticated stream receives the user's events"""
+        settings.TASK_EVENTS_BROKER = "todo.events.InMemoryBroker"
+        token, _ = Token.objects.get_or_create(user=user)
+        other = User.objects.create_user(email="other@example.com", password="x")
+
+        def write():
+            with commit():
+                Task.objects.create(user=other.profile, title="Other Task")
+                Task.objects.create(user=profile, title="Streamed Task")
+
+        sent = stream(
+            scope(headers=[(b"authorization", b"Token " + token.key.encode())]),
+            write,
+        )
+        assert sent[0]["status"] == 200
+        assert (b"content-type", b"text/event-stream") in sent[0]["headers"]
+        body = b"".join(message["body"] for message in sent[1:]).decode()
+        assert body.startswith("retry: 3000\n\nevent: created\ndata: {")
+        assert "Streamed Task" in body
+        assert "Other Task" not in body
+
+    def test_session_stream(self, client, user):
+        """Test that EventSource requests authenticate with the session cookie"""
+        client.force_login(user)
+        cookie = "sessionid=%s" % client.cookies["sessionid"].value
+        sent = stream(scope(headers=[(b"cookie", cookie.encode())]))
+        assert sent[0]["status"] == 200
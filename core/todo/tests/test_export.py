@@ -0,0 +1,125 @@
+import csv
+import gzip
+import io
+import json
+
+import pytest
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from accounts.models import User
+from todo import exports
+from todo.models import Task
+
+
+@pytest.fixture
+def user(db):
+    """Create a verified user for testing"""
+    return User.objects.create_user(
+        email="testuser@example.com", password="testpass123", is_verified=True
+    )
+
+
+@pytest.fixture
+def profile(user):
+    return user.profile
+
+
+@pytest.fixture
+def api_client(user):
+    client = APIClient()
+    token, _ = Token.objects.get_or_create(user=user)
+    client.credentials(HTTP_AUTHORIZATION="Token " + token.key)
+    return client
+
+
+@pytest.fixture
+def tasks(profile):
+    Task.objects.bulk_create(
+        [
+            Task(
+                user=profile,
+                title="Task %s" % i,
+                description='with "quotes", commas\nand lines',
+                complete=i % 2 == 0,
+                _order=i,
+            )
+            for i in range(5)
+        ]
+    )
+    return list(Task.objects.filter(user=profile).order_by("id"))
+
+
+def content(response):
+    return b"".join(response.streaming_content)
+
+
+@pytest.mark.django_db
+class TestTaskExport:
+    """Test suite for the streaming task export"""
+
+    url = reverse("todo:api-v1:task-export")
+
+    def test_unauthenticated(self, client):
+        response = client.get(self.url)
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_csv(self, api_client, tasks):
+        """Test that the CSV export streams every task with a header row"""
+        response = api_client.get(self.url)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.streaming
+        assert response["Content-Type"] == "text/csv"
+        assert "tasks.csv" in response["Content-Disposition"]
+        rows = list(csv.reader(io.StringIO(content(response).decode())))
+        assert rows[0] == exports.EXPORT_FIELDS
+        assert [row[1] for row in rows[1:]] == [task.title for task in tasks]
+        assert rows[1][2] == tasks[0].description
+
+    def test_ndjson(self, api_client, tasks):
+        response = api_client.get(self.url, {"type": "ndjson"})
+        assert response["Content-Type"] == "application/x-ndjson"
+        lines = [json.loads(line) for line in content(response).splitlines()]
+        assert [line["id"] for line in lines] == [task.id for task in tasks]
+        assert lines[0]["complete"] is True
+
+    def test_gzip(self, api_client, tasks):
+        """Test that clients accepting gzip get it compressed on the fly"""
+        plain = content(api_client.get(self.url))
+        response = api_client.get(self.url, HTTP_ACCEPT_ENCODING="gzip, br")
+        assert response["Content-Encoding"] == "gzip"
+        assert "Accept-Encoding" in response["Vary"]
+        assert gzip.decompress(content(response)) == plain
+
+    def test_filters_and_ownership(self, api_client, tasks):
+        """Test that only the user's tasks matching the filters are exported"""
+        other = User.objects.create_user(email="other@example.com", password="x")
+        Task.objects.create(user=other.profile, title="Other Task")
+        response = api_client.get(self.url, {"type": "ndjson", "complete": "false"})
+        titles = [json.loads(line)["title"] for line in content(response).splitlines()]
+        assert titles == ["Task 1", "Task 3"]
+
+    def test_unknown_type(self, api_client):
+        response = api_client.get(self.url, {"type": "xml"})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+class TestExportTasks:
+    """Test suite for the export iterator"""
+
+    def test_rows_are_streamed(
+        self, monkeypatch, tasks, profile, django_assert_num_queries
+    ):
+        """Test that rows are read while the export is sent, not up front"""
+        monkeypatch.setattr(exports, "CHUNK_SIZE", 2)
+        monkeypatch.setattr(exports, "BUFFER_SIZE", 1)
+        with django_assert_num_queries(0):
+            chunks = exports.export_tasks(Task.objects.filter(user=profile), "ndjson")
+        with django_assert_num_queries(1):
+            assert len(list(chunks)) == len(tasks)
+
+    def test_buffered_joins_small_lines(self):
+        chunks = list(exports.buffered(["a" * 10] * 10, size=25))
+        assert [len(chunk) for chunk in chunks] == [30, 30, 30, 10]
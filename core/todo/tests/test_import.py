@@ -0,0 +1,170 @@
+import json
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from accounts.models import User
+from todo import imports
+from todo.models import Task, Job
+
+
+@pytest.fixture
+def user(db):
+    """Create a verified user for testing"""
+    return User.objects.create_user(
+        email="testuser@example.com", password="testpass123", is_verified=True
+    )
+
+
+@pytest.fixture
+def profile(user):
+    return user.profile
+
+
+@pytest.fixture
+def api_client(user):
+    client = APIClient()
+    token, _ = Token.objects.get_or_create(user=user)
+    client.credentials(HTTP_AUTHORIZATION="Token " + token.key)
+    return client
+
+
+def upload(name, content, content_type="application/octet-stream"):
+    return SimpleUploadedFile(name, content.encode(), content_type=content_type)
+
+
+CSV = (
+    "title,description,complete\n"
+    "First,plain,false\n"
+    'Second,"multi\nline, with commas",true\n'
+    ",missing title,false\n"
+    "Fourth,,maybe\n"
+)
+
+
+@pytest.mark.django_db
+class TestTaskImport:
+    """Test suite for the task import endpoint"""
+
+    url = reverse("todo:api-v1:task-import")
+
+    def test_unauthenticated(self, client):
+        response = client.post(self.url)
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_csv_import(self, api_client, profile):
+        """Test that valid rows are imported and invalid ones reported"""
+        Task.objects.create(user=profile, title="Existing")
+        response = api_client.post(self.url, {"file": upload("tasks.csv", CSV)})
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.data["created"] == 2
+        assert response.data["error_count"] == 2
+        assert [e["line"] for e in response.data["errors"]] == [5, 6]
+
+        tasks = list(Task.objects.filter(user=profile).order_by("_order"))
+        assert [t.title for t in tasks] == ["Existing", "First", "Second"]
+        assert tasks[2].description == "multi\nline, with commas"
+        assert tasks[2].complete is True
+
+    def test_ndjson_import(self, api_client, profile):
+        content = "\n".join(
+            [
+                json.dumps({"title": "First", "complete": True}),
+                "",
+                "{not json",
+                json.dumps(["a list"]),
+                json.dumps({"title": "x" * 201}),
+                json.dumps({"title": "Last", "description": "done"}),
+            ]
+        )
+        response = api_client.post(
+            self.url, {"file": upload("tasks.txt", content), "type": "ndjson"}
+        )
+        assert response.data["created"] == 2
+        assert [e["line"] for e in response.data["errors"]] == [3, 4, 5]
+        assert Task.objects.get(title="First").complete is True
+
+    def test_rows_are_inserted_in_batches(self, monkeypatch, api_client, profile):
+        """Test that every batch is inserted in its own transaction"""
+        monkeypatch.setattr(imports, "BATCH_SIZE", 2)
+        inserts = []
+        insert = imports._insert
+
+        def counting_insert(profile, alias, fields, order):
+            inserts.append(len(fields))
+            insert(profile, alias, fields, order)
+
+        monkeypatch.setattr(imports, "_insert", counting_insert)
+        content = "title\n" + "".join("Task %s\n" % i for i in range(5))
+        api_client.post(self.url, {"file": upload("tasks.csv", content)})
+        assert inserts == [2, 2, 1]
+        orders = Task.objects.order_by("_order").values_list("_order", flat=True)
+        assert list(orders) == [0, 1, 2, 3, 4]
+
+    def test_missing_file_or_unknown_type(self, api_client):
+        response = api_client.post(self.url, {})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        response = api_client.post(self.url, {"file": upload("tasks.xml", "<a/>")})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "type" in response.data
+
+    def test_large_file_goes_through_a_job(
+        self,
+        settings,
+        tmp_path,
+        api_client,
+        profile,
+        django_capture_on_commit_callbacks,
+    ):
+        """Test that large imports run in celery and report their progress"""
+        settings.TASK_IMPORT_INLINE_BYTES = 10
+        settings.MEDIA_ROOT = tmp_path
+        with django_capture_on_commit_callbacks(execute=True):
+            response = api_client.post(self.url, {"file": upload("tasks.csv", CSV)})
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        assert response.data["kind"] == "import"
+
+        response = api_client.get(response["Location"])
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["status"] == Job.DONE
+        assert response.data["progress"] == 100
+        assert response.data["result"]["created"] == 2
+        assert Task.objects.filter(user=profile).count() == 2
+        assert not list(tmp_path.glob("jobs/*"))
+
+    def test_jobs_of_other_users_are_hidden(self, api_client):
+        other = User.objects.create_user(email="other@example.com", password="x")
+        job = Job.objects.create(profile=other.profile, kind="import")
+        response = api_client.get(reverse("todo:api-v1:job-detail", args=[job.pk]))
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        response = api_client.get(reverse("todo:api-v1:job-list"))
+        assert response.data["results"] == []
+
+
+class TestCleanRow:
+    """Test suite for the light row validator"""
+
+    def test_valid_row(self):
+        row = {"title": "Task", "complete": "Yes", "extra": "ignored"}
+        assert imports.clean_row(row) == {
+            "title": "Task",
+            "description": "",
+            "complete": True,
+        }
+
+    @pytest.mark.parametrize(
+        "row",
+        [
+            {},
+            {"title": "   "},
+            {"title": 1},
+            {"title": "Task", "complete": "maybe"},
+            {"title": "Task", "description": ["list"]},
+        ],
+    )
+    def test_invalid_rows(self, row):
+        with pytest.raises(imports.RowError):
+            imports.clean_row(row)
@@ -0,0 +1,140 @@
+import pytest
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from accounts.models import User, Profile
+from todo.models import Task
+
+pytestmark = pytest.mark.django_db(databases=["default", "replica"])
+
+
+@pytest.fixture
+def user():
+    """Create a verified user which is replicated to the replica database"""
+    user = User.objects.create_user(
+        email="testuser@example.com", password="testpass123", is_verified=True
+    )
+    User.objects.using("replica").bulk_create([user])
+    Profile.objects.using("replica").bulk_create([user.profile])
+    return user
+
+
+@pytest.fixture
+def profile(user):
+    return user.profile
+
+
+@pytest.fixture
+def replica(settings, user):
+    """Enable replica routing with a clean pin state"""
+    settings.DATABASE_REPLICAS = {"default": "replica"}
+    cache.clear()
+    yield "replica"
+    cache.clear()
+
+
+@pytest.fixture
+def replica_task(profile):
+    """Create a task which only exists on the replica database"""
+    task = Task(user=profile, title="Replica Task", _order=0)
+    Task.objects.using("replica").bulk_create([task])
+    return Task.objects.using("replica").get(title="Replica Task")
+
+
+@pytest.fixture
+def api_client(user):
+    client = APIClient()
+    token, _ = Token.objects.get_or_create(user=user)
+    client.credentials(HTTP_AUTHORIZATION="Token " + token.key)
+    return client
+
+
+class TestReplicaReads:
+    """Test suite for reads routed to the replica database"""
+
+    def test_task_list_reads_from_replica(self, client, user, replica, replica_task):
+        """Test that the HTML task list is served from the replica"""
+        client.force_login(user)
+        response = client.get(reverse("todo:task_list"))
+        assert response.status_code == 200
+        assert [row["title"] for row in response.context["tasks"]] == [
+            replica_task.title
+        ]
+
+    def test_task_detail_reads_from_replica(self, client, user, replica, replica_task):
+        """Test that the HTML task detail is served from the replica"""
+        client.force_login(user)
+        url = reverse("todo:detail_task", kwargs={"pk": replica_task.pk})
+        response = client.get(url)
+        assert response.status_code == 200
+
+    def test_api_list_and_retrieve_read_from_replica(
+        self, api_client, replica, replica_task
+    ):
+        """Test that the API list and retrieve actions are served from the replica"""
+        response = api_client.get(reverse("todo:api-v1:task-list"))
+        assert response.status_code == status.HTTP_200_OK
+        assert [t["id"] for t in response.data["results"]] == [replica_task.id]
+
+        url = reverse("todo:api-v1:task-detail", kwargs={"pk": replica_task.pk})
+        response = api_client.get(url)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["title"] == "Replica Task"
+
+    def test_reads_use_primary_without_replicas(self, settings, client, user):
+        """Test that nothing is routed when DATABASE_REPLICAS is empty"""
+        settings.DATABASE_REPLICAS = {}
+        task = Task.objects.create(user=user.profile, title="Primary Task")
+        client.force_login(user)
+        response = client.get(reverse("todo:task_list"))
+        assert [row["title"] for row in response.context["tasks"]] == [task.title]
+
+
+class TestReadYourWrites:
+    """Test suite for pinning a user to the primary after a write"""
+
+    def test_reads_stick_to_primary_after_write(
+        self, api_client, profile, replica, replica_task
+    ):
+        """Test that a user reads their own write right after making it"""
+        url = reverse("todo:api-v1:task-list")
+        response = api_client.post(url, {"title": "Fresh Task"})
+        assert response.status_code == status.HTTP_201_CREATED
+
+        response = api_client.get(url)
+        titles = [t["title"] for t in response.data["results"]]
+        assert titles == ["Fresh Task"]
+
+    def test_pin_expires(self, settings, api_client, replica, replica_task):
+        """Test that reads go back to the replica once the pin window is over"""
+        settings.REPLICA_PIN_SECONDS = 0
+        url = reverse("todo:api-v1:task-list")
+        api_client.post(url, {"title": "Fresh Task"})
+
+        response = api_client.get(url)
+        titles = [t["title"] for t in response.data["results"]]
+        assert titles == ["Replica Task"]
+
+    def test_pin_is_per_user(self, client, user, replica, replica_task):
+        """Test that another user's write doesn't pin this user"""
+        other = User.objects.create_user(email="other@example.com", password="x")
+        Task.objects.create(user=other.profile, title="Other Task")
+
+        client.force_login(user)
+        response = client.get(reverse("todo:task_list"))
+        assert [row["title"] for row in response.context["tasks"]] == [
+            replica_task.title
+        ]
+
+
+class TestPrimaryReplicaRouter:
+    """Test suite for writes of objects loaded from the replica"""
+
+    def test_replica_objects_are_saved_to_primary(self, replica, replica_task):
+        """Test that saving a replica object writes it to the primary"""
+        replica_task.complete = True
+        replica_task.save()
+        assert Task.objects.using("default").get(pk=replica_task.pk).complete
+        assert not Task.objects.using("replica").get(pk=replica_task.pk).complete
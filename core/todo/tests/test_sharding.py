@@ -0,0 +1,257 @@
+import pytest
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from accounts.models import User
+from todo.models import Task, ShardPlacement
+from todo.sharding import create_task, hash_shard, shard_for, tasks_for
+from todo.tasks import clear_done_tasks
+
+SHARDS = ["default", "shard_1", "shard_2"]
+
+pytestmark = pytest.mark.django_db(databases=SHARDS)
+
+
+@pytest.fixture(autouse=True)
+def shards(settings):
+    """Spread tasks over three sqlite databases"""
+    settings.TASK_SHARDS = SHARDS
+    cache.clear()
+    yield SHARDS
+    cache.clear()
+
+
+@pytest.fixture
+def user():
+    """Create a verified user whose tasks live on a shard other than default"""
+    for i in range(20):
+        user = User.objects.create_user(
+            email="user%s@example.com" % i, password="testpass123", is_verified=True
+        )
+        if hash_shard(user.profile.pk) != "default":
+            return user
+
+
+@pytest.fixture
+def profile(user):
+    return user.profile
+
+
+@pytest.fixture
+def api_client(user):
+    client = APIClient()
+    token, _ = Token.objects.get_or_create(user=user)
+    client.credentials(HTTP_AUTHORIZATION="Token " + token.key)
+    return client
+
+
+@pytest.fixture
+def task(profile):
+    return tasks_for(profile).create(user=profile, title="Sharded Task")
+
+
+def other_shard(profile):
+    return next(alias for alias in SHARDS if alias != shard_for(profile.pk))
+
+
+def profile_on(alias):
+    """Create a profile whose tasks live on alias"""
+    for i in range(50):
+        user = User.objects.create_user(
+            email="other%s@example.com" % i, password="testpass123"
+        )
+        if hash_shard(user.profile.pk) == alias:
+            return user.profile
+
+
+class TestShardPlacement:
+    """Test suite for placing profiles on shards"""
+
+    def test_hash_is_stable_and_spreads(self):
+        """Test that the same profile always gets the same shard"""
+        placed = {hash_shard(pk) for pk in range(1, 100)}
+        assert placed == set(SHARDS)
+        assert [hash_shard(7) for _ in range(3)] == [hash_shard(7)] * 3
+
+    def test_task_is_written_to_its_shard(self, profile, task):
+        """Test that tasks are stored on the shard of their profile only"""
+        alias = shard_for(profile.pk)
+        assert Task.objects.using(alias).filter(pk=task.pk).exists()
+        assert not Task.objects.using("default").filter(title=task.title).exists()
+
+    def test_task_ids_are_unique_across_shards(self, profile, task):
+        """Test that tasks of different shards never get the same id"""
+        other = profile_on(other_shard(profile))
+        ids = [create_task(other, title="Other %s" % i).pk for i in range(3)]
+        ids.append(Task.objects.using("shard_2").create(title="Loose").pk)
+        assert len({task.pk, *ids}) == 5
+
+    def test_saving_a_new_task_uses_the_router(self, profile):
+        """Test that a plain save() of a new task lands on its shard"""
+        task = Task(user=profile, title="Routed Task")
+        task.save()
+        assert task._state.db == shard_for(profile.pk)
+
+
+class TestShardedViews:
+    """Test suite for the task views on a sharded setup"""
+
+    def test_api_crud(self, api_client, profile):
+        """Test that the API creates, lists, updates and deletes on the shard"""
+        url = reverse("todo:api-v1:task-list")
+        response = api_client.post(url, {"title": "New Task"})
+        assert response.status_code == status.HTTP_201_CREATED
+        task_id = response.data["id"]
+        assert tasks_for(profile).filter(pk=task_id).exists()
+
+        response = api_client.get(url)
+        assert [t["id"] for t in response.data["results"]] == [task_id]
+
+        detail = reverse("todo:api-v1:task-detail", kwargs={"pk": task_id})
+        response = api_client.patch(detail, {"complete": True})
+        assert response.status_code == status.HTTP_200_OK
+        assert tasks_for(profile).get(pk=task_id).complete is True
+
+        response = api_client.delete(detail)
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+        assert not tasks_for(profile).exists()
+
+    def test_html_views(self, client, user, profile, task):
+        """Test that the HTML list, toggle and delete views use the shard"""
+        client.force_login(user)
+        response = client.get(reverse("todo:task_list"))
+        assert [row["title"] for row in response.context["tasks"]] == [task.title]
+
+        client.post(reverse("todo:toggle_task", kwargs={"pk": task.pk}))
+        assert tasks_for(profile).get(pk=task.pk).complete is True
+
+        client.post(reverse("todo:delete_task", kwargs={"pk": task.pk}))
+        assert not tasks_for(profile).exists()
+
+    def test_html_create(self, client, user, profile):
+        """Test that the HTML create view stores the task on the shard"""
+        client.force_login(user)
+        client.post(reverse("todo:create_task"), {"title": "Created"})
+        assert tasks_for(profile).get().title == "Created"
+
+    def test_profile_view_counts(self, client, user, profile, task):
+        """Test that the profile statistics are read from the shard"""
+        tasks_for(profile).create(user=profile, title="Done", complete=True)
+        client.force_login(user)
+        response = client.get(reverse("accounts:profile"))
+        assert response.context["total_tasks"] == 2
+        assert response.context["completed_tasks"] == 1
+
+    def test_clear_done_tasks_visits_every_shard(self, profile, task):
+        """Test that the cleanup removes completed tasks on all shards"""
+        for alias in SHARDS:
+            Task.objects.using(alias).create(title="Done", complete=True)
+        clear_done_tasks()
+        for alias in SHARDS:
+            assert not Task.objects.using(alias).filter(complete=True).exists()
+        assert tasks_for(profile).filter(pk=task.pk).exists()
+
+    def test_deleting_a_profile_deletes_sharded_tasks(self, user, profile, task):
+        """Test that the profile cascade reaches tasks on other shards"""
+        alias = shard_for(profile.pk)
+        user.delete()
+        assert not Task.objects.using(alias).filter(pk=task.pk).exists()
+
+
+class TestMoveTaskShard:
+    """Test suite for the move_task_shard command"""
+
+    def test_move_keeps_tasks_intact(self, api_client, profile, task):
+        """Test that a moved user keeps ids, dates and order of their tasks"""
+        second = tasks_for(profile).create(user=profile, title="Second")
+        source, target = shard_for(profile.pk), other_shard(profile)
+        before = list(tasks_for(profile).order_by("id").values())
+
+        call_command(
+            "move_task_shard", profile.pk, target, batch_size=1, grace=0, verbosity=0
+        )
+
+        assert shard_for(profile.pk) == target
+        assert not Task.objects.using(source).filter(user=profile).exists()
+        assert list(tasks_for(profile).order_by("id").values()) == before
+
+        response = api_client.get(reverse("todo:api-v1:task-list"))
+        ids = {t["id"] for t in response.data["results"]}
+        assert ids == {task.pk, second.pk}
+
+    def test_move_keeps_sync_state(self, settings, api_client, profile, task):
+        """Test that a moved user's delta sync sees no spurious changes"""
+        settings.TASK_SYNC_OVERLAP = 0
+        url = reverse("todo:api-v1:task-changes")
+        deleted = tasks_for(profile).create(user=profile, title="Deleted")
+        deleted_id = deleted.pk
+        cursor = api_client.get(url).data["cursor"]
+        deleted.delete()
+        response = api_client.get(url, {"since": cursor})
+        assert response.data["deleted"] == [deleted_id]
+
+        call_command("move_task_shard", profile.pk, other_shard(profile), grace=0)
+
+        after_move = api_client.get(url, {"since": response.data["cursor"]})
+        assert after_move.data["changed"] == [] and after_move.data["deleted"] == []
+        assert api_client.get(url, {"since": cursor}).data == response.data
+
+    def test_move_keeps_tasks_of_other_profiles(self, profile, task):
+        """Test that moving onto a shard leaves the tasks already there"""
+        target = other_shard(profile)
+        other = profile_on(target)
+        kept = create_task(other, title="Other Task")
+
+        call_command("move_task_shard", profile.pk, target, grace=0, verbosity=0)
+
+        assert tasks_for(other).get().pk == kept.pk
+        assert tasks_for(profile).get().pk == task.pk
+
+    def test_move_refuses_ids_taken_on_the_target(self, profile, task):
+        """Test that a task id another profile has on the target isn't lost"""
+        source, target = shard_for(profile.pk), other_shard(profile)
+        other = profile_on(target)
+        # left over from before ids were unique across the shards
+        Task.objects.using(target).create(pk=task.pk, user=other, title="Taken")
+
+        with pytest.raises(CommandError):
+            call_command("move_task_shard", profile.pk, target, grace=0)
+
+        assert Task.objects.using(target).get(pk=task.pk).user == other
+        assert shard_for(profile.pk) == source
+        assert tasks_for(profile).get().pk == task.pk
+
+    def test_move_keeps_writes_made_during_the_grace(self, monkeypatch, profile, task):
+        """Test that tasks written on either shard after the switch survive"""
+        source, target = shard_for(profile.pk), other_shard(profile)
+        written = []
+
+        def write(seconds):
+            # a request of the new placement, and one still on the old shard
+            written.append(create_task(profile, title="On Target").pk)
+            written.append(
+                Task.objects.using(source).create(user=profile, title="Stale").pk
+            )
+
+        monkeypatch.setattr("todo.sharding.time.sleep", write)
+        call_command("move_task_shard", profile.pk, target, verbosity=0)
+
+        ids = set(Task.objects.using(target).values_list("id", flat=True))
+        assert ids == {task.pk, *written}
+        assert not Task.objects.using(source).filter(user=profile).exists()
+
+    def test_placement_survives_cache_loss(self, profile, task):
+        """Test that the moved shard is persisted, not only cached"""
+        target = other_shard(profile)
+        call_command("move_task_shard", profile.pk, target, grace=0, verbosity=0)
+        cache.clear()
+        assert shard_for(profile.pk) == target
+        assert ShardPlacement.objects.get(profile=profile).database == target
+
+    def test_unknown_shard_is_rejected(self, profile):
+        """Test that moving to a database which isn't a shard fails"""
+        with pytest.raises(Exception):
+            call_command("move_task_shard", profile.pk, "nope", verbosity=0)
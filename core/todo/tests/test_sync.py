@@ -0,0 +1,209 @@
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from accounts.models import User
+from todo import sync
+from todo.models import Task, TaskTombstone
+from todo.tasks import clear_done_tasks, prune_tombstones
+
+
+@pytest.fixture
+def user(db):
+    """Create a verified user for testing"""
+    return User.objects.create_user(
+        email="testuser@example.com", password="testpass123", is_verified=True
+    )
+
+
+@pytest.fixture
+def profile(user):
+    return user.profile
+
+
+@pytest.fixture
+def api_client(user):
+    client = APIClient()
+    token, _ = Token.objects.get_or_create(user=user)
+    client.credentials(HTTP_AUTHORIZATION="Token " + token.key)
+    return client
+
+
+@pytest.fixture(autouse=True)
+def exact_cursors(settings):
+    """End syncs at the last change, the overlap is tested on its own"""
+    settings.TASK_SYNC_OVERLAP = 0
+
+
+@pytest.fixture
+def changes(api_client):
+    """GET the changes endpoint, returns the response"""
+    url = reverse("todo:api-v1:task-changes")
+    return lambda **params: api_client.get(url, params)
+
+
+@pytest.mark.django_db
+class TestTaskChanges:
+    """Test suite for the delta sync endpoint"""
+
+    def test_unauthenticated(self, client):
+        response = client.get(reverse("todo:api-v1:task-changes"))
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_first_sync_returns_every_task(self, changes, profile):
+        """Test that a sync without cursor returns the tasks in full"""
+        task = Task.objects.create(user=profile, title="Task", description="Full")
+        response = changes()
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["has_more"] is False
+        assert response.data["deleted"] == []
+        assert [t["id"] for t in response.data["changed"]] == [task.id]
+        assert response.data["changed"][0]["description"] == "Full"
+
+    def test_only_changes_since_cursor(self, changes, profile):
+        """Test that the next sync only returns what changed in between"""
+        first = Task.objects.create(user=profile, title="First")
+        second = Task.objects.create(user=profile, title="Second")
+        cursor = changes().data["cursor"]
+
+        assert changes(since=cursor).data["changed"] == []
+
+        second.title = "Second renamed"
+        second.save()
+        third = Task.objects.create(user=profile, title="Third")
+        first_id = first.id
+        first.delete()
+        response = changes(since=cursor)
+        assert [t["id"] for t in response.data["changed"]] == [second.id, third.id]
+        assert response.data["deleted"] == [first_id]
+        assert changes(since=response.data["cursor"]).data["changed"] == []
+
+    def test_other_users_changes_are_hidden(self, changes, profile):
+        other = User.objects.create_user(email="other@example.com", password="x")
+        task = Task.objects.create(user=other.profile, title="Other Task")
+        task.delete()
+        response = changes()
+        assert response.data["changed"] == [] and response.data["deleted"] == []
+
+    def test_clear_done_tasks_leaves_tombstones(self, changes, profile):
+        """Test that the periodic cleanup reports its deletions"""
+        done = Task.objects.create(user=profile, title="Done", complete=True)
+        cursor = changes().data["cursor"]
+        clear_done_tasks()
+        assert changes(since=cursor).data["deleted"] == [done.id]
+
+    def test_pages_share_dates_without_gaps(self, changes, profile):
+        """Test that limited pages neither skip nor repeat same date rows"""
+        tasks = [Task(user=profile, title="Task %s" % i, _order=i) for i in range(5)]
+        Task.objects.bulk_create(tasks)
+        Task.objects.update(updated_date=timezone.now())
+        tombstone_date = Task.objects.first().updated_date
+        TaskTombstone.objects.bulk_create(
+            [
+                TaskTombstone(
+                    task_id=1000 + i, user=profile, deleted_date=tombstone_date
+                )
+                for i in range(3)
+            ]
+        )
+        seen, deleted, cursor = [], [], "0.0.0"
+        while True:
+            response = changes(since=cursor, limit=2)
+            seen += [t["id"] for t in response.data["changed"]]
+            deleted += response.data["deleted"]
+            cursor = response.data["cursor"]
+            if not response.data["has_more"]:
+                break
+        assert seen == sorted(Task.objects.values_list("id", flat=True))
+        assert deleted == [1000, 1001, 1002]
+
+    def test_late_commits_are_read_again(self, settings, changes, profile):
+        """Test that a write committed behind the cursor isn't missed"""
+        settings.TASK_SYNC_OVERLAP = 30
+        stamped = timezone.now()
+        Task.objects.create(user=profile, title="Earlier")
+        cursor = changes().data["cursor"]
+        # stamped before the sync read, committed after it
+        late = Task.objects.create(user=profile, title="Late")
+        Task.objects.filter(pk=late.pk).update(updated_date=stamped)
+
+        response = changes(since=cursor)
+        assert late.id in [t["id"] for t in response.data["changed"]]
+        assert response.data["has_more"] is False
+
+    def test_overlap_does_not_hold_back_pages(self, settings, changes, profile):
+        """Test that only the end of a sync is kept back, pages go on"""
+        settings.TASK_SYNC_OVERLAP = 30
+        for i in range(3):
+            Task.objects.create(user=profile, title="Task %s" % i)
+        first = changes(limit=2).data
+        assert first["has_more"] is True
+        rest = changes(since=first["cursor"], limit=2).data
+        assert len(first["changed"]) + len(rest["changed"]) == 3
+        assert rest["has_more"] is False
+
+    def test_invalid_cursor(self, changes):
+        response = changes(since="yesterday")
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "since" in response.data
+
+    def test_expired_cursor(self, settings, changes, profile):
+        """Test that cursors older than the tombstones ask for a full sync"""
+        Task.objects.create(user=profile, title="Task")
+        cursor = changes().data["cursor"]
+        settings.TASK_TOMBSTONE_DAYS = -1
+        response = changes(since=cursor)
+        assert response.status_code == status.HTTP_410_GONE
+
+    def test_queries_do_not_grow_with_tasks(
+        self, changes, profile, django_assert_max_num_queries
+    ):
+        """Test that a sync reads the changes only"""
+        Task.objects.bulk_create(
+            [Task(user=profile, title="Task %s" % i, _order=i) for i in range(50)]
+        )
+        cursor = changes().data["cursor"]
+        Task.objects.create(user=profile, title="New Task")
+        with django_assert_max_num_queries(5):
+            response = changes(since=cursor)
+        assert [t["title"] for t in response.data["changed"]] == ["New Task"]
+
+    def test_changes_use_index(self, profile):
+        """Test that the changes are read from the (user, updated_date) index"""
+        since = timezone.now()
+        plan = (
+            Task.objects.filter(user=profile, updated_date__gt=since)
+            .order_by("updated_date", "id")
+            .explain()
+        )
+        if connection.vendor == "sqlite":
+            assert "todo_task_changes_idx" in plan
+
+
+@pytest.mark.django_db
+class TestTombstones:
+    """Test suite for the lifecycle of tombstones"""
+
+    def test_prune_tombstones(self, settings, profile):
+        old = TaskTombstone.objects.create(
+            task_id=1, user=profile, deleted_date=timezone.now() - timedelta(days=31)
+        )
+        TaskTombstone.objects.create(task_id=2, user=profile)
+        settings.TASK_TOMBSTONE_DAYS = 30
+        assert prune_tombstones() == 1
+        assert not TaskTombstone.objects.filter(pk=old.pk).exists()
+
+    def test_profile_deletion_removes_tombstones(self, user, profile):
+        task = Task.objects.create(user=profile, title="Task")
+        task.delete()
+        user.delete()
+        assert not TaskTombstone.objects.exists()
+
+    def test_cursor_round_trip(self):
+        position = (timezone.now(), sync.TOMBSTONE, 42)
+        assert sync.decode_cursor(sync.encode_cursor(position)) == position
@@ -89,10 +89,220 @@ class TestTaskListView:
         url = reverse("todo:task_list")
         response = client.get(url)
         assert response.status_code == 200
-        tasks = response.context["tasks"]
-        assert len(tasks) == 1
-        assert task in tasks
-        assert another_task not in tasks
+        ids = [row["id"] for row in response.context["tasks"]]
+        assert ids == [task.id]
+        assert another_task.id not in ids
+
+    def test_task_list_filters(self, client, user, profile, task, completed_task):
+        """Test that the status and search filters select the tasks in SQL"""
+        Task.objects.create(user=profile, title="Groceries", description="milk eggs")
+        client.force_login(user)
+        url = reverse("todo:task_list")
+
+        def titles(**params):
+            response = client.get(url, params)
+            return [row["title"] for row in response.context["tasks"]]
+
+        assert titles(status="pending") == ["Test Task", "Groceries"]
+        assert titles(status="completed") == ["Completed Task"]
+        assert titles(search="EGGS") == ["Groceries"]
+        assert titles(search="task description") == ["Test Task"]
+        assert titles(search="task", status="completed") == ["Completed Task"]
+        assert titles(status="unknown") == ["Test Task", "Completed Task", "Groceries"]
+        response = client.get(url, {"search": "nothing"})
+        assert b"No tasks found with the selected filters." in response.content
+
+    def test_task_list_rows(self, client, user, task):
+        """Test that the list reads the shown columns, description cut in SQL"""
+        task.description = "word " * 100
+        task.save()
+        client.force_login(user)
+        response = client.get(reverse("todo:task_list"))
+        (row,) = response.context["tasks"]
+        assert set(row) == {
+            "id",
+            "title",
+            "complete",
+            "created_date",
+            "updated_date",
+            "excerpt",
+        }
+        assert len(row["excerpt"]) == 200
+        assert "word " * 14 + "word …" in response.content.decode()
+
+    def test_task_list_keyset_pages(self, client, user, profile, monkeypatch):
+        """Test that pages follow each other by id, keeping the filters"""
+        monkeypatch.setattr("todo.views.TaskListView.page_size", 2)
+        ids = [
+            Task.objects.create(user=profile, title="task %s" % i).id for i in range(5)
+        ]
+        client.force_login(user)
+        url = reverse("todo:task_list")
+
+        response = client.get(url, {"search": "task"})
+        page = response.context["page"]
+        assert [row["id"] for row in page.rows] == ids[:2]
+        assert page.previous_before is None
+        assert page.next_after == ids[1]
+        assert (
+            'href="?after=%s&amp;search=task"' % ids[1]
+        ).encode() in response.content
+
+        page = client.get(url, {"after": ids[1]}).context["page"]
+        assert [row["id"] for row in page.rows] == ids[2:4]
+        assert (page.previous_before, page.next_after) == (ids[2], ids[3])
+
+        page = client.get(url, {"after": ids[3]}).context["page"]
+        assert [row["id"] for row in page.rows] == ids[4:]
+        assert (page.previous_before, page.next_after) == (ids[4], None)
+
+        page = client.get(url, {"before": ids[2]}).context["page"]
+        assert [row["id"] for row in page.rows] == ids[:2]
+        assert (page.previous_before, page.next_after) == (None, ids[1])
+
+        assert client.get(url, {"after": "x"}).status_code == 404
+
+    def test_task_list_page_queries(
+        self, client, user, profile, django_assert_num_queries
+    ):
+        """Test that a page reads the user and its rows, no count"""
+        for i in range(3):
+            Task.objects.create(user=profile, title="task %s" % i)
+        client.force_login(user)
+        url = reverse("todo:task_list")
+        client.get(url)
+        with django_assert_num_queries(2):
+            client.get(url, {"status": "pending"})
+
+
+@pytest.mark.django_db
+class TestTaskListRowCache:
+    """Test suite for the cached rows of the task list"""
+
+    @pytest.fixture
+    def reversed_urls(self, monkeypatch):
+        """Count the urls reversed, {% url %} imports reverse when rendered"""
+        import django.urls
+
+        calls = []
+
+        def counted(viewname, *args, **kwargs):
+            calls.append(viewname)
+            return reverse(viewname, *args, **kwargs)
+
+        monkeypatch.setattr(django.urls, "reverse", counted)
+        return calls
+
+    def test_rerender_reads_cached_rows(
+        self, client, user, profile, reversed_urls, django_assert_num_queries
+    ):
+        """Test that an unchanged list costs its rows query and cache reads"""
+        for i in range(3):
+            Task.objects.create(user=profile, title="task %s" % i)
+        client.force_login(user)
+        url = reverse("todo:task_list")
+        first = client.get(url).content
+        rows = reversed_urls.count("todo:detail_task")
+        reversed_urls.clear()
+
+        # the session's user and the rows, no url is reversed for them
+        with django_assert_num_queries(2):
+            second = client.get(url).content
+        assert rows == 3
+        assert "todo:detail_task" not in reversed_urls
+        assert second.count(b"todo-item-card") == first.count(b"todo-item-card") == 3
+
+    def test_changed_task_is_rendered_again(self, client, user, task):
+        client.force_login(user)
+        url = reverse("todo:task_list")
+        assert b"Test Task" in client.get(url).content
+        task.title = "Renamed Task"
+        task.save()
+        content = client.get(url).content
+        assert b"Renamed Task" in content
+        assert b"Test Task" not in content
+
+    def test_rows_hold_no_csrf_token(self, client, user, task, completed_task):
+        """Test that the rows post the page's form, the only one with a token"""
+        client.force_login(user)
+        content = client.get(reverse("todo:task_list")).content.decode()
+        assert content.count("csrfmiddlewaretoken") == 1
+        assert content.count('form="task-action-form"') == 4
+        toggle = reverse("todo:toggle_task", kwargs={"pk": task.pk})
+        assert 'formaction="%s"' % toggle in content
+
+    def test_cached_template_loader(self):
+        from django.template import engines
+
+        loader = engines["django"].engine.template_loaders[0]
+        assert loader.__module__ == "django.template.loaders.cached"
+
+
+@pytest.mark.django_db
+class TestPartialResponses:
+    """Test suite for the partial HTML of the task views"""
+
+    partial = {"HTTP_X_PARTIAL": "true"}
+
+    def test_toggle_returns_the_row(self, client, user, task):
+        client.force_login(user)
+        url = reverse("todo:toggle_task", kwargs={"pk": task.pk})
+        response = client.post(url, **self.partial)
+        assert response.status_code == 200
+        content = response.content.decode()
+        assert content.count("todo-item-card") == 1
+        assert 'id="task-%s"' % task.pk in content
+        assert "Mark as incomplete" in content
+        assert "<html" not in content
+        assert "X-Partial" in response["Vary"]
+        task.refresh_from_db()
+        assert task.complete is True
+
+    def test_delete_returns_no_content(self, client, user, task):
+        client.force_login(user)
+        url = reverse("todo:delete_task", kwargs={"pk": task.pk})
+        response = client.post(url, **self.partial)
+        assert response.status_code == 204
+        assert not response.content
+        assert not Task.objects.filter(pk=task.pk).exists()
+
+    def test_update_returns_the_row(self, client, user, task):
+        client.force_login(user)
+        url = reverse("todo:edit_task", kwargs={"pk": task.pk})
+        response = client.post(
+            url, {"title": "Edited", "description": "new words"}, **self.partial
+        )
+        assert response.status_code == 200
+        content = response.content.decode()
+        assert "Edited" in content
+        assert "new words" in content
+
+    def test_list_chunks(self, client, user, profile, monkeypatch):
+        """Test that the list sends the rows of a page and the next page"""
+        monkeypatch.setattr("todo.views.TaskListView.page_size", 2)
+        ids = [
+            Task.objects.create(user=profile, title="task %s" % i).id for i in range(3)
+        ]
+        client.force_login(user)
+        url = reverse("todo:task_list")
+
+        response = client.get(url, {"search": "task"}, **self.partial)
+        content = response.content.decode()
+        assert content.count("todo-item-card") == 2
+        assert "<html" not in content
+        assert response["X-Next-Page"] == "?after=%s&search=task" % ids[1]
+        assert "X-Partial" in response["Vary"]
+
+        response = client.get(url + response["X-Next-Page"], **self.partial)
+        assert response.content.decode().count("todo-item-card") == 1
+        assert response["X-Next-Page"] == ""
+
+    def test_full_page_varies_on_the_header(self, client, user, task):
+        client.force_login(user)
+        response = client.get(reverse("todo:task_list"))
+        assert "X-Partial" in response["Vary"]
+        assert b'data-next=""' in response.content
+        assert b"js/task_list.js" in response.content
 
 
 @pytest.mark.django_db
@@ -12,7 +12,11 @@ from django.contrib.auth.mixins import LoginRequiredMixin
 from django.views import View
 from .models import Task
 from todo.forms import TaskUpdateForm
-from django.http import HttpResponse
+from django.http import Http404, HttpResponse
+from django.utils.http import urlencode
+from todo.sharding import tasks_for
+from accounts.models import get_profile
+from todo import listing, partials
 
 
 class TaskCreateView(LoginRequiredMixin, CreateView):
@@ -27,7 +31,7 @@ class TaskCreateView(LoginRequiredMixin, CreateView):
     success_url = reverse_lazy("todo:task_list")
 
     def form_valid(self, form):
-        form.instance.user = self.request.user.profile
+        form.instance.user = get_profile(self.request.user)
         return super(TaskCreateView, self).form_valid(form)
 
 
@@ -35,7 +39,8 @@ class TaskDeleteView(LoginRequiredMixin, DeleteView):
     """
     View to delete a task,
     restricted to tasks of the logged-in user's profile
-    GET requests are treated as POST to allow direct deletion
+    GET requests are treated as POST to allow direct deletion,
+    partial requests get an empty 204 (see todo.partials)
     """
 
     model = Task
@@ -46,13 +51,20 @@ class TaskDeleteView(LoginRequiredMixin, DeleteView):
         return self.post(request, *args, **kwargs)
 
     def get_queryset(self):
-        return self.model.objects.filter(user=self.request.user.profile)
+        return tasks_for(get_profile(self.request.user))
+
+    def delete(self, request, *args, **kwargs):
+        response = super().delete(request, *args, **kwargs)
+        if partials.requested(request):
+            return HttpResponse(status=204)
+        return response
 
 
 class TaskUpdateView(LoginRequiredMixin, UpdateView):
     """
     View to update a task,
-    restricted to the logged-in user's tasks
+    restricted to the logged-in user's tasks,
+    partial requests get the row of the task (see todo.partials)
     """
 
     model = Task
@@ -61,18 +73,30 @@ class TaskUpdateView(LoginRequiredMixin, UpdateView):
     template_name = "todo/todo_edit.html"
 
     def get_queryset(self):
-        return self.model.objects.filter(user=self.request.user.profile)
+        return tasks_for(get_profile(self.request.user))
+
+    def form_valid(self, form):
+        response = super().form_valid(form)
+        if partials.requested(self.request):
+            return partials.render_row(
+                self.request, self.get_queryset(), self.object.pk
+            )
+        return response
 
 
 class TaskToggleView(LoginRequiredMixin, View):
     """
-    View to toggle the completion status of a task
+    View to toggle the completion status of a task,
+    partial requests get the row of the task (see todo.partials)
     """
 
     def post(self, request, pk, *args, **kwargs):
-        task = get_object_or_404(Task, pk=pk, user=self.request.user.profile)
+        tasks = tasks_for(get_profile(self.request.user))
+        task = get_object_or_404(tasks, pk=pk)
         task.complete = not task.complete
         task.save()
+        if partials.requested(request):
+            return partials.render_row(request, tasks, pk)
         return redirect("todo:task_list")
 
 
@@ -86,17 +110,66 @@ class TaskDetailView(LoginRequiredMixin, DetailView):
     context_object_name = "todo"
 
     def get_queryset(self):
-        return self.model.objects.filter(user=self.request.user.profile)
+        return tasks_for(get_profile(self.request.user), read=True)
 
 
 class TaskListView(LoginRequiredMixin, ListView):
     """
-    # View to list all tasks of the logged-in user
+    View to list the tasks of the logged-in user, filtered by ?status= and
+    ?search= and paginated with ?after= and ?before= (see todo.listing),
+    partial requests get the rows of the page (see todo.partials)
     """
 
     model = Task
     context_object_name = "tasks"
     template_name = "todo/todo_list.html"
+    page_size = listing.PAGE_SIZE
 
     def get_queryset(self):
-        return Task.objects.filter(user=self.request.user.profile)
+        return listing.filter_tasks(
+            tasks_for(get_profile(self.request.user), read=True),
+            status=self.request.GET.get("status"),
+            search=self.request.GET.get("search"),
+        )
+
+    def get_context_data(self, **kwargs):
+        try:
+            after, before = (
+                int(self.request.GET[name]) if self.request.GET.get(name) else None
+                for name in ("after", "before")
+            )
+        except ValueError:
+            raise Http404("Invalid page.")
+        page = listing.keyset_page(self.object_list, after, before, self.page_size)
+        filters = {
+            name: self.request.GET[name]
+            for name in ("status", "search")
+            if self.request.GET.get(name)
+        }
+        return super().get_context_data(
+            object_list=page.rows,
+            page=page,
+            filters=filters,
+            # links to the other pages, carrying the filters
+            previous_url=page_url(before=page.previous_before, **filters),
+            next_url=page_url(after=page.next_after, **filters),
+            **partials.row_context(),
+            **kwargs,
+        )
+
+    def render_to_response(self, context, **response_kwargs):
+        if not partials.requested(self.request):
+            return partials.vary(super().render_to_response(context, **response_kwargs))
+        response = partials.render_rows(self.request, context["tasks"])
+        response["X-Next-Page"] = context["next_url"]
+        return response
+
+
+def page_url(after=None, before=None, **filters):
+    """
+    Query string of the page after or before an id, "" without either
+    """
+    if after is None and before is None:
+        return ""
+    position = {"after": after} if after is not None else {"before": before}
+    return "?" + urlencode({**position, **filters})